@@ -1,10 +1,15 @@
 """Admin routes for package assignments and payments"""
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.export import EXPORT_FORMATS, export_response
+from app.core.listing import COUNT_MODES, count_rows, set_count_headers
+from app.core.pagination import InvalidCursor, paginate, with_next_cursor
 from app.auth.dependencies import get_current_user
+from app.auth.principal_cache import principal_cache
+from app.dashboard.cache import dashboard_cache
 from app.users.models import UserRole, User
 from app.admin import schemas, services, models
 from app.packages import services as package_services, schemas as package_schemas
@@ -67,23 +72,107 @@ async def confirm_payment(
 	return {"message": "Payment confirmed", "payment": payment}
 
 
+def _list_page(
+	response: Response,
+	db: Session,
+	projection,
+	build_query,
+	fields: Optional[str],
+	skip: int,
+	limit: int,
+	cursor: Optional[str],
+	count: Optional[str],
+	filtered: bool,
+):
+	"""
+	One page of projected rows (array body) for the admin lists.
+	X-Next-Cursor continues the listing; with ?count=exact|estimate the total
+	is sent in X-Total-Count (X-Count-Mode tells which one was used).
+	"""
+	try:
+		names = projection.parse_fields(fields)
+		query = build_query()
+		page = projection.page(query, names, limit, skip=skip, cursor=cursor)
+	except (InvalidCursor, ValueError) as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	if count:
+		total, mode = count_rows(db, query, projection.model, mode=count, filtered=filtered)
+		set_count_headers(response, total, mode)
+	return with_next_cursor(response, page)
+
+
+LIST_LIMIT = Query(100, ge=1, le=1000)
+COUNT_MODE = Query(None, pattern=f"^({'|'.join(COUNT_MODES)})$")
+
+
 @router.get("/package-assignments")
-async def list_package_assignments(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-	assignments = db.query(models.AdminPackageAssignment).all()
-	return assignments
+async def list_package_assignments(
+	response: Response,
+	skip: int = 0,
+	limit: int = LIST_LIMIT,
+	cursor: Optional[str] = None,
+	fields: Optional[str] = None,
+	count: Optional[str] = COUNT_MODE,
+	status: Optional[str] = None,
+	student_id: Optional[int] = None,
+	tutor_id: Optional[int] = None,
+	package_id: Optional[int] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	"""Package assignments with student/tutor/package names (one joined query)"""
+	return _list_page(
+		response, db, services.AdminListingService.ASSIGNMENT_FIELDS,
+		lambda: services.AdminListingService.assignments_query(db, status, student_id, tutor_id, package_id),
+		fields, skip, limit, cursor, count,
+		filtered=any(v is not None for v in (status, student_id, tutor_id, package_id)),
+	)
 
 
 @router.get("/payments")
-async def list_payments(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-	payments = db.query(models.AdminPayment).all()
-	return payments
+async def list_payments(
+	response: Response,
+	skip: int = 0,
+	limit: int = LIST_LIMIT,
+	cursor: Optional[str] = None,
+	fields: Optional[str] = None,
+	count: Optional[str] = COUNT_MODE,
+	status: Optional[str] = None,
+	student_id: Optional[int] = None,
+	package_assignment_id: Optional[int] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	return _list_page(
+		response, db, services.AdminListingService.PAYMENT_FIELDS,
+		lambda: services.AdminListingService.payments_query(db, status, student_id, package_assignment_id),
+		fields, skip, limit, cursor, count,
+		filtered=any(v is not None for v in (status, student_id, package_assignment_id)),
+	)
 
 
 @router.get("/users")
-async def list_users(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-	"""Get all users for admin dashboard"""
-	users = db.query(User).all()
-	return users
+async def list_users(
+	response: Response,
+	skip: int = 0,
+	limit: int = LIST_LIMIT,
+	cursor: Optional[str] = None,
+	fields: Optional[str] = None,
+	count: Optional[str] = COUNT_MODE,
+	role: Optional[str] = None,
+	is_active: Optional[bool] = None,
+	is_verified: Optional[bool] = None,
+	search: Optional[str] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	"""Get users for admin dashboard (paginated, filterable, `fields` projection)"""
+	return _list_page(
+		response, db, services.AdminListingService.USER_FIELDS,
+		lambda: services.AdminListingService.users_query(db, role, is_active, is_verified, search),
+		fields, skip, limit, cursor, count,
+		filtered=any(v is not None for v in (role, is_active, is_verified, search)),
+	)
 
 
 @router.put("/users/{user_id}/approve")
@@ -100,6 +189,7 @@ async def approve_user(
 	user.is_verified = True
 	user.is_active = True
 	db.commit()
+	principal_cache.invalidate_user(user.id)
 	db.refresh(user)
 	
 	return {"message": "User approved successfully", "user": user}
@@ -120,23 +210,30 @@ async def reject_user(
 	user.is_verified = False
 	user.is_active = False
 	db.commit()
+	principal_cache.invalidate_user(user.id)
 	db.refresh(user)
 	
 	return {"message": "User rejected", "reason": reason}
 
 
 @router.get("/pending-approvals")
-async def get_pending_approvals(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-	"""Get all users pending approval (mainly tutors)"""
-	from app.users.models import Tutor
-	
-	pending_tutors = db.query(User).join(Tutor).filter(
-		User.role == UserRole.TUTOR,
-		User.is_verified == False,
-		User.is_active == True
-	).all()
-	
-	return pending_tutors
+async def get_pending_approvals(
+	response: Response,
+	skip: int = 0,
+	limit: int = LIST_LIMIT,
+	cursor: Optional[str] = None,
+	fields: Optional[str] = None,
+	count: Optional[str] = COUNT_MODE,
+	search: Optional[str] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	"""Get users pending approval (mainly tutors)"""
+	return _list_page(
+		response, db, services.AdminListingService.USER_FIELDS,
+		lambda: services.AdminListingService.pending_approvals_query(db, search),
+		fields, skip, limit, cursor, count, filtered=True,
+	)
 
 
 @router.get("/reports/overview")
@@ -147,30 +244,17 @@ async def get_reports_overview(
 ):
 	"""Get comprehensive report data"""
 	from datetime import datetime, timedelta
-	from sqlalchemy import func, and_
-	from app.packages.models import Package
-	from app.bookings.models import Booking, BookingStatus
-	from app.payments.models import Payment
+	from sqlalchemy import func
+	from app.analytics.services import AnalyticsService
 	
 	end_date = datetime.utcnow()
 	start_date = end_date - timedelta(days=days)
 	
-	# Revenue in period
-	total_revenue = db.query(func.coalesce(func.sum(Payment.amount_cents), 0)).filter(
-		and_(Payment.created_at >= start_date, Payment.status == "succeeded")
-	).scalar() or 0
-	
-	# Bookings stats
-	total_bookings = db.query(func.count(Booking.id)).filter(
-		Booking.created_at >= start_date
-	).scalar() or 0
-	
-	completed_bookings = db.query(func.count(Booking.id)).filter(
-		and_(
-			Booking.created_at >= start_date,
-			Booking.status == BookingStatus.COMPLETED
-		)
-	).scalar() or 0
+	# Revenue and bookings in period, from the daily rollups (bookings by lesson day)
+	total_revenue = await AnalyticsService.payment_amount_cents(db, start_day=start_date.date(), end_day=end_date.date())
+	booking_totals = await AnalyticsService.booking_totals(db, start_day=start_date.date(), end_day=end_date.date())
+	total_bookings = booking_totals["lessons"]
+	completed_bookings = booking_totals["completed"]
 	
 	# Active users
 	active_users = db.query(func.count(User.id)).filter(
@@ -249,9 +333,7 @@ async def get_package_assignments(
 ):
 	"""Get all assignments for a specific package"""
 	try:
-		assignments = db.query(models.AdminPackageAssignment).filter(
-			models.AdminPackageAssignment.package_id == package_id
-		).all()
+		assignments = services.AdminPackageService.get_package_assignments(db, package_id)
 		
 		# Transform to include student details
 		result = []
@@ -276,6 +358,25 @@ async def get_package_assignments(
 		raise HTTPException(status_code=500, detail=str(e))
 
 
+MAX_STATS_PACKAGES = 500
+
+
+@router.get("/packages/stats")
+async def get_packages_stats(
+	ids: str = Query(..., description="Comma separated package ids"),
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	"""Statistics for many packages at once, keyed by package id (admin package list)"""
+	try:
+		package_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+	except ValueError:
+		raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+	if len(package_ids) > MAX_STATS_PACKAGES:
+		raise HTTPException(status_code=400, detail=f"At most {MAX_STATS_PACKAGES} package ids per request")
+	return services.AdminPackageService.get_package_stats(db, package_ids)
+
+
 @router.get("/packages/{package_id}/stats")
 async def get_package_stats(
 	package_id: int,
@@ -283,40 +384,10 @@ async def get_package_stats(
 	admin_user=Depends(require_admin),
 ):
 	"""Get statistics for a specific package"""
-	try:
-		# Get assignments
-		assignments = db.query(models.AdminPackageAssignment).filter(
-			models.AdminPackageAssignment.package_id == package_id
-		).all()
-		
-		# Get package
-		from app.packages import models as package_models
-		package = db.query(package_models.Package).filter(
-			package_models.Package.id == package_id
-		).first()
-		
-		if not package:
-			raise ValueError("Package not found")
-		
-		# Calculate stats
-		total_assignments = len(assignments)
-		active_assignments = len([a for a in assignments if a.status.value == 'active'])
-		total_hours_used = sum(a.hours_used for a in assignments)
-		total_revenue = sum(a.custom_price or package.price for a in assignments)
-		
-		# Calculate completion rate
-		total_possible_hours = total_assignments * package.total_hours
-		avg_completion_rate = (total_hours_used / total_possible_hours * 100) if total_possible_hours > 0 else 0
-		
-		return {
-			"total_assignments": total_assignments,
-			"active_assignments": active_assignments,
-			"total_hours_used": total_hours_used,
-			"total_revenue": float(total_revenue),
-			"avg_completion_rate": avg_completion_rate
-		}
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=str(e))
+	stats = services.AdminPackageService.get_package_stats(db, [package_id]).get(package_id)
+	if stats is None:
+		raise HTTPException(status_code=404, detail="Package not found")
+	return stats
 
 
 @router.delete("/package-assignments/{assignment_id}")
@@ -367,14 +438,9 @@ async def get_package_requests(
 		result = []
 		for request in requests:
 			try:
-				# Get tutor details safely
-				from app.users import models as user_models
-				tutor = db.query(user_models.Tutor).filter(user_models.Tutor.id == request.tutor_id).first()
-				
-				# Get user details safely
-				user = None
-				if tutor:
-					user = db.query(user_models.User).filter(user_models.User.id == tutor.user_id).first()
+				# Tutor and user come eager-loaded with the requests
+				tutor = request.tutor
+				user = tutor.user if tutor else None
 				
 				result.append({
 					"id": str(request.id),
@@ -444,8 +510,10 @@ async def reject_package_request(
 
 @router.get("/lessons", tags=["Admin"])
 async def get_all_lessons(
+	response: Response,
 	skip: int = 0,
 	limit: int = 100,
+	cursor: Optional[str] = None,
 	status: str = None,
 	student_id: int = None,
 	tutor_id: int = None,
@@ -455,109 +523,48 @@ async def get_all_lessons(
 	db: Session = Depends(get_db),
 	admin_user=Depends(require_admin)
 ):
-	"""Get all lessons/bookings with comprehensive filters (Admin only)"""
+	"""Get all lessons/bookings with comprehensive filters (Admin only)
+
+	Newest first; pass the X-Next-Cursor header back as `cursor` for the next page.
+	"""
 	try:
-		from app.bookings.models import Booking, BookingStatus
-		
-		# Build query with filters
-		query = db.query(Booking)
-		
-		# Status filter
-		if status and status != 'all':
-			if status == 'pending':
-				query = query.filter(Booking.status == BookingStatus.PENDING)
-			elif status == 'confirmed':
-				query = query.filter(Booking.status == BookingStatus.CONFIRMED)
-			elif status == 'completed':
-				query = query.filter(Booking.status == BookingStatus.COMPLETED)
-			elif status == 'cancelled':
-				query = query.filter(Booking.status == BookingStatus.CANCELLED)
-		
-		# Student filter
-		if student_id:
-			query = query.filter(Booking.student_id == student_id)
-		
-		# Tutor filter
-		if tutor_id:
-			query = query.filter(Booking.tutor_id == tutor_id)
-		
-		# Subject filter
-		if subject:
-			query = query.filter(Booking.subject.ilike(f"%{subject}%"))
+		from app.bookings.models import Booking
 		
-		# Date range filter
-		if date_from:
-			from datetime import datetime
-			date_from_dt = datetime.fromisoformat(date_from)
-			query = query.filter(Booking.start_time >= date_from_dt)
-		
-		if date_to:
-			from datetime import datetime
-			date_to_dt = datetime.fromisoformat(date_to)
-			query = query.filter(Booking.start_time <= date_to_dt)
-		
-		# Order by start time (newest first)
-		query = query.order_by(Booking.start_time.desc())
+		query = services.AdminListingService.lessons_query(
+			db, status, student_id, tutor_id, subject, date_from, date_to
+		)
 		
-		# Apply pagination
-		bookings = query.offset(skip).limit(limit).all()
+		# Order by start time (newest first), keyset pagination on (start_time, id)
+		bookings = paginate(
+			query, (Booking.start_time, Booking.id), limit, skip=skip, cursor=cursor, descending=True
+		)
 		
-		return bookings
+		return with_next_cursor(response, bookings)
 		
+	except InvalidCursor as e:
+		raise HTTPException(status_code=400, detail=str(e))
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Error fetching lessons: {str(e)}")
 
 
 @router.get("/lessons/stats", tags=["Admin"])
 async def get_lessons_stats(
+	fresh: bool = Query(False, description="Bypass the short-lived stats cache"),
 	db: Session = Depends(get_db),
 	admin_user=Depends(require_admin)
 ):
-	"""Get comprehensive lesson statistics (Admin only)"""
+	"""Get comprehensive lesson statistics (Admin only)
+
+	One aggregate query, shared through the dashboard cache (time-bucketed,
+	purged whenever bookings change).
+	"""
+	async def compute():
+		return services.AdminLessonService.get_lessons_stats(db)
+
 	try:
-		from sqlalchemy import func
-		from app.bookings.models import Booking, BookingStatus
-		
-		# Basic counts
-		total_lessons = db.query(func.count(Booking.id)).scalar()
-		pending_lessons = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.PENDING).scalar()
-		confirmed_lessons = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.CONFIRMED).scalar()
-		completed_lessons = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.COMPLETED).scalar()
-		cancelled_lessons = db.query(func.count(Booking.id)).filter(Booking.status == BookingStatus.CANCELLED).scalar()
-		
-		# Revenue calculations
-		completed_revenue = db.query(func.sum(Booking.calculated_price)).filter(
-			Booking.status == BookingStatus.COMPLETED,
-			Booking.calculated_price.isnot(None)
-		).scalar() or 0
-		
-		# Today's lessons
-		from datetime import date
-		today = date.today()
-		today_lessons = db.query(func.count(Booking.id)).filter(
-			func.date(Booking.start_time) == today
-		).scalar()
-		
-		# This week's lessons
-		from datetime import datetime, timedelta
-		week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-		week_lessons = db.query(func.count(Booking.id)).filter(
-			Booking.start_time >= week_start
-		).scalar()
-		
-		return {
-			"total_lessons": total_lessons,
-			"pending_lessons": pending_lessons,
-			"confirmed_lessons": confirmed_lessons,
-			"completed_lessons": completed_lessons,
-			"cancelled_lessons": cancelled_lessons,
-			"completed_revenue": float(completed_revenue),
-			"today_lessons": today_lessons,
-			"week_lessons": week_lessons,
-			"completion_rate": (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0,
-			"cancellation_rate": (cancelled_lessons / total_lessons * 100) if total_lessons > 0 else 0
-		}
-		
+		if fresh:
+			return await compute()
+		return await dashboard_cache.get_or_compute("admin_lessons_stats", compute)
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Error fetching lesson stats: {str(e)}")
 
@@ -612,3 +619,95 @@ async def update_lesson_status(
 	except Exception as e:
 		raise HTTPException(status_code=500, detail=f"Error updating lesson status: {str(e)}")
 
+
+
+# ----------------------------------------------------------------------
+# Streaming exports (same filters as the list endpoints)
+# ----------------------------------------------------------------------
+
+EXPORT_FORMAT = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$")
+
+
+def _export(db: Session, projection, build_query, fields: Optional[str], format: str, filename: str):
+	"""Validate fields/filters now, stream rows (ordered by id) afterwards"""
+	try:
+		names = projection.parse_fields(fields)
+		query = projection.select(build_query(), names).order_by(projection.columns["id"])
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	return export_response(query.statement, names, format, db.get_bind(), filename)
+
+
+@router.get("/export/lessons")
+async def export_lessons(
+	format: str = EXPORT_FORMAT,
+	fields: Optional[str] = None,
+	status: str = None,
+	student_id: int = None,
+	tutor_id: int = None,
+	subject: str = None,
+	date_from: str = None,
+	date_to: str = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	"""Export lessons as CSV or NDJSON (filters as GET /lessons)"""
+	return _export(
+		db, services.AdminListingService.LESSON_FIELDS,
+		lambda: services.AdminListingService.lessons_query(db, status, student_id, tutor_id, subject, date_from, date_to),
+		fields, format, "lessons",
+	)
+
+
+@router.get("/export/payments")
+async def export_payments(
+	format: str = EXPORT_FORMAT,
+	fields: Optional[str] = None,
+	status: Optional[str] = None,
+	student_id: Optional[int] = None,
+	package_assignment_id: Optional[int] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	return _export(
+		db, services.AdminListingService.PAYMENT_FIELDS,
+		lambda: services.AdminListingService.payments_query(db, status, student_id, package_assignment_id),
+		fields, format, "payments",
+	)
+
+
+@router.get("/export/package-assignments")
+async def export_package_assignments(
+	format: str = EXPORT_FORMAT,
+	fields: Optional[str] = None,
+	status: Optional[str] = None,
+	student_id: Optional[int] = None,
+	tutor_id: Optional[int] = None,
+	package_id: Optional[int] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	return _export(
+		db, services.AdminListingService.ASSIGNMENT_FIELDS,
+		lambda: services.AdminListingService.assignments_query(db, status, student_id, tutor_id, package_id),
+		fields, format, "package-assignments",
+	)
+
+
+@router.get("/export/pricing-calculations")
+async def export_pricing_calculations(
+	format: str = EXPORT_FORMAT,
+	fields: Optional[str] = None,
+	tutor_id: Optional[int] = None,
+	booking_id: Optional[int] = None,
+	subject: Optional[str] = None,
+	date_from: Optional[str] = None,
+	date_to: Optional[str] = None,
+	db: Session = Depends(get_db),
+	admin_user=Depends(require_admin),
+):
+	return _export(
+		db, services.AdminListingService.PRICING_CALCULATION_FIELDS,
+		lambda: services.AdminListingService.pricing_calculations_query(db, tutor_id, booking_id, subject, date_from, date_to),
+		fields, format, "pricing-calculations",
+	)
@@ -1,9 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
 from app.admin import models, schemas
+from app.bookings.models import Booking, BookingStatus
+from app.core.listing import Projection
+from app.core.loader_profiles import apply_profile
 from app.packages.models import Package
+from app.pricing.models import PricingCalculation
+from app.users.models import Student, Tutor, User, UserRole
 
 
 class AdminPackageService:
@@ -32,6 +38,46 @@ class AdminPackageService:
         db.refresh(assignment)
         return assignment
 
+    @staticmethod
+    def get_package_stats(db: Session, package_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Assignment stats per package in one grouped query; packages that do not
+        exist are missing from the result. Revenue counts the custom price of
+        an assignment, or the package price when it has none.
+        """
+        assignment = models.AdminPackageAssignment
+        rows = db.query(
+            Package.id,
+            Package.total_hours,
+            func.count(assignment.id).label("total_assignments"),
+            func.coalesce(func.sum(case((assignment.status == models.PackageAssignmentStatus.ACTIVE, 1), else_=0)), 0).label("active_assignments"),
+            func.coalesce(func.sum(assignment.hours_used), 0).label("total_hours_used"),
+            func.coalesce(func.sum(
+                case((assignment.id.isnot(None), func.coalesce(func.nullif(assignment.custom_price, 0), Package.price)), else_=0)
+            ), 0).label("total_revenue"),
+        ).outerjoin(assignment, assignment.package_id == Package.id).filter(
+            Package.id.in_(list(package_ids))
+        ).group_by(Package.id, Package.total_hours).all()
+
+        stats = {}
+        for row in rows:
+            total_possible_hours = row.total_assignments * row.total_hours
+            stats[row.id] = {
+                "total_assignments": row.total_assignments,
+                "active_assignments": int(row.active_assignments),
+                "total_hours_used": int(row.total_hours_used),
+                "total_revenue": float(row.total_revenue),
+                "avg_completion_rate": (row.total_hours_used / total_possible_hours * 100) if total_possible_hours > 0 else 0,
+            }
+        return stats
+
+    @staticmethod
+    def get_package_assignments(db: Session, package_id: int) -> List[models.AdminPackageAssignment]:
+        # student and student.user are read for every row
+        return apply_profile(db.query(models.AdminPackageAssignment), "assignment.student_user").filter(
+            models.AdminPackageAssignment.package_id == package_id
+        ).all()
+
 
 class AdminPaymentService:
     @staticmethod
@@ -146,3 +192,217 @@ class AdminPaymentService:
         # After commit, return a session-bound instance
         return db.get(models.AdminPayment, payment.id)
 
+
+
+class AdminLessonService:
+    @staticmethod
+    def get_lessons_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Status counts, completed revenue, today's and this week's lessons in one
+        conditional-aggregate scan. Day/week use start_time ranges (index friendly)
+        from local midnight; the week starts on Monday.
+        """
+        now = now or datetime.now()
+        day_start = datetime.combine(now.date(), datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        week_start = day_start - timedelta(days=now.weekday())
+
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        row = db.query(
+            func.count(Booking.id).label("total"),
+            count_if(Booking.status == BookingStatus.PENDING).label("pending"),
+            count_if(Booking.status == BookingStatus.CONFIRMED).label("confirmed"),
+            count_if(Booking.status == BookingStatus.COMPLETED).label("completed"),
+            count_if(Booking.status == BookingStatus.CANCELLED).label("cancelled"),
+            func.coalesce(func.sum(case((Booking.status == BookingStatus.COMPLETED, Booking.calculated_price), else_=0)), 0).label("revenue"),
+            count_if(and_(Booking.start_time >= day_start, Booking.start_time < day_end)).label("today"),
+            count_if(Booking.start_time >= week_start).label("week"),
+        ).one()
+
+        total = row.total or 0
+        completed = int(row.completed)
+        cancelled = int(row.cancelled)
+        return {
+            "total_lessons": total,
+            "pending_lessons": int(row.pending),
+            "confirmed_lessons": int(row.confirmed),
+            "completed_lessons": completed,
+            "cancelled_lessons": cancelled,
+            "completed_revenue": float(row.revenue),
+            "today_lessons": int(row.today),
+            "week_lessons": int(row.week),
+            "completion_rate": (completed / total * 100) if total > 0 else 0,
+            "cancellation_rate": (cancelled / total * 100) if total > 0 else 0,
+        }
+
+
+def _columns(model, exclude=()):
+    return {column.key: getattr(model, column.key) for column in model.__table__.columns if column.key not in exclude}
+
+
+def _nested(prefix, model, keys):
+    return {f"{prefix}.{key}": getattr(model, key) for key in keys}
+
+
+class AdminListingService:
+    """Filtered base queries and field projections for the admin list endpoints"""
+
+    # hashed_password is never selectable
+    USER_FIELDS = Projection(User, _columns(User, exclude=("hashed_password",)), list(_columns(User, exclude=("hashed_password",))))
+
+    ASSIGNMENT_FIELDS = Projection(
+        models.AdminPackageAssignment,
+        {
+            **_columns(models.AdminPackageAssignment),
+            **_nested("student", Student, ("first_name", "last_name", "institute", "class_level")),
+            **_nested("tutor", Tutor, ("first_name", "last_name", "subjects")),
+            **_nested("package", Package, ("name", "total_hours", "subject")),
+        },
+        # What the assignments page renders
+        [
+            *_columns(models.AdminPackageAssignment),
+            "student.first_name", "student.last_name", "student.institute", "student.class_level",
+            "tutor.first_name", "tutor.last_name", "tutor.subjects",
+            "package.name", "package.total_hours",
+        ],
+        joins={
+            "student": (Student, models.AdminPackageAssignment.student_id == Student.id),
+            "tutor": (Tutor, models.AdminPackageAssignment.tutor_id == Tutor.id),
+            "package": (Package, models.AdminPackageAssignment.package_id == Package.id),
+        },
+    )
+
+    PAYMENT_FIELDS = Projection(models.AdminPayment, _columns(models.AdminPayment), list(_columns(models.AdminPayment)))
+
+    LESSON_FIELDS = Projection(
+        Booking,
+        {
+            **_columns(Booking),
+            **_nested("student", Student, ("first_name", "last_name")),
+            **_nested("tutor", Tutor, ("first_name", "last_name")),
+        },
+        [*_columns(Booking), "student.first_name", "student.last_name", "tutor.first_name", "tutor.last_name"],
+        joins={
+            "student": (Student, Booking.student_id == Student.id),
+            "tutor": (Tutor, Booking.tutor_id == Tutor.id),
+        },
+    )
+
+    PRICING_CALCULATION_FIELDS = Projection(
+        PricingCalculation, _columns(PricingCalculation), list(_columns(PricingCalculation))
+    )
+
+    @staticmethod
+    def users_query(
+        db: Session,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        is_verified: Optional[bool] = None,
+        search: Optional[str] = None,
+    ):
+        query = db.query(User)
+        if role:
+            query = query.filter(User.role == UserRole(role))
+        if is_active is not None:
+            query = query.filter(User.is_active == is_active)
+        if is_verified is not None:
+            query = query.filter(User.is_verified == is_verified)
+        if search:
+            query = query.filter(User.email.ilike(f"%{search}%"))
+        return query
+
+    @staticmethod
+    def pending_approvals_query(db: Session, search: Optional[str] = None):
+        query = db.query(User).join(Tutor, Tutor.user_id == User.id).filter(
+            User.role == UserRole.TUTOR,
+            User.is_verified == False,  # noqa: E712
+            User.is_active == True  # noqa: E712
+        )
+        if search:
+            query = query.filter(User.email.ilike(f"%{search}%"))
+        return query
+
+    @staticmethod
+    def assignments_query(
+        db: Session,
+        status: Optional[str] = None,
+        student_id: Optional[int] = None,
+        tutor_id: Optional[int] = None,
+        package_id: Optional[int] = None,
+    ):
+        query = db.query(models.AdminPackageAssignment)
+        if status:
+            query = query.filter(models.AdminPackageAssignment.status == models.PackageAssignmentStatus(status))
+        if student_id:
+            query = query.filter(models.AdminPackageAssignment.student_id == student_id)
+        if tutor_id:
+            query = query.filter(models.AdminPackageAssignment.tutor_id == tutor_id)
+        if package_id:
+            query = query.filter(models.AdminPackageAssignment.package_id == package_id)
+        return query
+
+    @staticmethod
+    def payments_query(
+        db: Session,
+        status: Optional[str] = None,
+        student_id: Optional[int] = None,
+        package_assignment_id: Optional[int] = None,
+    ):
+        query = db.query(models.AdminPayment)
+        if status:
+            query = query.filter(models.AdminPayment.status == models.PaymentStatus(status))
+        if student_id:
+            query = query.filter(models.AdminPayment.student_id == student_id)
+        if package_assignment_id:
+            query = query.filter(models.AdminPayment.package_assignment_id == package_assignment_id)
+        return query
+
+    @staticmethod
+    def lessons_query(
+        db: Session,
+        status: Optional[str] = None,
+        student_id: Optional[int] = None,
+        tutor_id: Optional[int] = None,
+        subject: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ):
+        """Filters of GET /api/admin/lessons; unknown statuses (and 'all') are ignored"""
+        query = db.query(Booking)
+        if status in {s.value for s in BookingStatus}:
+            query = query.filter(Booking.status == BookingStatus(status))
+        if student_id:
+            query = query.filter(Booking.student_id == student_id)
+        if tutor_id:
+            query = query.filter(Booking.tutor_id == tutor_id)
+        if subject:
+            query = query.filter(Booking.subject.ilike(f"%{subject}%"))
+        if date_from:
+            query = query.filter(Booking.start_time >= datetime.fromisoformat(date_from))
+        if date_to:
+            query = query.filter(Booking.start_time <= datetime.fromisoformat(date_to))
+        return query
+
+    @staticmethod
+    def pricing_calculations_query(
+        db: Session,
+        tutor_id: Optional[int] = None,
+        booking_id: Optional[int] = None,
+        subject: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ):
+        query = db.query(PricingCalculation)
+        if tutor_id:
+            query = query.filter(PricingCalculation.tutor_id == tutor_id)
+        if booking_id:
+            query = query.filter(PricingCalculation.booking_id == booking_id)
+        if subject:
+            query = query.filter(PricingCalculation.subject == subject)
+        if date_from:
+            query = query.filter(PricingCalculation.calculation_timestamp >= datetime.fromisoformat(date_from))
+        if date_to:
+            query = query.filter(PricingCalculation.calculation_timestamp <= datetime.fromisoformat(date_to))
+        return query
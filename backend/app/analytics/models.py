@@ -1,9 +1,51 @@
 """
 Analytics models
+
+Daily rollups maintained incrementally on booking/payment writes (see
+app.analytics.rollups) and rebuildable with scripts/backfill_rollups.py.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, UniqueConstraint, Index
 from datetime import datetime
 from app.core.database import Base
 
-# TODO: Add analytics models here
+
+class BookingDailyRollup(Base):
+    """Bookings aggregated per lesson day (start_time), tutor, subject and status."""
+    __tablename__ = "booking_daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    tutor_id = Column(Integer, nullable=False)
+    subject = Column(String, nullable=False)
+    status = Column(String(20), nullable=False)  # BookingStatus name, e.g. "COMPLETED"
+
+    lesson_count = Column(Integer, nullable=False, default=0)
+    hours = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    tutor_earnings = Column(Numeric(12, 2), nullable=False, default=0)
+    platform_fees = Column(Numeric(12, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("day", "tutor_id", "subject", "status", name="uq_booking_daily_rollups_key"),
+        Index("ix_booking_daily_rollups_tutor_day", "tutor_id", "day"),
+    )
+
+
+class PaymentDailyRollup(Base):
+    """Payments aggregated per creation day and status."""
+    __tablename__ = "payment_daily_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False)
+
+    payment_count = Column(Integer, nullable=False, default=0)
+    amount_cents = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("day", "status", name="uq_payment_daily_rollups_key"),
+    )
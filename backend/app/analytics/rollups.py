@@ -0,0 +1,276 @@
+"""
+Incremental maintenance of the daily rollup tables.
+
+Every flush that inserts, updates or deletes a Booking or Payment turns the
+old and new row state into +/- deltas per rollup key, and applies them in the
+same transaction with an INSERT ... ON CONFLICT DO UPDATE. A rollback
+therefore discards rollup changes together with the data.
+
+Writes that bypass the unit of work (bulk_update_mappings, Query.update) are
+not seen here: callers report them with apply_booking_changes(), or rebuild
+the affected days with rebuild_booking_rollups().
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, attributes
+
+from app.analytics.models import BookingDailyRollup, PaymentDailyRollup
+from app.bookings.models import Booking, BookingStatus
+from app.payments.models import Payment
+
+logger = logging.getLogger(__name__)
+
+BOOKING_MEASURES = ("lesson_count", "hours", "revenue", "tutor_earnings", "platform_fees")
+PAYMENT_MEASURES = ("payment_count", "amount_cents")
+
+_BOOKING_ATTRS = (
+    "start_time", "tutor_id", "subject", "status", "duration_hours", "calculated_duration",
+    "calculated_price", "tutor_earnings", "platform_fee",
+)
+_PAYMENT_ATTRS = ("created_at", "status", "amount_cents")
+
+
+def _status_name(status) -> str:
+    if status is None:
+        return BookingStatus.PENDING.name
+    return status.name if isinstance(status, BookingStatus) else BookingStatus(status).name
+
+
+def _booking_contribution(values: Dict) -> Optional[Tuple[Tuple, Tuple]]:
+    if values.get("start_time") is None or values.get("tutor_id") is None:
+        return None
+    key = (values["start_time"].date(), values["tutor_id"], values["subject"], _status_name(values["status"]))
+    measures = (
+        1,
+        values["calculated_duration"] or values["duration_hours"] or 0,
+        Decimal(values["calculated_price"] or 0),
+        Decimal(values["tutor_earnings"] or 0),
+        Decimal(values["platform_fee"] or 0),
+    )
+    return key, measures
+
+
+def _payment_contribution(values: Dict) -> Optional[Tuple[Tuple, Tuple]]:
+    created_at = values.get("created_at") or datetime.utcnow()
+    key = (created_at.date(), values.get("status") or "pending")
+    return key, (1, values.get("amount_cents") or 0)
+
+
+def _state(obj, attrs: Iterable[str], old: bool) -> Dict:
+    """Current values, or the values before this flush when old=True."""
+    values = {}
+    for attr in attrs:
+        if not old:
+            values[attr] = getattr(obj, attr)
+            continue
+        history = attributes.get_history(obj, attr)
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        else:
+            values[attr] = None
+    return values
+
+
+def _accumulate(deltas: Dict, contribution, sign: int) -> None:
+    if contribution is None:
+        return
+    key, measures = contribution
+    current = deltas.get(key)
+    if current is None:
+        current = deltas[key] = [0] * len(measures)
+    for index, value in enumerate(measures):
+        current[index] += sign * value
+
+
+def _upsert(connection, model, key_columns: Tuple[str, ...], measures: Tuple[str, ...], deltas: Dict) -> None:
+    table = model.__table__
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - only Postgres and SQLite are supported
+        raise NotImplementedError(f"Rollup upsert not supported for dialect {dialect}")
+
+    now = datetime.utcnow()
+    for key, values in deltas.items():
+        if not any(values):
+            continue
+        row = dict(zip(key_columns, key))
+        row.update(zip(measures, values))
+        row["updated_at"] = now
+        stmt = insert(table).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={
+                **{measure: table.c[measure] + stmt.excluded[measure] for measure in measures},
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        connection.execute(stmt)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# active_history: assigning an expired attribute loads the old value first,
+# so the flush can subtract the previous contribution
+for _model, _attrs in ((Booking, _BOOKING_ATTRS), (Payment, _PAYMENT_ATTRS)):
+    for _attr in _attrs:
+        event.listen(getattr(_model, _attr), "set", _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollups(session, flush_context):
+    booking_deltas: Dict = {}
+    payment_deltas: Dict = {}
+
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            _accumulate(booking_deltas, _booking_contribution(_state(obj, _BOOKING_ATTRS, old=False)), 1)
+        elif isinstance(obj, Payment):
+            _accumulate(payment_deltas, _payment_contribution(_state(obj, _PAYMENT_ATTRS, old=False)), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Booking) and session.is_modified(obj, include_collections=False):
+            _accumulate(booking_deltas, _booking_contribution(_state(obj, _BOOKING_ATTRS, old=True)), -1)
+            _accumulate(booking_deltas, _booking_contribution(_state(obj, _BOOKING_ATTRS, old=False)), 1)
+        elif isinstance(obj, Payment) and session.is_modified(obj, include_collections=False):
+            _accumulate(payment_deltas, _payment_contribution(_state(obj, _PAYMENT_ATTRS, old=True)), -1)
+            _accumulate(payment_deltas, _payment_contribution(_state(obj, _PAYMENT_ATTRS, old=False)), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            _accumulate(booking_deltas, _booking_contribution(_state(obj, _BOOKING_ATTRS, old=True)), -1)
+        elif isinstance(obj, Payment):
+            _accumulate(payment_deltas, _payment_contribution(_state(obj, _PAYMENT_ATTRS, old=True)), -1)
+
+    if not booking_deltas and not payment_deltas:
+        return
+    connection = session.connection()
+    if booking_deltas:
+        _upsert(connection, BookingDailyRollup, ("day", "tutor_id", "subject", "status"), BOOKING_MEASURES, booking_deltas)
+    if payment_deltas:
+        _upsert(connection, PaymentDailyRollup, ("day", "status"), PAYMENT_MEASURES, payment_deltas)
+
+
+def apply_booking_changes(db: Session, changes: Iterable[Tuple[Dict, Dict]]) -> None:
+    """
+    Rollup deltas for booking writes that bypass the unit of work.
+    `changes` holds (old row values, changed fields) pairs; old values must
+    include every rollup attribute. Runs in the caller's transaction.
+    """
+    deltas: Dict = {}
+    for old, changed in changes:
+        old_values = {attr: old[attr] for attr in _BOOKING_ATTRS}
+        new_values = {**old_values, **{attr: value for attr, value in changed.items() if attr in old_values}}
+        _accumulate(deltas, _booking_contribution(old_values), -1)
+        _accumulate(deltas, _booking_contribution(new_values), 1)
+    if deltas:
+        _upsert(db.connection(), BookingDailyRollup, ("day", "tutor_id", "subject", "status"), BOOKING_MEASURES, deltas)
+
+
+# ----------------------------------------------------------------------
+# Rebuild / backfill
+# ----------------------------------------------------------------------
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _day_bounds(start_day: Optional[date], end_day: Optional[date]):
+    start = datetime.combine(start_day, datetime.min.time()) if start_day else None
+    end = datetime.combine(end_day + timedelta(days=1), datetime.min.time()) if end_day else None
+    return start, end
+
+
+def rebuild_booking_rollups(db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+    """Recompute booking rollups for [start_day, end_day] (all history if omitted). Does not commit."""
+    start, end = _day_bounds(start_day, end_day)
+
+    stale = db.query(BookingDailyRollup)
+    source = db.query(
+        func.date(Booking.start_time).label("day"),
+        Booking.tutor_id,
+        Booking.subject,
+        Booking.status,
+        func.count(Booking.id).label("lesson_count"),
+        # Same fallback as the incremental hook ("calculated_duration or duration_hours")
+        func.coalesce(func.sum(
+            func.coalesce(func.nullif(Booking.calculated_duration, 0), Booking.duration_hours)
+        ), 0).label("hours"),
+        func.coalesce(func.sum(Booking.calculated_price), 0).label("revenue"),
+        func.coalesce(func.sum(Booking.tutor_earnings), 0).label("tutor_earnings"),
+        func.coalesce(func.sum(Booking.platform_fee), 0).label("platform_fees"),
+    )
+    if start is not None:
+        stale = stale.filter(BookingDailyRollup.day >= start_day)
+        source = source.filter(Booking.start_time >= start)
+    if end is not None:
+        stale = stale.filter(BookingDailyRollup.day <= end_day)
+        source = source.filter(Booking.start_time < end)
+
+    rows = source.group_by(
+        func.date(Booking.start_time), Booking.tutor_id, Booking.subject, Booking.status
+    ).all()
+
+    stale.delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(BookingDailyRollup, [
+        {
+            "day": _as_date(row.day),
+            "tutor_id": row.tutor_id,
+            "subject": row.subject,
+            "status": _status_name(row.status),
+            "lesson_count": row.lesson_count,
+            "hours": int(row.hours),
+            "revenue": Decimal(str(row.revenue)),
+            "tutor_earnings": Decimal(str(row.tutor_earnings)),
+            "platform_fees": Decimal(str(row.platform_fees)),
+            "updated_at": now,
+        }
+        for row in rows
+    ])
+    return len(rows)
+
+
+def rebuild_payment_rollups(db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+    """Recompute payment rollups for [start_day, end_day] (all history if omitted). Does not commit."""
+    start, end = _day_bounds(start_day, end_day)
+
+    stale = db.query(PaymentDailyRollup)
+    source = db.query(
+        func.date(Payment.created_at).label("day"),
+        Payment.status,
+        func.count(Payment.id).label("payment_count"),
+        func.coalesce(func.sum(Payment.amount_cents), 0).label("amount_cents"),
+    )
+    if start is not None:
+        stale = stale.filter(PaymentDailyRollup.day >= start_day)
+        source = source.filter(Payment.created_at >= start)
+    if end is not None:
+        stale = stale.filter(PaymentDailyRollup.day <= end_day)
+        source = source.filter(Payment.created_at < end)
+
+    rows = source.group_by(func.date(Payment.created_at), Payment.status).all()
+
+    stale.delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(PaymentDailyRollup, [
+        {
+            "day": _as_date(row.day),
+            "status": row.status,
+            "payment_count": row.payment_count,
+            "amount_cents": int(row.amount_cents),
+            "updated_at": now,
+        }
+        for row in rows
+    ])
+    return len(rows)
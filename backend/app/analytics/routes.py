@@ -1,7 +1,7 @@
 """
 Analytics routes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta, date
@@ -11,7 +11,8 @@ from app.auth.dependencies import get_current_user
 from app.users.models import User, UserRole, Student, Tutor
 from app.packages.models import Package
 from app.bookings.models import Booking, BookingStatus
-from app.payments.models import Payment
+from app.analytics.services import AnalyticsService
+from app.core.time_buckets import iter_buckets
 
 router = APIRouter()
 
@@ -31,7 +32,7 @@ async def get_metrics(
     total_students = db.query(func.count(Student.id)).scalar() or 0
     total_tutors = db.query(func.count(Tutor.id)).scalar() or 0
     total_packages = db.query(func.count(Package.id)).scalar() or 0
-    total_bookings = db.query(func.count(Booking.id)).scalar() or 0
+    total_bookings = (await AnalyticsService.booking_totals(db))["lessons"]
 
     # Completed in last 24h
     now = datetime.utcnow()
@@ -49,14 +50,9 @@ async def get_metrics(
         or 0
     )
 
-    # Revenue in last 30 days
+    # Revenue in last 30 days (daily payment rollups)
     last_30d = now - timedelta(days=30)
-    revenue_cents_30d = (
-        db.query(func.coalesce(func.sum(Payment.amount_cents), 0))
-        .filter(and_(Payment.created_at >= last_30d, Payment.status == "succeeded"))
-        .scalar()
-        or 0
-    )
+    revenue_cents_30d = await AnalyticsService.payment_amount_cents(db, start_day=last_30d.date())
 
     return {
         "students": total_students,
@@ -71,61 +67,33 @@ async def get_metrics(
 @router.get("/trends")
 async def get_trends(
     days: int = 14,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Completed and scheduled lessons per day/week/month bucket.
+
+    Both series are keyed by the lesson's start day (the rollup key): a
+    completed lesson is counted on the day it started, not on the day it
+    ended as before the rollups. The two differ only for lessons that
+    cross midnight UTC.
+    """
     _require_admin(current_user)
 
-    days = max(1, min(days, 60))
+    days = max(1, min(days, 60 if granularity == "day" else 366))
     today = datetime.utcnow().date()
     start_day = today - timedelta(days=days - 1)
 
-    # Initialize dicts for all days
-    labels = []
-    completed_map = {}
-    upcoming_map = {}
-    for i in range(days):
-        d = start_day + timedelta(days=i)
-        labels.append(d.isoformat())
-        completed_map[d] = 0
-        upcoming_map[d] = 0
-
-    # Completed bookings grouped by day
-    completed_rows = (
-        db.query(func.date(Booking.end_time).label("d"), func.count(Booking.id))
-        .filter(
-            and_(
-                func.date(Booking.end_time) >= start_day,
-                func.date(Booking.end_time) <= today,
-                Booking.status == BookingStatus.COMPLETED,
-            )
-        )
-        .group_by(func.date(Booking.end_time))
-        .all()
-    )
-    for d, c in completed_rows:
-        if d in completed_map:
-            completed_map[d] = c
-
-    # Upcoming (scheduled) bookings grouped by start day within range
-    upcoming_rows = (
-        db.query(func.date(Booking.start_time).label("d"), func.count(Booking.id))
-        .filter(
-            and_(
-                func.date(Booking.start_time) >= start_day,
-                func.date(Booking.start_time) <= today,
-            )
-        )
-        .group_by(func.date(Booking.start_time))
-        .all()
-    )
-    for d, c in upcoming_rows:
-        if d in upcoming_map:
-            upcoming_map[d] = c
+    # Daily rollups bucketed in SQL: completed lessons and all scheduled lessons
+    rows = await AnalyticsService.booking_trends(db, granularity, start_day, today)
+    counts = {row["bucket"]: row for row in rows}
 
-    completed_series = [completed_map[start_day + timedelta(days=i)] for i in range(days)]
-    upcoming_series = [upcoming_map[start_day + timedelta(days=i)] for i in range(days)]
+    # Partial first bucket is clipped to start_day by the range filter
+    buckets = list(iter_buckets(granularity, start_day, today))
+    completed_series = [counts[b]["completed_bookings"] if b in counts else 0 for b in buckets]
+    upcoming_series = [counts[b]["total_bookings"] if b in counts else 0 for b in buckets]
 
-    # Return labels in MM-DD to match FE compact display
-    labels_compact = [d[5:] for d in labels]
+    # Return labels in MM-DD (YYYY-MM for months) to match FE compact display
+    labels_compact = [b.isoformat()[:7] if granularity == "month" else b.isoformat()[5:] for b in buckets]
     return {"labels": labels_compact, "completed": completed_series, "upcoming": upcoming_series}
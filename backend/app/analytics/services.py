@@ -1,7 +1,148 @@
 """
 Analytics business logic
+
+Aggregates are read from the daily rollup tables (app.analytics.models), so
+their cost depends on the requested date range rather than on total history.
+Distinct student counts cannot be summed across rollup rows and are computed
+from bookings restricted to the same start_time range.
 """
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from app.analytics import models, schemas
 
-# TODO: Add analytics services here
+from app.analytics.models import BookingDailyRollup, PaymentDailyRollup
+from app.bookings.models import Booking, BookingStatus
+from app.core.time_buckets import time_bucket
+
+COMPLETED = BookingStatus.COMPLETED.name
+
+
+def _day_filter(query, column, start_day: Optional[date], end_day: Optional[date]):
+    if start_day is not None:
+        query = query.filter(column >= start_day)
+    if end_day is not None:
+        query = query.filter(column <= end_day)
+    return query
+
+
+def _start_time_filter(query, start_day: Optional[date], end_day: Optional[date]):
+    if start_day is not None:
+        query = query.filter(Booking.start_time >= datetime.combine(start_day, datetime.min.time()))
+    if end_day is not None:
+        query = query.filter(Booking.start_time < datetime.combine(end_day + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def _completed_sum(column):
+    return func.coalesce(func.sum(case((BookingDailyRollup.status == COMPLETED, column), else_=0)), 0)
+
+
+class AnalyticsService:
+    """Read side of the daily rollups"""
+
+    @staticmethod
+    async def booking_totals(db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None) -> Dict[str, Any]:
+        row = _day_filter(db.query(
+            func.coalesce(func.sum(BookingDailyRollup.lesson_count), 0).label("lessons"),
+            _completed_sum(BookingDailyRollup.lesson_count).label("completed"),
+            _completed_sum(BookingDailyRollup.revenue).label("revenue"),
+            _completed_sum(BookingDailyRollup.hours).label("hours"),
+        ), BookingDailyRollup.day, start_day, end_day).one()
+        return {
+            "lessons": int(row.lessons),
+            "completed": int(row.completed),
+            "revenue": Decimal(str(row.revenue)),
+            "hours": int(row.hours),
+        }
+
+    @staticmethod
+    async def payment_amount_cents(
+        db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None, status: str = "succeeded"
+    ) -> int:
+        amount = _day_filter(
+            db.query(func.coalesce(func.sum(PaymentDailyRollup.amount_cents), 0)),
+            PaymentDailyRollup.day, start_day, end_day
+        ).filter(PaymentDailyRollup.status == status).scalar()
+        return int(amount or 0)
+
+    @staticmethod
+    async def booking_trends(
+        db: Session,
+        granularity: str,
+        start_day: date,
+        end_day: Optional[date] = None,
+        with_students: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Totals, completed lessons, revenue and active tutors per day/week/month
+        bucket (see app.core.time_buckets); distinct students when with_students.
+        Lessons are bucketed by start day, completed ones included.
+        Only buckets with at least one lesson are returned, oldest first.
+        """
+        bucket = time_bucket(granularity, BookingDailyRollup.day)
+        rows = _day_filter(db.query(
+            bucket.label("bucket"),
+            func.sum(BookingDailyRollup.lesson_count).label("lessons"),
+            _completed_sum(BookingDailyRollup.lesson_count).label("completed"),
+            _completed_sum(BookingDailyRollup.revenue).label("revenue"),
+            func.count(func.distinct(BookingDailyRollup.tutor_id)).label("tutors"),
+        ), BookingDailyRollup.day, start_day, end_day).filter(
+            BookingDailyRollup.lesson_count > 0
+        ).group_by(bucket).order_by(bucket).all()
+
+        students = {}
+        if with_students:
+            student_bucket = time_bucket(granularity, Booking.start_time)
+            students = dict(_start_time_filter(
+                db.query(student_bucket, func.count(func.distinct(Booking.student_id))),
+                start_day, end_day
+            ).group_by(student_bucket).all())
+
+        return [
+            {
+                "bucket": row.bucket,
+                "total_bookings": int(row.lessons or 0),
+                "completed_bookings": int(row.completed or 0),
+                "revenue": Decimal(str(row.revenue or 0)),
+                "active_tutors": row.tutors or 0,
+                "active_students": students.get(row.bucket, 0),
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    async def subject_stats(db: Session, start_day: date, end_day: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Totals, completed lessons, revenue, hours and distinct tutors/students per subject"""
+        rows = _day_filter(db.query(
+            BookingDailyRollup.subject,
+            func.sum(BookingDailyRollup.lesson_count).label("total_bookings"),
+            _completed_sum(BookingDailyRollup.lesson_count).label("completed_bookings"),
+            _completed_sum(BookingDailyRollup.revenue).label("total_revenue"),
+            _completed_sum(BookingDailyRollup.hours).label("total_hours"),
+            func.count(func.distinct(BookingDailyRollup.tutor_id)).label("tutors_count"),
+        ), BookingDailyRollup.day, start_day, end_day).filter(
+            BookingDailyRollup.lesson_count > 0
+        ).group_by(BookingDailyRollup.subject).all()
+
+        students = dict(_start_time_filter(
+            db.query(Booking.subject, func.count(func.distinct(Booking.student_id))),
+            start_day, end_day
+        ).group_by(Booking.subject).all())
+
+        stats = [
+            {
+                "subject": row.subject,
+                "total_bookings": int(row.total_bookings or 0),
+                "completed_bookings": int(row.completed_bookings or 0),
+                "total_revenue": Decimal(str(row.total_revenue or 0)),
+                "total_hours": int(row.total_hours or 0),
+                "tutors_count": row.tutors_count or 0,
+                "students_count": students.get(row.subject, 0),
+            }
+            for row in rows
+        ]
+        stats.sort(key=lambda s: s["total_revenue"], reverse=True)
+        return stats
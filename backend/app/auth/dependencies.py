@@ -6,6 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db, SessionLocal
 from app.core.security import decode_token
+from app.auth.principal_cache import principal_cache
 from app.users import models  # Use models from users module
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -22,7 +23,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if email is None:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = principal_cache.get_user(db, email)
     if user is None:
         raise credentials_exception
     
@@ -40,9 +41,13 @@ def get_current_user_ws(token: str) -> models.User:
     if email is None:
         return None
     
+    cached = principal_cache.get_user(None, email)
+    if cached is not None:
+        return cached
+    
     db = SessionLocal()
     try:
-        user = db.query(models.User).filter(models.User.email == email).first()
+        user = principal_cache.get_user(db, email)
         return user
     finally:
         db.close()
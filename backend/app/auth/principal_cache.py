@@ -0,0 +1,162 @@
+"""
+Principal cache for authenticated requests
+
+Caches the users row resolved from a token subject (email) and the
+student/tutor profile rows looked up by user id, so that the auth
+dependency and the usual profile lookup do not hit the DB on every request.
+
+Entries are column snapshots, not live ORM objects: on a hit the object is
+rebuilt and attached to the caller's session with merge(load=False), which
+emits no SQL. Entries expire after PRINCIPAL_CACHE_TTL_SECONDS and are
+invalidated when User/Student/Tutor rows change through the ORM (applied on
+commit) or explicitly via invalidate_user().
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple, Type
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.config import settings
+from app.users import models
+
+MAX_ENTRIES = 10_000
+
+_SESSION_KEY = "principal_cache_user_ids"
+
+_PROFILE_MODELS: Dict[str, Type] = {
+    "student": models.Student,
+    "tutor": models.Tutor,
+}
+
+
+def _snapshot(obj) -> Dict[str, Any]:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _rebuild(model, columns: Dict[str, Any], db: Optional[Session]):
+    obj = model(**columns)
+    make_transient_to_detached(obj)
+    if db is None:
+        return obj
+    return db.merge(obj, load=False)
+
+
+class PrincipalCache:
+    """TTL cache of users (by email) and profiles (by user id)"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self._ttl_seconds = ttl_seconds
+        self._users: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._profiles: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+        self._emails_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.PRINCIPAL_CACHE_TTL_SECONDS
+
+    def _fresh(self, entry) -> Optional[Dict[str, Any]]:
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    @staticmethod
+    def _bounded_put(store: dict, key, value) -> None:
+        if key not in store and len(store) >= MAX_ENTRIES:
+            store.pop(next(iter(store)))
+        store[key] = value
+
+    def get_user(self, db: Optional[Session], email: str) -> Optional[models.User]:
+        """Resolve a token subject; queries the DB only on a miss"""
+        with self._lock:
+            columns = self._fresh(self._users.get(email))
+        if columns is not None:
+            return _rebuild(models.User, columns, db)
+
+        if db is None:
+            return None
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if user is not None:
+            self.put_user(user)
+        return user
+
+    def put_user(self, user: models.User) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._bounded_put(self._users, user.email, (time.monotonic() + self.ttl_seconds, _snapshot(user)))
+            self._emails_by_id[user.id] = user.email
+
+    def get_profile(self, db: Session, kind: str, user_id: int):
+        """Student/tutor profile for a user id; None results are not cached"""
+        model = _PROFILE_MODELS[kind]
+        with self._lock:
+            columns = self._fresh(self._profiles.get((kind, user_id)))
+        if columns is not None:
+            return _rebuild(model, columns, db)
+
+        profile = db.query(model).filter(model.user_id == user_id).first()
+        if profile is not None and self.ttl_seconds > 0:
+            with self._lock:
+                self._bounded_put(
+                    self._profiles, (kind, user_id),
+                    (time.monotonic() + self.ttl_seconds, _snapshot(profile))
+                )
+        return profile
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop the user row and both profiles cached for a user id"""
+        with self._lock:
+            email = self._emails_by_id.pop(user_id, None)
+            if email is not None:
+                self._users.pop(email, None)
+            for kind in _PROFILE_MODELS:
+                self._profiles.pop((kind, user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._profiles.clear()
+            self._emails_by_id.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def _record(target, user_id: Optional[int]) -> None:
+    session = object_session(target)
+    if session is None or user_id is None:
+        return
+    ids: Set[int] = session.info.setdefault(_SESSION_KEY, set())
+    ids.add(user_id)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_changed(mapper, connection, target):
+    _record(target, target.id)
+
+
+@event.listens_for(models.Student, "after_insert")
+@event.listens_for(models.Student, "after_update")
+@event.listens_for(models.Student, "after_delete")
+@event.listens_for(models.Tutor, "after_insert")
+@event.listens_for(models.Tutor, "after_update")
+@event.listens_for(models.Tutor, "after_delete")
+def _profile_changed(mapper, connection, target):
+    _record(target, target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for user_id in session.info.pop(_SESSION_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from app.core import models  # This imports all models first
 from app.users import models as user_models  # Use models from users module
 from app.auth import schemas
+from app.auth.principal_cache import principal_cache
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.core.config import settings
 import secrets
@@ -122,6 +123,7 @@ def logout_user(db: Session, user_id: int):
         user_models.UserSession.user_id == user_id
     ).delete()
     db.commit()
+    principal_cache.invalidate_user(user_id)
     return {"message": "Successfully logged out"}
 
 def refresh_access_token(db: Session, refresh_token: str):
@@ -3,7 +3,7 @@ Booking Auto Calculations - Replica Excel automazioni
 Calcoli automatici per durata, prezzo, split tutor/piattaforma
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import event
+from sqlalchemy import event, case, func
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional, Dict, Any
@@ -56,13 +56,16 @@ class BookingAutoCalculations:
     async def auto_calculate_pricing(
         booking: models.Booking, 
         db: Session,
-        lesson_type_override: Optional[str] = None
+        lesson_type_override: Optional[str] = None,
+        commit: bool = True,
+        deferred_log: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         💰 CALCOLA PRICING AUTOMATICO
         
         Integrazione completa con PricingService
         Replica Excel XLOOKUP + VLOOKUP + formule complesse
+        deferred_log=False: il log del calcolo resta nella transazione del chiamante
         """
         
         # Determina lesson_type automatico se non specificato
@@ -76,14 +79,13 @@ class BookingAutoCalculations:
                 duration_hours=booking.calculated_duration,
                 tutor_id=booking.tutor_id,
                 db=db,
-                log_calculation=True
+                log_calculation=True,
+                commit=commit,
+                deferred_log=deferred_log
             )
             
             # Aggiorna booking con risultati
-            booking.calculated_price = Decimal(str(pricing_result["final_total_price"]))
-            booking.tutor_earnings = Decimal(str(pricing_result["tutor_earnings"]))
-            booking.platform_fee = Decimal(str(pricing_result["platform_fee"]))
-            booking.pricing_rule_applied = pricing_result.get("applied_rule_name", "AUTO")
+            BookingAutoCalculations.apply_pricing_result(booking, pricing_result)
             
             return {
                 "success": True,
@@ -95,6 +97,14 @@ class BookingAutoCalculations:
             # Fallback a calcolo base se pricing service fallisce
             return await BookingAutoCalculations._fallback_pricing_calculation(booking, db, str(e))
     
+    @staticmethod
+    def apply_pricing_result(booking: models.Booking, pricing_result: Dict[str, Any]) -> None:
+        """Copia prezzo, split tutor/piattaforma e regola applicata sul booking"""
+        booking.calculated_price = Decimal(str(pricing_result["final_total_price"]))
+        booking.tutor_earnings = Decimal(str(pricing_result["tutor_earnings"]))
+        booking.platform_fee = Decimal(str(pricing_result["platform_fee"]))
+        booking.pricing_rule_applied = pricing_result.get("applied_rule_name", "AUTO")
+    
     @staticmethod
     def _infer_lesson_type(booking: models.Booking, db: Session) -> str:
         """
@@ -106,9 +116,24 @@ class BookingAutoCalculations:
         - Storico lezioni simili
         """
         
-        # Logica 1: Deduce da package acquistato
+        package_name = None
         if hasattr(booking, 'package_purchase') and booking.package_purchase:
-            package_name = booking.package_purchase.package.name.upper()
+            package_name = booking.package_purchase.package.name
+        
+        return BookingAutoCalculations.infer_lesson_type_from(package_name, booking.start_time)
+    
+    @staticmethod
+    def infer_lesson_type_from(package_name: Optional[str], start_time: Optional[datetime]) -> str:
+        """
+        🎯 INFERENZA LESSON TYPE DA VALORI GREZZI
+        
+        Stessa logica di _infer_lesson_type, usabile su righe caricate
+        in bulk senza oggetti ORM
+        """
+        
+        # Logica 1: Deduce da package acquistato
+        if package_name:
+            package_name = package_name.upper()
             
             if "INDIVIDUALE" in package_name:
                 return "individuale"
@@ -118,8 +143,8 @@ class BookingAutoCalculations:
                 return "doposcuola"
         
         # Logica 2: Deduce da orario (doposcuola = pomeriggio)
-        if booking.start_time:
-            hour = booking.start_time.hour
+        if start_time:
+            hour = start_time.hour
             if 14 <= hour <= 19:  # 14:00-19:00 = doposcuola
                 return "doposcuola"
             elif 8 <= hour <= 13:  # 08:00-13:00 = individuale mattina
@@ -141,29 +166,18 @@ class BookingAutoCalculations:
         Mantiene funzionalità anche senza regole configurate
         """
         
-        # Prezzi base fallback (da configurazione o default)
-        base_rates = {
-            "doposcuola": Decimal("25.00"),
-            "individuale": Decimal("35.00"), 
-            "gruppo": Decimal("18.00"),
-            "online": Decimal("30.00")
-        }
-        
         # Inferisci lesson type
         lesson_type = BookingAutoCalculations._infer_lesson_type(booking, db)
-        base_price_per_hour = base_rates.get(lesson_type, Decimal("25.00"))
-        
-        # Calcoli base
-        total_price = base_price_per_hour * booking.calculated_duration
-        tutor_percentage = Decimal("0.70")  # 70% default
-        tutor_earnings = total_price * tutor_percentage
-        platform_fee = total_price - tutor_earnings
+        fallback_result = BookingAutoCalculations.fallback_pricing_result(lesson_type, booking.calculated_duration)
+        total_price = fallback_result["final_total_price"]
+        tutor_earnings = fallback_result["tutor_earnings"]
+        platform_fee = fallback_result["platform_fee"]
         
         # Aggiorna booking
         booking.calculated_price = total_price
         booking.tutor_earnings = tutor_earnings
         booking.platform_fee = platform_fee
-        booking.pricing_rule_applied = f"FALLBACK_{lesson_type.upper()}"
+        booking.pricing_rule_applied = fallback_result["applied_rule_name"]
         
         return {
             "success": True, 
@@ -177,63 +191,132 @@ class BookingAutoCalculations:
             "fallback_reason": error_msg
         }
     
+    @staticmethod
+    def fallback_pricing_result(lesson_type: str, duration_hours) -> Dict[str, Any]:
+        """
+        🛡️ PREZZI FALLBACK (valori Decimal)
+        
+        Tariffe base usate quando nessuna regola pricing è applicabile
+        """
+        
+        # Prezzi base fallback (da configurazione o default)
+        base_rates = {
+            "doposcuola": Decimal("25.00"),
+            "individuale": Decimal("35.00"), 
+            "gruppo": Decimal("18.00"),
+            "online": Decimal("30.00")
+        }
+        base_price_per_hour = base_rates.get(lesson_type, Decimal("25.00"))
+        
+        # Calcoli base
+        total_price = base_price_per_hour * Decimal(str(duration_hours))
+        tutor_percentage = Decimal("0.70")  # 70% default
+        tutor_earnings = total_price * tutor_percentage
+        platform_fee = total_price - tutor_earnings
+        
+        return {
+            "final_total_price": total_price,
+            "tutor_earnings": tutor_earnings,
+            "platform_fee": platform_fee,
+            "applied_rule_name": f"FALLBACK_{lesson_type.upper()}"
+        }
+    
+    @staticmethod
+    def lock_for_update(db: Session, query):
+        """
+        🔒 SELECT ... FOR UPDATE dove supportato (no-op su SQLite,
+        che serializza già le scritture a livello di database)
+        """
+        dialect_name = getattr(getattr(db.get_bind(), "dialect", None), "name", None)
+        if dialect_name and dialect_name != "sqlite":
+            return query.with_for_update()
+        return query
+    
     @staticmethod
     async def auto_update_package_consumption(
         booking: models.Booking,
         db: Session,
-        operation: str = "consume"  # "consume" o "refund"
-    ):
+        operation: str = "consume",  # "consume" o "refund"
+        commit: bool = True
+    ) -> bool:
         """
         📦 AGGIORNAMENTO AUTOMATICO PACKAGE
         
         Replica Excel logica di consumo/rimborso ore pacchetto
         - consume: Sottrae ore dal pacchetto (booking confermato)
         - refund: Rimborsa ore al pacchetto (booking cancellato)
+        
+        Le ore sono aggiornate con un UPDATE atomico (consume solo se
+        hours_remaining >= ore richieste), quindi due booking concorrenti
+        non possono spendere due volte le stesse ore.
+        Con commit=False il chiamante gestisce la transazione.
+        
+        Returns:
+            True se il package è stato aggiornato
         """
         
         if not booking.package_purchase_id:
-            return
+            return False
         
         from app.packages.models import PackagePurchase
         
-        purchase = db.query(PackagePurchase).filter(
-            PackagePurchase.id == booking.package_purchase_id
-        ).first()
-        
-        if not purchase:
-            return
-        
         hours_to_process = booking.calculated_duration or booking.duration_hours
+        query = db.query(PackagePurchase).filter(PackagePurchase.id == booking.package_purchase_id)
+        now = datetime.now(timezone.utc)
         
         if operation == "consume":
-            # Consuma ore (come Excel sottrazione automatica)
-            if purchase.hours_remaining >= hours_to_process:
-                purchase.hours_used += hours_to_process
-                purchase.hours_remaining -= hours_to_process
-
-                # Auto-disattiva se finite le ore
-                if purchase.hours_remaining <= 0:
-                    purchase.is_active = False
-
-                # Also apply consumption to any linked admin assignment
-                BookingAutoCalculations._consume_admin_assignment_hours(
-                    db=db,
-                    purchase=purchase,
-                    booking=booking,
-                    hours_to_consume=hours_to_process,
-                )
+            # Consuma ore (come Excel sottrazione automatica), auto-disattiva se finite
+            updated = query.filter(
+                PackagePurchase.hours_remaining >= hours_to_process
+            ).update({
+                PackagePurchase.hours_used: func.coalesce(PackagePurchase.hours_used, 0) + hours_to_process,
+                PackagePurchase.hours_remaining: PackagePurchase.hours_remaining - hours_to_process,
+                PackagePurchase.is_active: case(
+                    (PackagePurchase.hours_remaining - hours_to_process <= 0, False),
+                    else_=PackagePurchase.is_active
+                ),
+                PackagePurchase.updated_at: now,
+            }, synchronize_session=False)
                     
         elif operation == "refund":
-            # Rimborsa ore (come Excel addizione automatica)
-            purchase.hours_used = max(0, purchase.hours_used - hours_to_process)
-            purchase.hours_remaining += hours_to_process
-            
-            # Riattiva se torna ad avere ore
-            if purchase.hours_remaining > 0 and not purchase.is_active:
-                purchase.is_active = True
+            # Rimborsa ore (come Excel addizione automatica), riattiva se torna ad avere ore
+            updated = query.update({
+                PackagePurchase.hours_used: case(
+                    (func.coalesce(PackagePurchase.hours_used, 0) < hours_to_process, 0),
+                    else_=func.coalesce(PackagePurchase.hours_used, 0) - hours_to_process
+                ),
+                PackagePurchase.hours_remaining: PackagePurchase.hours_remaining + hours_to_process,
+                PackagePurchase.is_active: case(
+                    (PackagePurchase.hours_remaining + hours_to_process > 0, True),
+                    else_=PackagePurchase.is_active
+                ),
+                PackagePurchase.updated_at: now,
+            }, synchronize_session=False)
+        else:
+            return False
+        
+        if not updated:
+            return False
+        
+        # Allinea l'eventuale istanza già caricata nella sessione
+        purchase = db.identity_map.get(db.identity_key(PackagePurchase, booking.package_purchase_id))
+        if purchase is not None:
+            db.expire(purchase)
+        
+        if operation == "consume":
+            # Also apply consumption to any linked admin assignment
+            if purchase is None:
+                purchase = query.first()
+            BookingAutoCalculations._consume_admin_assignment_hours(
+                db=db,
+                purchase=purchase,
+                booking=booking,
+                hours_to_consume=hours_to_process,
+            )
         
-        purchase.updated_at = datetime.now(timezone.utc)
-        db.commit()
+        if commit:
+            db.commit()
+        return True
 
     @staticmethod
     def _consume_admin_assignment_hours(db: Session, purchase, booking: models.Booking, hours_to_consume: int):
@@ -246,12 +329,12 @@ class BookingAutoCalculations:
         except Exception:
             return
 
-        assignment = db.query(admin_models.AdminPackageAssignment).filter(
+        assignment = BookingAutoCalculations.lock_for_update(db, db.query(admin_models.AdminPackageAssignment).filter(
             admin_models.AdminPackageAssignment.student_id == purchase.student_id,
             admin_models.AdminPackageAssignment.tutor_id == booking.tutor_id,
             admin_models.AdminPackageAssignment.package_id == purchase.package_id,
             admin_models.AdminPackageAssignment.status == admin_models.PackageAssignmentStatus.ACTIVE,
-        ).first()
+        )).first()
 
         if not assignment:
             return
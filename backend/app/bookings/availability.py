@@ -0,0 +1,417 @@
+"""
+Tutor Availability Index - Indice intervalli in memoria per la disponibilità tutor
+
+Sostituisce le due query di is_slot_available (overlap booking + slot coprente)
+con un indice per tutor di intervalli ordinati:
+- booking attivi (PENDING/CONFIRMED) -> check sovrapposizione
+- slot disponibili -> check copertura
+
+L'indice viene caricato in modo lazy per tutor (due query, una volta sola),
+e mantenuto aggiornato in modo incrementale dagli eventi ORM: le modifiche
+vengono registrate nella sessione al flush e applicate solo al commit.
+Un rollback invalida i tutor coinvolti, che verranno ricaricati.
+
+Le disponibilità ricorrenti (RecurringAvailability) sono tenute come template
+compilati e coprono un intervallo se hanno un'occorrenza non ancora
+materializzata in uno Slot; le modifiche ai template ricaricano il tutor.
+"""
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.bookings.models import Booking, BookingStatus
+from app.core.config import settings
+from app.slots.models import RecurringAvailability, Slot
+from app.slots.recurrence import (
+    CompiledTemplate, Occurrence, active_templates, covering_occurrence, find_covering_occurrence
+)
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BOOKING_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+# Finestra caricata in memoria: dal giorno precedente al caricamento in poi.
+# Le richieste che iniziano prima dell'orizzonte vengono risolte sul DB.
+HORIZON = timedelta(days=1)
+
+_SESSION_KEY = "availability_index_changes"
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Normalizza datetime tz-aware a naive UTC (come salvato nel DB)"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _IntervalSet:
+    """
+    Lista ordinata di intervalli (start, end, key).
+
+    Le ricerche usano bisect sullo start e scansionano solo la finestra
+    [start - max_length, end), quindi il costo è O(log n + k).
+    """
+
+    def __init__(self):
+        self._items: List[Tuple[datetime, datetime, int]] = []
+        self._by_key: Dict[int, Tuple[datetime, datetime, int]] = {}
+        self._max_length = timedelta(0)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, key: int, start: datetime, end: datetime) -> None:
+        self.remove(key)
+        item = (start, end, key)
+        bisect.insort(self._items, item)
+        self._by_key[key] = item
+        if end - start > self._max_length:
+            self._max_length = end - start
+
+    def remove(self, key: int) -> None:
+        item = self._by_key.pop(key, None)
+        if item is None:
+            return
+        idx = bisect.bisect_left(self._items, item)
+        if idx < len(self._items) and self._items[idx] == item:
+            del self._items[idx]
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """True se esiste un intervallo con item.start < end e item.end > start"""
+        idx = bisect.bisect_left(self._items, (start - self._max_length,))
+        while idx < len(self._items):
+            item_start, item_end, _ = self._items[idx]
+            if item_start >= end:
+                break
+            if item_end > start:
+                return True
+            idx += 1
+        return False
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """True se esiste un intervallo con item.start <= start e item.end >= end"""
+        idx = bisect.bisect_left(self._items, (start - self._max_length,))
+        while idx < len(self._items):
+            item_start, item_end, _ = self._items[idx]
+            if item_start > start:
+                break
+            if item_end >= end:
+                return True
+            idx += 1
+        return False
+
+
+class _TutorAvailability:
+    """Stato indicizzato di un singolo tutor"""
+
+    def __init__(self, horizon: datetime):
+        self.horizon = horizon
+        self.loaded_at = time.monotonic()
+        self.bookings = _IntervalSet()
+        self.slots = _IntervalSet()
+        self.templates: List[CompiledTemplate] = []
+        self.materialized: Set[Occurrence] = set()
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Slot concreto disponibile o occorrenza ricorrente non materializzata"""
+        if self.slots.covers(start, end):
+            return True
+        return covering_occurrence(self.templates, self.materialized, start, end) is not None
+
+
+class TutorAvailabilityIndex:
+    """
+    🗂️ INDICE DISPONIBILITÀ TUTOR
+
+    Thread-safe: le route sincrone girano nel threadpool di FastAPI.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self._ttl_seconds = ttl_seconds
+        self._tutors: Dict[int, _TutorAvailability] = {}
+        # Generazione per tutor (e globale per invalidate()): un caricamento
+        # concorrente a un commit viene scartato invece di sovrascrivere
+        # lo stato aggiornato con dati letti prima del commit
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.RLock()
+        self.loads = 0
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.AVAILABILITY_INDEX_TTL_SECONDS
+
+    # ------------------------------------------------------------------
+    # Query API
+    # ------------------------------------------------------------------
+
+    def is_available(
+        self,
+        db: Session,
+        tutor_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        check_bookings: bool = True
+    ) -> bool:
+        """Stessa semantica di EnhancedBookingService.is_slot_available"""
+        return self.are_available(db, tutor_id, [(start_time, end_time)], check_bookings)[0]
+
+    def are_available(
+        self,
+        db: Session,
+        tutor_id: int,
+        intervals: Sequence[Tuple[datetime, datetime]],
+        check_bookings: bool = True
+    ) -> List[bool]:
+        """
+        Verifica N intervalli per lo stesso tutor con un solo accesso all'indice.
+        Il risultato mantiene l'ordine degli intervalli in input.
+        check_bookings=False verifica solo la copertura degli slot (la
+        sovrapposizione è garantita dal vincolo di esclusione su PostgreSQL).
+        """
+        normalized = [(naive_utc(start), naive_utc(end)) for start, end in intervals]
+        state = self._get_state(db, tutor_id)
+
+        results: List[bool] = []
+        with self._lock:
+            for start, end in normalized:
+                if start < state.horizon:
+                    results.append(None)
+                    continue
+                overlapping = check_bookings and state.bookings.overlaps(start, end)
+                results.append(not overlapping and state.covers(start, end))
+
+        # Intervalli antecedenti all'orizzonte: fallback su DB
+        for i, value in enumerate(results):
+            if value is None:
+                results[i] = self._is_available_db(db, tutor_id, *normalized[i], check_bookings=check_bookings)
+        return results
+
+    def invalidate(self, tutor_id: Optional[int] = None) -> None:
+        """Scarta lo stato di un tutor (o di tutti): verrà ricaricato al prossimo accesso"""
+        with self._lock:
+            if tutor_id is None:
+                self._tutors.clear()
+                self._epoch += 1
+            else:
+                self._drop(tutor_id)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _generation(self, tutor_id: int) -> Tuple[int, int]:
+        return (self._epoch, self._generations.get(tutor_id, 0))
+
+    def _drop(self, tutor_id: int) -> None:
+        """Scarta lo stato di un tutor e invalida i caricamenti in corso"""
+        self._tutors.pop(tutor_id, None)
+        self._generations[tutor_id] = self._generations.get(tutor_id, 0) + 1
+
+    def _get_state(self, db: Session, tutor_id: int) -> _TutorAvailability:
+        with self._lock:
+            state = self._tutors.get(tutor_id)
+            if state is not None and time.monotonic() - state.loaded_at < self.ttl_seconds:
+                return state
+            generation = self._generation(tutor_id)
+
+        state = self._load(db, tutor_id)
+        with self._lock:
+            self.loads += 1
+            # Un commit è arrivato durante il caricamento: lo stato letto vale per
+            # questa richiesta ma non viene messo in cache
+            if self._generation(tutor_id) == generation:
+                self._tutors[tutor_id] = state
+        return state
+
+    @staticmethod
+    def _load(db: Session, tutor_id: int) -> _TutorAvailability:
+        horizon = datetime.utcnow() - HORIZON
+        state = _TutorAvailability(horizon)
+
+        booking_rows = db.query(Booking.id, Booking.start_time, Booking.end_time).filter(
+            Booking.tutor_id == tutor_id,
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            Booking.end_time > horizon
+        ).all()
+        for booking_id, start, end in booking_rows:
+            state.bookings.add(booking_id, start, end)
+
+        # Anche gli slot non disponibili: se materializzano un'occorrenza ricorrente la nascondono
+        slot_rows = db.query(
+            Slot.id, Slot.date, Slot.start_time, Slot.end_time, Slot.is_available, Slot.recurring_availability_id
+        ).filter(
+            Slot.tutor_id == tutor_id,
+            Slot.date >= horizon.date()
+        ).all()
+        for slot_id, slot_date, start, end, is_available, template_id in slot_rows:
+            if is_available:
+                state.slots.add(slot_id, datetime.combine(slot_date, start), datetime.combine(slot_date, end))
+            if template_id is not None:
+                state.materialized.add((template_id, slot_date))
+
+        state.templates = active_templates(db, tutor_id, horizon.date(), None)
+
+        return state
+
+    @staticmethod
+    def _is_available_db(
+        db: Session,
+        tutor_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        check_bookings: bool = True
+    ) -> bool:
+        """Percorso originale su DB, usato fuori dalla finestra indicizzata"""
+        if check_bookings:
+            overlapping_booking = db.query(Booking.id).filter(
+                and_(
+                    Booking.tutor_id == tutor_id,
+                    Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+                    Booking.start_time < end_time,
+                    Booking.end_time > start_time
+                )
+            ).first()
+            if overlapping_booking:
+                return False
+
+        available_slot = db.query(Slot.id).filter(
+            and_(
+                Slot.tutor_id == tutor_id,
+                Slot.date == start_time.date(),
+                Slot.start_time <= start_time.time(),
+                Slot.end_time >= end_time.time(),
+                Slot.is_available == True
+            )
+        ).first()
+        if available_slot is not None:
+            return True
+        return find_covering_occurrence(db, tutor_id, start_time, end_time) is not None
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, changes: List[tuple]) -> None:
+        """Applica le modifiche registrate in una transazione committata"""
+        with self._lock:
+            for kind, key, tutor_ids, interval in changes:
+                for tutor_id in tutor_ids:
+                    self._generations[tutor_id] = self._generations.get(tutor_id, 0) + 1
+                if kind == "template":
+                    for tutor_id in tutor_ids:
+                        self._tutors.pop(tutor_id, None)
+                    continue
+                if kind == "occurrence":
+                    state = self._tutors.get(tutor_ids[0])
+                    if state is not None:
+                        state.materialized.add(interval)
+                    continue
+                for tutor_id in tutor_ids:
+                    state = self._tutors.get(tutor_id)
+                    if state is None:
+                        continue
+                    target = state.bookings if kind == "booking" else state.slots
+                    target.remove(key)
+                if interval is None:
+                    continue
+                state = self._tutors.get(tutor_ids[0])
+                if state is None:
+                    continue
+                target = state.bookings if kind == "booking" else state.slots
+                target.add(key, *interval)
+
+    def discard_changes(self, changes: List[tuple]) -> None:
+        """Rollback: invalida i tutor toccati dalla transazione"""
+        with self._lock:
+            for _, _, tutor_ids, _ in changes:
+                for tutor_id in tutor_ids:
+                    self._drop(tutor_id)
+
+
+availability_index = TutorAvailabilityIndex()
+
+
+def _tutor_ids(target) -> List[int]:
+    """Tutor corrente per primo, seguito dall'eventuale tutor precedente"""
+    ids = [target.tutor_id]
+    history = inspect(target).attrs.tutor_id.history
+    for old_id in history.deleted or ():
+        if old_id is not None and old_id not in ids:
+            ids.append(old_id)
+    return ids
+
+
+def _record(target, change: tuple) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    session.info.setdefault(_SESSION_KEY, []).append(change)
+
+
+def _booking_interval(target: Booking) -> Optional[Tuple[datetime, datetime]]:
+    if target.status not in ACTIVE_BOOKING_STATUSES or not target.start_time or not target.end_time:
+        return None
+    return (naive_utc(target.start_time), naive_utc(target.end_time))
+
+
+def _slot_interval(target: Slot) -> Optional[Tuple[datetime, datetime]]:
+    if not target.is_available or not target.date or not target.start_time or not target.end_time:
+        return None
+    return (
+        datetime.combine(target.date, target.start_time),
+        datetime.combine(target.date, target.end_time)
+    )
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+def _booking_saved(mapper, connection, target):
+    _record(target, ("booking", target.id, _tutor_ids(target), _booking_interval(target)))
+
+
+@event.listens_for(Booking, "after_delete")
+def _booking_deleted(mapper, connection, target):
+    _record(target, ("booking", target.id, _tutor_ids(target), None))
+
+
+@event.listens_for(Slot, "after_insert")
+@event.listens_for(Slot, "after_update")
+def _slot_saved(mapper, connection, target):
+    _record(target, ("slot", target.id, _tutor_ids(target), _slot_interval(target)))
+    if target.recurring_availability_id is not None:
+        _record(target, ("occurrence", target.id, _tutor_ids(target), (target.recurring_availability_id, target.date)))
+
+
+@event.listens_for(Slot, "after_delete")
+def _slot_deleted(mapper, connection, target):
+    _record(target, ("slot", target.id, _tutor_ids(target), None))
+
+
+@event.listens_for(RecurringAvailability, "after_insert")
+@event.listens_for(RecurringAvailability, "after_update")
+@event.listens_for(RecurringAvailability, "after_delete")
+def _template_changed(mapper, connection, target):
+    _record(target, ("template", target.id, _tutor_ids(target), None))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        availability_index.apply_changes(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        availability_index.discard_changes(changes)
@@ -1,7 +1,8 @@
 """
 Bookings models for tutoring platform
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, Numeric, Index, DDL, event, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship, Session
 from datetime import datetime
 from decimal import Decimal
@@ -14,6 +15,11 @@ class BookingStatus(enum.Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Vincolo di esclusione PostgreSQL: due booking attivi dello stesso tutor non
+# possono sovrapporsi (migrazione 20251015_booking_overlap_exclusion)
+BOOKING_OVERLAP_CONSTRAINT = "ex_bookings_tutor_no_overlap"
+EXCLUSION_VIOLATION_PGCODE = "23P01"
+
 class Booking(Base):
     __tablename__ = "bookings"
     
@@ -44,6 +50,20 @@ class Booking(Base):
     package_purchase = relationship("PackagePurchase", back_populates="bookings")
     pricing_calculation = relationship("PricingCalculation", foreign_keys=[pricing_calculation_id])
     
+    # Indici per i filtri più frequenti (migrazione 20251008_hot_path_indexes)
+    __table_args__ = (
+        Index("ix_bookings_tutor_status_start", "tutor_id", "status", "start_time"),
+        Index("ix_bookings_student_start", "student_id", "start_time"),
+        Index("ix_bookings_start_time_id", "start_time", "id"),  # range giornalieri + paginazione keyset
+        ExcludeConstraint(
+            ("tutor_id", "="),
+            (func.tsrange(text("start_time"), text("end_time"), "[)"), "&&"),
+            name=BOOKING_OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("status IN ('PENDING', 'CONFIRMED')"),
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     def auto_calculate_duration(self) -> int:
         """
         🕒 REPLICA EXCEL: =HOUR(END_TIME) - HOUR(START_TIME)
@@ -90,3 +110,11 @@ class Booking(Base):
             print(f"Warning: Pricing calculation failed: {e}")
             # Mantieni comportamento esistente
             return None
+
+
+# btree_gist serve per "tutor_id WITH =" nel vincolo di esclusione
+event.listen(
+    Booking.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
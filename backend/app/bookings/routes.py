@@ -1,10 +1,11 @@
 """
 Bookings routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import InvalidCursor, with_next_cursor
 from app.auth.dependencies import get_current_user
 from app.users.models import User
 from app.users.models import UserRole
@@ -49,14 +50,16 @@ async def create_booking(
 
 @router.get("/", response_model=List[schemas.Booking], tags=["Bookings"])
 async def get_bookings(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     student_id: int = None,
     tutor_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get bookings with filters"""
+    """Get bookings with filters; pass X-Next-Cursor back as `cursor` for the next page"""
     if student_id:
         # Admin or the student themselves can view specific student bookings
         if current_user.role == UserRole.STUDENT:
@@ -66,7 +69,7 @@ async def get_bookings(
         elif current_user.role != UserRole.ADMIN:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return await services.BookingService.get_student_bookings(db, student_id, skip, limit)
+        list_bookings = services.BookingService.get_student_bookings(db, student_id, skip, limit, cursor)
     elif tutor_id:
         # Admin or the tutor themselves can view specific tutor bookings
         if current_user.role == UserRole.TUTOR:
@@ -76,43 +79,56 @@ async def get_bookings(
         elif current_user.role != UserRole.ADMIN:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return await services.BookingService.get_tutor_bookings(db, tutor_id, skip, limit)
+        list_bookings = services.BookingService.get_tutor_bookings(db, tutor_id, skip, limit, cursor)
     else:
         # Users can only see their own bookings
         if current_user.role == UserRole.STUDENT:
             student = await user_services.UserService.get_student_by_user_id(db, current_user.id)
             if not student:
                 raise HTTPException(status_code=404, detail="Student profile not found")
-            return await services.BookingService.get_student_bookings(db, student.id, skip, limit)
+            list_bookings = services.BookingService.get_student_bookings(db, student.id, skip, limit, cursor)
         elif current_user.role == UserRole.TUTOR:
             tutor = await user_services.UserService.get_tutor_by_user_id(db, current_user.id)
             if not tutor:
                 raise HTTPException(status_code=404, detail="Tutor profile not found")
-            return await services.BookingService.get_tutor_bookings(db, tutor.id, skip, limit)
+            list_bookings = services.BookingService.get_tutor_bookings(db, tutor.id, skip, limit, cursor)
         else:
             raise HTTPException(status_code=403, detail="Access denied")
 
+    try:
+        return with_next_cursor(response, await list_bookings)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/upcoming", response_model=List[schemas.Booking], tags=["Bookings"])
 async def get_upcoming_bookings(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get upcoming bookings for current user; admins see all upcoming."""
+    """Get upcoming bookings for current user; admins see all upcoming (cursor-paginated)."""
     if current_user.role == UserRole.ADMIN:
-        return await services.BookingService.get_upcoming_bookings_all(db, skip, limit)
-    if current_user.role == UserRole.STUDENT:
+        upcoming = services.BookingService.get_upcoming_bookings_all(db, skip, limit, cursor)
+    elif current_user.role == UserRole.STUDENT:
         student = await user_services.UserService.get_student_by_user_id(db, current_user.id)
         if not student:
             raise HTTPException(status_code=404, detail="Student profile not found")
-        return await services.BookingService.get_upcoming_bookings(db, student.id, "student", skip, limit)
-    if current_user.role == UserRole.TUTOR:
+        upcoming = services.BookingService.get_upcoming_bookings(db, student.id, "student", skip, limit, cursor)
+    elif current_user.role == UserRole.TUTOR:
         tutor = await user_services.UserService.get_tutor_by_user_id(db, current_user.id)
         if not tutor:
             raise HTTPException(status_code=404, detail="Tutor profile not found")
-        return await services.BookingService.get_upcoming_bookings(db, tutor.id, "tutor", skip, limit)
-    raise HTTPException(status_code=403, detail="Access denied")
+        upcoming = services.BookingService.get_upcoming_bookings(db, tutor.id, "tutor", skip, limit, cursor)
+    else:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    try:
+        return with_next_cursor(response, await upcoming)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/completed", response_model=List[schemas.Booking], tags=["Bookings"])
 async def get_completed_bookings(
@@ -3,13 +3,21 @@ Booking Services Enhanced - Service potenziato con calcoli automatici
 ESTENDE il BookingService esistente mantenendo compatibilità
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_, case, func
+from sqlalchemy.exc import IntegrityError
 from app.bookings import models, schemas
 from app.bookings.auto_calculations import BookingAutoCalculations
-from app.packages.services import PackagePurchaseService
-from app.slots.models import Slot
-from typing import List, Optional, Dict, Any
+from app.bookings.availability import availability_index, naive_utc
+from app.slots.services import SlotService
+from app.dashboard.cache import dashboard_cache
+from app.analytics.rollups import apply_booking_changes
+from app.core.pagination import Page, paginate
+from typing import Callable, List, Optional, Dict, Any, Sequence, Tuple
 from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Keyset for cursor pagination: start_time alone is not unique
+BOOKING_KEYSET = (models.Booking.start_time, models.Booking.id)
 
 
 class BookingService:
@@ -23,37 +31,39 @@ class BookingService:
         db: Session, 
         student_id: int, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[models.Booking]:
-        """Get all bookings for a student"""
-        return db.query(models.Booking).filter(
-            models.Booking.student_id == student_id
-        ).offset(skip).limit(limit).all()
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get all bookings for a student, ordered by (start_time, id)"""
+        query = db.query(models.Booking).filter(models.Booking.student_id == student_id)
+        return paginate(query, BOOKING_KEYSET, limit, skip=skip, cursor=cursor)
     
     @staticmethod
     async def get_tutor_bookings(
         db: Session, 
         tutor_id: int, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[models.Booking]:
-        """Get all bookings for a tutor"""
-        return db.query(models.Booking).filter(
-            models.Booking.tutor_id == tutor_id
-        ).offset(skip).limit(limit).all()
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get all bookings for a tutor, ordered by (start_time, id)"""
+        query = db.query(models.Booking).filter(models.Booking.tutor_id == tutor_id)
+        return paginate(query, BOOKING_KEYSET, limit, skip=skip, cursor=cursor)
     
     @staticmethod
     async def get_upcoming_bookings_all(
         db: Session, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[models.Booking]:
-        """Get all upcoming bookings (admin only)"""
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get all upcoming bookings (admin only), soonest first"""
         now = datetime.utcnow()
-        return db.query(models.Booking).filter(
+        query = db.query(models.Booking).filter(
             models.Booking.start_time > now,
             models.Booking.status.in_([models.BookingStatus.PENDING, models.BookingStatus.CONFIRMED])
-        ).offset(skip).limit(limit).all()
+        )
+        return paginate(query, BOOKING_KEYSET, limit, skip=skip, cursor=cursor)
     
     @staticmethod
     async def get_upcoming_bookings(
@@ -61,9 +71,10 @@ class BookingService:
         user_id: int, 
         user_type: str,
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[models.Booking]:
-        """Get upcoming bookings for specific user"""
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get upcoming bookings for specific user, soonest first"""
         now = datetime.utcnow()
         query = db.query(models.Booking).filter(
             models.Booking.start_time > now,
@@ -75,7 +86,7 @@ class BookingService:
         elif user_type == "tutor":
             query = query.filter(models.Booking.tutor_id == user_id)
         
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, BOOKING_KEYSET, limit, skip=skip, cursor=cursor)
     
     @staticmethod
     async def get_booking_by_id(db: Session, booking_id: int) -> Optional[models.Booking]:
@@ -168,73 +179,104 @@ class EnhancedBookingService:
         2. Aggiunge calcoli automatici Excel-like  
         3. Validazioni business intelligenti
         4. Auto-aggiornamento package
-        """
-        
-        # ✅ STEP 1: Validazioni esistenti (mantieni logica)
-        purchase = await PackagePurchaseService.get_purchase_by_id(db, booking_data.package_purchase_id)
-        if not purchase:
-            raise ValueError("Package purchase not found")
-        
-        if purchase.hours_remaining < booking_data.duration_hours:
-            raise ValueError("Not enough hours remaining in package")
-        
-        if not await EnhancedBookingService.is_slot_available(
-            db, booking_data.tutor_id, booking_data.start_time, booking_data.end_time
-        ):
-            raise ValueError("Time slot not available")
-        
-        # ✅ STEP 2: Crea booking (logica esistente)  
-        booking = models.Booking(
-            student_id=booking_data.student_id,
-            tutor_id=booking_data.tutor_id,
-            package_purchase_id=booking_data.package_purchase_id,
-            start_time=booking_data.start_time,
-            end_time=booking_data.end_time,
-            duration_hours=booking_data.duration_hours,  # Input manuale come backup
-            subject=booking_data.subject,
-            notes=booking_data.notes
-        )
         
-        # 🆕 STEP 3: Calcoli automatici (NUOVO!)
-        if auto_calculate:
+        Tutto avviene in un'unica transazione: il purchase è bloccato con
+        SELECT ... FOR UPDATE (dove supportato) e le ore sono scalate con un
+        UPDATE condizionale, quindi booking concorrenti non possono consumare
+        due volte le stesse ore. Un solo commit finale, rollback su errore.
+        """
+        from app.packages.models import PackagePurchase
+        
+        try:
+            # ✅ STEP 1: Validazioni esistenti (purchase bloccato fino al commit)
+            purchase = BookingAutoCalculations.lock_for_update(
+                db, db.query(PackagePurchase).filter(PackagePurchase.id == booking_data.package_purchase_id)
+            ).first()
+            if not purchase:
+                raise ValueError("Package purchase not found")
+            
+            if purchase.hours_remaining < booking_data.duration_hours:
+                raise ValueError("Not enough hours remaining in package")
+            
+            # Su PostgreSQL la sovrapposizione con altri booking è garantita dal
+            # vincolo di esclusione: qui resta solo la copertura dello slot
+            optimistic = EnhancedBookingService._uses_overlap_constraint(db)
+            if not await EnhancedBookingService.is_slot_available(
+                db, booking_data.tutor_id, booking_data.start_time, booking_data.end_time,
+                check_bookings=not optimistic
+            ):
+                raise ValueError("Time slot not available")
+            
+            # 🔁 Se lo copre solo un'occorrenza ricorrente, la materializza in uno Slot
+            await SlotService.materialize_for_booking(
+                db, booking_data.tutor_id, naive_utc(booking_data.start_time), naive_utc(booking_data.end_time)
+            )
+            
+            # ✅ STEP 2: Crea booking (logica esistente)  
+            booking = models.Booking(
+                student_id=booking_data.student_id,
+                tutor_id=booking_data.tutor_id,
+                package_purchase_id=booking_data.package_purchase_id,
+                start_time=booking_data.start_time,
+                end_time=booking_data.end_time,
+                duration_hours=booking_data.duration_hours,  # Input manuale come backup
+                subject=booking_data.subject,
+                notes=booking_data.notes
+            )
+            
+            # 🆕 STEP 3: Calcoli automatici (NUOVO!)
+            if auto_calculate:
+                try:
+                    # Auto-calcola durata (Excel HOUR formula)
+                    booking.calculated_duration = BookingAutoCalculations.auto_calculate_duration(
+                        booking.start_time, booking.end_time
+                    )
+                    
+                    # Auto-calcola pricing (Excel XLOOKUP replica): log nella stessa
+                    # transazione, salvato col commit finale o annullato col rollback
+                    pricing_result = await BookingAutoCalculations.auto_calculate_pricing(
+                        booking, db, lesson_type_hint, commit=False, deferred_log=False
+                    )
+                    
+                    # Validazioni business (Excel conditional logic)
+                    validation_result = BookingAutoCalculations.validate_booking_logic(booking, db)
+                    
+                    if not validation_result["is_valid"]:
+                        raise ValueError(f"Booking validation failed: {', '.join(validation_result['errors'])}")
+                    
+                    # Log warnings se presenti
+                    if validation_result["warnings"]:
+                        print(f"⚠️ Booking warnings: {', '.join(validation_result['warnings'])}")
+                    
+                    print(f"✅ Auto-calculations complete: {booking.calculated_duration}h @ €{booking.calculated_price}")
+                    
+                except Exception as e:
+                    print(f"⚠️ Auto-calculation failed, using manual inputs: {e}")
+                    # Fallback: usa valori manuali se auto-calcolo fallisce
+            
+            # ✅ STEP 4: Inserisce booking (flush, nessun commit intermedio)
+            db.add(booking)
             try:
-                # Auto-calcola durata (Excel HOUR formula)
-                booking.calculated_duration = BookingAutoCalculations.auto_calculate_duration(
-                    booking.start_time, booking.end_time
-                )
-                
-                # Auto-calcola pricing (Excel XLOOKUP replica)
-                pricing_result = await BookingAutoCalculations.auto_calculate_pricing(
-                    booking, db, lesson_type_hint
-                )
-                
-                # Validazioni business (Excel conditional logic)
-                validation_result = BookingAutoCalculations.validate_booking_logic(booking, db)
-                
-                if not validation_result["is_valid"]:
-                    raise ValueError(f"Booking validation failed: {', '.join(validation_result['errors'])}")
-                
-                # Log warnings se presenti
-                if validation_result["warnings"]:
-                    print(f"⚠️ Booking warnings: {', '.join(validation_result['warnings'])}")
-                
-                print(f"✅ Auto-calculations complete: {booking.calculated_duration}h @ €{booking.calculated_price}")
-                
-            except Exception as e:
-                print(f"⚠️ Auto-calculation failed, using manual inputs: {e}")
-                # Fallback: usa valori manuali se auto-calcolo fallisce
+                db.flush()
+            except IntegrityError as e:
+                if EnhancedBookingService._is_overlap_violation(e):
+                    raise ValueError("Time slot not available") from e
+                raise
+            
+            # 🆕 STEP 5: Scala ore dal package + admin assignment nella stessa transazione
+            hours_to_consume = booking.calculated_duration or booking.duration_hours
+            consumed = await BookingAutoCalculations.auto_update_package_consumption(
+                booking, db, operation="consume", commit=False
+            )
+            if not consumed:
+                raise ValueError("Not enough hours remaining in package")
+            
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
         
-        # ✅ STEP 4: Salva booking
-        db.add(booking)
-        db.commit()
         db.refresh(booking)
-        
-        # 🆕 STEP 5: Auto-aggiorna package con ore calcolate (NUOVO!)
-        hours_to_consume = booking.calculated_duration or booking.duration_hours
-        await BookingAutoCalculations.auto_update_package_consumption(
-            booking, db, operation="consume"
-        )
-        
         print(f"📦 Package updated: consumed {hours_to_consume}h from purchase #{booking.package_purchase_id}")
         
         return booking
@@ -254,33 +296,41 @@ class EnhancedBookingService:
         - Aggiorna package automaticamente
         """
         
-        booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
-        if not booking:
-            return None
-        
-        if booking.status in [models.BookingStatus.COMPLETED, models.BookingStatus.CANCELLED]:
-            raise ValueError("Cannot cancel completed or already cancelled booking")
-        
-        # 🆕 Logica rimborso intelligente
-        if auto_refund:
-            refund_policy = EnhancedBookingService._calculate_refund_policy(booking)
+        try:
+            # Booking bloccato: due cancellazioni concorrenti non rimborsano due volte
+            booking = BookingAutoCalculations.lock_for_update(
+                db, db.query(models.Booking).filter(models.Booking.id == booking_id)
+            ).first()
+            if not booking:
+                return None
             
-            if refund_policy["can_refund"]:
-                # Rimborsa ore al package (Excel addizione automatica)
-                hours_to_refund = int(booking.calculated_duration or booking.duration_hours * refund_policy["refund_percentage"])
-                
-                await BookingAutoCalculations.auto_update_package_consumption(
-                    booking, db, operation="refund"
-                )
+            if booking.status in [models.BookingStatus.COMPLETED, models.BookingStatus.CANCELLED]:
+                raise ValueError("Cannot cancel completed or already cancelled booking")
+            
+            # 🆕 Logica rimborso intelligente
+            if auto_refund:
+                refund_policy = EnhancedBookingService._calculate_refund_policy(booking)
                 
-                print(f"💰 Auto-refund: {hours_to_refund}h refunded to package")
-            else:
-                print(f"❌ No refund: {refund_policy['reason']}")
+                if refund_policy["can_refund"]:
+                    # Rimborsa ore al package (Excel addizione automatica)
+                    hours_to_refund = int(booking.calculated_duration or booking.duration_hours * refund_policy["refund_percentage"])
+                    
+                    await BookingAutoCalculations.auto_update_package_consumption(
+                        booking, db, operation="refund", commit=False
+                    )
+                    
+                    print(f"💰 Auto-refund: {hours_to_refund}h refunded to package")
+                else:
+                    print(f"❌ No refund: {refund_policy['reason']}")
+            
+            # Aggiorna stato (stessa transazione del rimborso)
+            booking.status = models.BookingStatus.CANCELLED
+            booking.updated_at = datetime.utcnow()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
         
-        # Aggiorna stato
-        booking.status = models.BookingStatus.CANCELLED
-        booking.updated_at = datetime.utcnow()
-        db.commit()
         db.refresh(booking)
         
         return booking
@@ -379,26 +429,62 @@ class EnhancedBookingService:
         - Metriche tutor performance  
         - Trend completamenti
         - Efficiency ratios
+        
+        Tutte le metriche sono calcolate da un'unica SELECT con aggregati
+        condizionali (SUM(CASE ...)): nessun booking viene caricato in memoria.
         """
         
-        # Query base
-        query = db.query(models.Booking)
+        Booking = models.Booking
+        is_completed = Booking.status == models.BookingStatus.COMPLETED
+        
+        def completed_sum(column):
+            return func.coalesce(func.sum(case((is_completed, func.coalesce(column, 0)), else_=0)), 0)
+        
+        def status_count(status):
+            return func.coalesce(func.sum(case((Booking.status == status, 1), else_=0)), 0)
+        
+        # Query base (solo scalari)
+        query = db.query(
+            func.count(Booking.id).label("total_bookings"),
+            status_count(models.BookingStatus.COMPLETED).label("completed"),
+            status_count(models.BookingStatus.PENDING).label("pending"),
+            status_count(models.BookingStatus.CANCELLED).label("cancelled"),
+            completed_sum(Booking.calculated_price).label("total_revenue"),
+            completed_sum(Booking.tutor_earnings).label("total_tutor_earnings"),
+            completed_sum(Booking.platform_fee).label("total_platform_fees"),
+            completed_sum(
+                func.coalesce(func.nullif(Booking.calculated_duration, 0), Booking.duration_hours)
+            ).label("total_hours")
+        )
         
         # Filtri
         if student_id:
-            query = query.filter(models.Booking.student_id == student_id)
+            query = query.filter(Booking.student_id == student_id)
         if tutor_id:
-            query = query.filter(models.Booking.tutor_id == tutor_id)
+            query = query.filter(Booking.tutor_id == tutor_id)
         if date_from:
-            query = query.filter(models.Booking.start_time >= date_from)
+            query = query.filter(Booking.start_time >= date_from)
         if date_to:
-            query = query.filter(models.Booking.start_time <= date_to)
-        
-        bookings = query.all()
-        
-        # Usa utility per calcoli metriche
-        from app.bookings.auto_calculations import calculate_booking_metrics
-        base_metrics = calculate_booking_metrics(bookings)
+            query = query.filter(Booking.start_time <= date_to)
+        
+        row = query.one()
+        
+        # Stesse chiavi di calculate_booking_metrics
+        total_bookings = int(row.total_bookings or 0)
+        completed = int(row.completed or 0)
+        total_hours = row.total_hours or 0
+        base_metrics = {
+            "total_bookings": total_bookings,
+            "completed": completed,
+            "pending": int(row.pending or 0),
+            "cancelled": int(row.cancelled or 0),
+            "total_revenue": float(row.total_revenue or 0),
+            "total_tutor_earnings": float(row.total_tutor_earnings or 0),
+            "total_platform_fees": float(row.total_platform_fees or 0),
+            "total_hours": total_hours,
+            "avg_duration": round(total_hours / completed, 2) if completed else 0,
+            "completion_rate": round(completed / total_bookings * 100, 1) if total_bookings else 0
+        }
         
         # Calcoli aggiuntivi
         enhanced_metrics = {
@@ -420,47 +506,59 @@ class EnhancedBookingService:
         return enhanced_metrics
     
     @staticmethod
-    async def is_slot_available(db: Session, tutor_id: int, start_time: datetime, end_time: datetime) -> bool:
+    async def is_slot_available(
+        db: Session,
+        tutor_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        check_bookings: bool = True
+    ) -> bool:
         """
         🕐 CHECK SLOT AVAILABILITY
-        Mantiene logica esistente per compatibilità
+        Nessun booking attivo sovrapposto + uno slot disponibile che copre l'intervallo.
+        Risolto sull'indice in memoria (vedi app.bookings.availability)
         """
-        # Check for overlapping bookings
-        overlapping_booking = db.query(models.Booking).filter(
-            and_(
-                models.Booking.tutor_id == tutor_id,
-                models.Booking.status.in_([models.BookingStatus.PENDING, models.BookingStatus.CONFIRMED]),
-                models.Booking.start_time < end_time,
-                models.Booking.end_time > start_time
-            )
-        ).first()
-        
-        if overlapping_booking:
-            return False
-        
-        # Check if the tutor has available slots
-        date = start_time.date()
-        start_time_only = start_time.time()
-        end_time_only = end_time.time()
-        
-        available_slot = db.query(Slot).filter(
-            and_(
-                Slot.tutor_id == tutor_id,
-                Slot.date == date,
-                Slot.start_time <= start_time_only,
-                Slot.end_time >= end_time_only,
-                Slot.is_available == True
-            )
-        ).first()
-        
-        return available_slot is not None
+        return availability_index.is_available(db, tutor_id, start_time, end_time, check_bookings)
+    
+    @staticmethod
+    def _uses_overlap_constraint(db: Session) -> bool:
+        """
+        🔒 Il database ha il vincolo di esclusione sui booking sovrapposti?
+        Solo PostgreSQL (migrazione 20251015_booking_overlap); SQLite usa il check applicativo
+        """
+        dialect_name = getattr(getattr(db.get_bind(), "dialect", None), "name", None)
+        return dialect_name == "postgresql"
+    
+    @staticmethod
+    def _is_overlap_violation(error: IntegrityError) -> bool:
+        """Violazione del vincolo di esclusione (SQLSTATE 23P01) sollevata dall'INSERT"""
+        orig = getattr(error, "orig", None)
+        code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+        return code == models.EXCLUSION_VIOLATION_PGCODE
+    
+    @staticmethod
+    async def are_slots_available(
+        db: Session,
+        tutor_id: int,
+        intervals: Sequence[Tuple[datetime, datetime]]
+    ) -> List[bool]:
+        """
+        🕐 CHECK DISPONIBILITÀ BATCH
+        "Il tutor è libero per questi N intervalli?" in una sola chiamata;
+        i risultati seguono l'ordine degli intervalli richiesti
+        """
+        return availability_index.are_available(db, tutor_id, intervals)
     
     @staticmethod
     async def bulk_recalculate_bookings(
         db: Session,
         booking_ids: List[int],
         recalculate_pricing: bool = True,
-        recalculate_duration: bool = False
+        recalculate_duration: bool = False,
+        dry_run: bool = False,
+        chunk_size: int = 500,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        log_calculation: bool = False
     ) -> Dict[str, Any]:
         """
         📦 BULK RICALCOLO BOOKING
@@ -469,58 +567,175 @@ class EnhancedBookingService:
         - Utile per aggiornamenti regole pricing
         - Migrazioni dati
         - Correzioni massive
+        
+        Set-based: i booking sono caricati a blocchi di `chunk_size` con una
+        sola query IN (solo le colonne necessarie), prezzati sullo stesso
+        snapshot tariffario e aggiornati con bulk_update_mappings + un commit
+        per blocco. dry_run calcola il diff senza scrivere nulla.
+        progress_callback(processed, total) viene chiamato dopo ogni blocco.
         """
+        from app.packages.models import Package, PackagePurchase
+        from app.pricing.rule_table import pricing_table
+        from app.pricing.services import PricingService
         
         results = {
             "processed": 0,
             "updated": 0,
             "errors": [],
-            "summary": {}
+            "summary": {},
+            "dry_run": dry_run,
+            "diff": {
+                "price_changes": 0,
+                "duration_changes": 0,
+                "total_price_delta": 0.0,
+                "changes": []
+            }
         }
         
-        for booking_id in booking_ids:
-            try:
-                booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
-                if not booking:
-                    results["errors"].append(f"Booking {booking_id} not found")
-                    continue
-                
-                results["processed"] += 1
-                updated = False
-                
-                # Ricalcola durata se richiesto
-                if recalculate_duration and booking.start_time and booking.end_time:
-                    old_duration = booking.calculated_duration
-                    booking.calculated_duration = BookingAutoCalculations.auto_calculate_duration(
-                        booking.start_time, booking.end_time
-                    )
-                    
-                    if old_duration != booking.calculated_duration:
-                        updated = True
-                        print(f"📏 Booking {booking_id}: duration {old_duration}h -> {booking.calculated_duration}h")
+        unique_ids = list(dict.fromkeys(booking_ids))
+        total = len(unique_ids)
+        table = pricing_table.get(db) if recalculate_pricing else None
+        price_delta = Decimal("0")
+        
+        for offset in range(0, total, chunk_size):
+            chunk = unique_ids[offset:offset + chunk_size]
+            rows = db.query(
+                models.Booking.id,
+                models.Booking.tutor_id,
+                models.Booking.subject,
+                models.Booking.start_time,
+                models.Booking.end_time,
+                models.Booking.duration_hours,
+                models.Booking.calculated_duration,
+                models.Booking.calculated_price,
+                models.Booking.tutor_earnings,
+                models.Booking.platform_fee,
+                models.Booking.pricing_rule_applied,
+                models.Booking.status,
+                Package.name.label("package_name")
+            ).outerjoin(
+                PackagePurchase, PackagePurchase.id == models.Booking.package_purchase_id
+            ).outerjoin(
+                Package, Package.id == PackagePurchase.package_id
+            ).filter(models.Booking.id.in_(chunk)).all()
+            
+            found = {row.id for row in rows}
+            results["errors"].extend(f"Booking {booking_id} not found" for booking_id in chunk if booking_id not in found)
+            results["processed"] += len(rows)
+            
+            # Ricalcola durata se richiesto
+            durations = {}
+            for row in rows:
+                duration = row.calculated_duration
+                if recalculate_duration and row.start_time and row.end_time:
+                    try:
+                        duration = BookingAutoCalculations.auto_calculate_duration(row.start_time, row.end_time)
+                    except ValueError as e:
+                        results["errors"].append(f"Booking {row.id}: {str(e)}")
+                durations[row.id] = duration
+            
+            # Ricalcola pricing se richiesto (stesso motore di quote_many)
+            priced = {}
+            if recalculate_pricing and rows:
+                lesson_types = [
+                    BookingAutoCalculations.infer_lesson_type_from(row.package_name, row.start_time)
+                    for row in rows
+                ]
+                quoted = await PricingService.quote_many(
+                    db,
+                    [
+                        {
+                            "lesson_type": lesson_type,
+                            "subject": row.subject,
+                            "duration_hours": durations[row.id],
+                            "tutor_id": row.tutor_id,
+                        }
+                        for row, lesson_type in zip(rows, lesson_types)
+                    ],
+                    log_calculation=log_calculation,
+                    table=table
+                )
+                for row, lesson_type, item in zip(rows, lesson_types, quoted):
+                    try:
+                        if item["success"]:
+                            result = item["result"]
+                            priced[row.id] = {
+                                "calculated_price": Decimal(str(result["final_total_price"])),
+                                "tutor_earnings": Decimal(str(result["tutor_earnings"])),
+                                "platform_fee": Decimal(str(result["platform_fee"])),
+                                "pricing_rule_applied": result.get("applied_rule_name", "AUTO"),
+                            }
+                        else:
+                            fallback = BookingAutoCalculations.fallback_pricing_result(
+                                lesson_type, durations[row.id]
+                            )
+                            priced[row.id] = {
+                                "calculated_price": fallback["final_total_price"],
+                                "tutor_earnings": fallback["tutor_earnings"],
+                                "platform_fee": fallback["platform_fee"],
+                                "pricing_rule_applied": fallback["applied_rule_name"],
+                            }
+                    except Exception as e:
+                        results["errors"].append(f"Booking {row.id}: {str(e)}")
+            
+            # Diff + mapping per bulk update
+            now = datetime.utcnow()
+            mappings = []
+            rollup_changes = []
+            for row in rows:
+                mapping = {}
+                if durations[row.id] != row.calculated_duration:
+                    mapping["calculated_duration"] = durations[row.id]
+                    results["diff"]["duration_changes"] += 1
                 
-                # Ricalcola pricing se richiesto
-                if recalculate_pricing:
-                    old_price = booking.calculated_price
-                    await BookingAutoCalculations.auto_calculate_pricing(booking, db)
-                    
-                    if old_price != booking.calculated_price:
-                        updated = True
-                        print(f"💰 Booking {booking_id}: price €{old_price} -> €{booking.calculated_price}")
+                new_pricing = priced.get(row.id)
+                if new_pricing:
+                    for field, value in new_pricing.items():
+                        if getattr(row, field) != value:
+                            mapping[field] = value
+                    if "calculated_price" in mapping:
+                        results["diff"]["price_changes"] += 1
+                        price_delta += mapping["calculated_price"] - (row.calculated_price or Decimal("0"))
                 
-                if updated:
-                    results["updated"] += 1
-                    booking.updated_at = datetime.utcnow()
+                if not mapping:
+                    continue
                 
-            except Exception as e:
-                results["errors"].append(f"Booking {booking_id}: {str(e)}")
+                if len(results["diff"]["changes"]) < 100:
+                    results["diff"]["changes"].append({
+                        "booking_id": row.id,
+                        "old_duration": row.calculated_duration,
+                        "new_duration": durations[row.id],
+                        "old_price": float(row.calculated_price) if row.calculated_price is not None else None,
+                        "new_price": float(mapping.get("calculated_price", row.calculated_price or 0)),
+                    })
+                rollup_changes.append((row._mapping, dict(mapping)))
+                mapping["id"] = row.id
+                mapping["updated_at"] = now
+                mappings.append(mapping)
+            
+            results["updated"] += len(mappings)
+            if mappings and not dry_run:
+                db.bulk_update_mappings(models.Booking, mappings)
+                # Niente eventi ORM: rollup giornalieri aggiornati nella stessa transazione
+                apply_booking_changes(db, rollup_changes)
+                db.commit()
+            
+            if progress_callback:
+                progress_callback(min(offset + len(chunk), total), total)
         
-        # Commit tutte le modifiche insieme
-        db.commit()
+        # bulk_update_mappings non emette eventi ORM: invalidazione esplicita
+        if results["updated"] and not dry_run:
+            dashboard_cache.invalidate()
         
+        results["diff"]["total_price_delta"] = float(price_delta)
         results["summary"] = {
             "success_rate": round(results["updated"] / results["processed"] * 100, 1) if results["processed"] > 0 else 0,
             "error_rate": round(len(results["errors"]) / results["processed"] * 100, 1) if results["processed"] > 0 else 0
         }
         
-        return results
\ No newline at end of file
+        print(
+            f"📦 Bulk recalculation{' (dry run)' if dry_run else ''}: "
+            f"{results['processed']} processed, {results['updated']} updated, {len(results['errors'])} errors"
+        )
+        
+        return results
@@ -0,0 +1,84 @@
+"""
+Key/value cache backends.
+
+`CacheBackend` is the interface used by the result caches (dashboard widgets,
+stats); `InMemoryLRUCache` is the default in-process implementation. A shared
+backend (e.g. Redis) only needs to implement the same five methods.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    """Minimal cache interface: values are opaque, TTL in seconds."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, prefix: str = "") -> int:
+        """Remove every key starting with prefix; returns the number removed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix: str = "") -> int:
+        with self._lock:
+            if not prefix:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -56,6 +56,35 @@ class Settings(BaseSettings):
     # Dev utilities
     AUTO_SEED: bool = False
     
+    # In-memory caches
+    AVAILABILITY_INDEX_TTL_SECONDS: int = 300
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRICING_TABLE_TTL_SECONDS: int = 300
+    DASHBOARD_CACHE_SECONDS: int = 30
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+    
+    # Dashboard stream (SSE)
+    DASHBOARD_STREAM_DEBOUNCE_SECONDS: float = 1.0
+    DASHBOARD_STREAM_TICK_SECONDS: float = 60.0
+    DASHBOARD_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    
+    # Pricing audit log (batched writer)
+    PRICING_AUDIT_DEFERRED: bool = True
+    PRICING_AUDIT_QUEUE_SIZE: int = 10000
+    PRICING_AUDIT_BATCH_SIZE: int = 200
+    PRICING_AUDIT_FLUSH_SECONDS: float = 2.0
+    
+    # Streaming exports (rows fetched per server-side cursor batch)
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Recurring availability (days expanded when a slot listing has no date)
+    RECURRING_AVAILABILITY_HORIZON_DAYS: int = 90
+    
+    # Free-time search (GET /api/slots/search)
+    SLOT_SEARCH_CACHE_SECONDS: int = 30
+    SLOT_SEARCH_CACHE_MAX_ENTRIES: int = 512
+    SLOT_SEARCH_MAX_DAYS: int = 31
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,143 @@
+"""
+Projected list queries.
+
+A Projection names the columns a list endpoint may return ("fields"),
+including columns of to-one relationships as dotted names ("student.first_name",
+fetched with an outer join), so list pages select plain rows instead of loading
+whole ORM objects and their lazy relationships. Rows come back as dicts, with
+dotted fields nested ({"student": {"first_name": ...}}).
+
+count_rows() gives an exact COUNT(*) or, on PostgreSQL, a planner estimate
+that does not scan the table (pg_class.reltuples without filters, the EXPLAIN
+row estimate with them).
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, text
+
+from app.core.pagination import Page, paginate
+
+logger = logging.getLogger(__name__)
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+COUNT_MODE_HEADER = "X-Count-Mode"
+COUNT_MODES = ("exact", "estimate")
+
+
+class Projection:
+    """
+    Selectable fields of one list endpoint.
+
+    `columns` maps field name -> column; `joins` maps the prefix of dotted
+    fields to (entity, onclause); `default_fields` is used when the client does
+    not ask for specific ones. The model primary key is always selected.
+    """
+
+    def __init__(self, model, columns: Dict[str, Any], default_fields: Sequence[str], joins: Optional[Dict[str, Tuple]] = None):
+        self.model = model
+        self.columns = columns
+        self.default_fields = list(default_fields)
+        self.joins = joins or {}
+
+    def parse_fields(self, fields: Optional[str]) -> List[str]:
+        """Comma separated field names -> validated list (ValueError on unknown names)."""
+        if not fields:
+            return self.default_fields
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        if "id" not in names:
+            names.insert(0, "id")
+        return names
+
+    def select(self, query, names: Iterable[str]):
+        """Replace the entities of `query` (filtered on self.model) with the requested columns."""
+        names = list(names)
+        query = query.with_entities(*[self.columns[name].label(_label(name)) for name in names])
+        for prefix in dict.fromkeys(name.split(".", 1)[0] for name in names if "." in name):
+            entity, onclause = self.joins[prefix]
+            query = query.outerjoin(entity, onclause)
+        return query
+
+    def page(self, query, names: Sequence[str], limit: int, skip: int = 0, cursor: Optional[str] = None) -> Page:
+        """One page of dicts, keyset-paginated on the primary key."""
+        pk = self.columns["id"]
+        rows = paginate(self.select(query, names), (pk,), limit, skip=skip, cursor=cursor)
+        return Page([self.row_dict(row, names) for row in rows], rows.next_cursor)
+
+    @staticmethod
+    def row_dict(row, names: Sequence[str]) -> Dict[str, Any]:
+        """Selected row -> dict, dotted fields nested."""
+        return _row_dict(row, names)
+
+    @staticmethod
+    def row_values(row, names: Sequence[str]) -> List[Any]:
+        """Selected row -> flat values in `names` order (CSV)."""
+        mapping = row._mapping
+        return [mapping[_label(name)] for name in names]
+
+
+def _label(name: str) -> str:
+    return name.replace(".", "__")
+
+
+def _row_dict(row, names: Sequence[str]) -> Dict[str, Any]:
+    mapping = row._mapping
+    result: Dict[str, Any] = {}
+    for name in names:
+        value = mapping[_label(name)]
+        if "." in name:
+            prefix, attr = name.split(".", 1)
+            result.setdefault(prefix, {})[attr] = value
+        else:
+            result[name] = value
+    # Outer join without a match: the nested object is null, not a dict of nulls
+    for key, value in result.items():
+        if isinstance(value, dict) and all(v is None for v in value.values()):
+            result[key] = None
+    return result
+
+
+def _estimate(db, query, table_name: str, filtered: bool) -> Optional[int]:
+    connection = db.connection()
+    if not filtered:
+        reltuples = connection.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+        ).scalar()
+        # -1 (or 0 on older servers) until the table has been analyzed
+        if reltuples is not None and reltuples > 0:
+            return int(reltuples)
+        return None
+    compiled = query.statement.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(db, query, model, mode: str = "exact", filtered: bool = True) -> Tuple[int, str]:
+    """
+    Row count of `query` (an entity query on `model`) and the mode actually
+    used: "estimate" only on PostgreSQL, otherwise (or if no statistics are
+    available yet) the exact count.
+    """
+    if mode == "estimate" and db.get_bind().dialect.name == "postgresql":
+        try:
+            # Savepoint: a failed EXPLAIN must not abort the caller's transaction
+            with db.begin_nested():
+                estimate = _estimate(db, query, model.__tablename__, filtered)
+        except Exception:
+            logger.exception("Row estimate failed for %s, falling back to COUNT", model.__tablename__)
+            estimate = None
+        if estimate is not None:
+            return estimate, "estimate"
+    total = query.order_by(None).with_entities(func.count(model.id)).scalar()
+    return int(total or 0), "exact"
+
+
+def set_count_headers(response, total: int, mode: str) -> None:
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[COUNT_MODE_HEADER] = mode
@@ -0,0 +1,59 @@
+"""
+Named eager-loading profiles.
+
+A profile is the set of loader options a service applies so that everything
+its caller is going to read is fetched up front, in a fixed number of
+statements, instead of one lazy load per row (N+1). joinedload for
+many-to-one / one-to-one hops (same statement), selectinload for collections
+(one extra IN query per relationship).
+
+    query = apply_profile(db.query(PackageRequest), "package_request.tutor_user")
+
+Options are built lazily so that this module does not import every model.
+"""
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy.orm import joinedload
+
+
+def _package_request_tutor_user() -> Tuple:
+    from app.packages.models import PackageRequest
+    from app.users.models import Tutor
+
+    return (joinedload(PackageRequest.tutor).joinedload(Tutor.user),)
+
+
+def _assignment_student_user() -> Tuple:
+    from app.admin.models import AdminPackageAssignment
+    from app.users.models import Student
+
+    return (joinedload(AdminPackageAssignment.student).joinedload(Student.user),)
+
+
+def _purchase_student_package() -> Tuple:
+    from app.packages.models import PackagePurchase
+
+    return (joinedload(PackagePurchase.student), joinedload(PackagePurchase.package))
+
+
+LOADER_PROFILES: Dict[str, Callable[[], Tuple]] = {
+    # GET /api/admin/package-requests: tutor name and email
+    "package_request.tutor_user": _package_request_tutor_user,
+    # GET /api/admin/packages/{id}/assignments: student name and email
+    "assignment.student_user": _assignment_student_user,
+    # Dashboard expiring packages widget: student and package names
+    "purchase.student_package": _purchase_student_package,
+}
+
+
+def loader_options(name: str) -> Tuple:
+    try:
+        factory = LOADER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown loader profile '{name}'")
+    return factory()
+
+
+def apply_profile(query, name: str):
+    """query.options(...) with the loaders of profile `name`."""
+    return query.options(*loader_options(name))
@@ -5,9 +5,11 @@ Import all models to make them available for migrations
 from app.users.models import User, Student, Tutor, UserSession, PasswordReset, UserRole
 from app.packages.models import Package, PackagePurchase, PackageResourceLink, PackageRequest, PackageRequestStatus
 from app.bookings.models import Booking, BookingStatus
-from app.slots.models import Slot
+from app.slots.models import Slot, RecurringAvailability
 # `app.files` removed; file-related models are archived. If reintroducing files, re-add import here.
 from app.payments.models import Payment
 from app.pricing.models import PricingRule, TutorPricingOverride, PricingCalculation, LessonType  # 🆕 NUOVO
+from app.analytics.models import BookingDailyRollup, PaymentDailyRollup
+import app.analytics.rollups  # noqa: F401 - registers rollup maintenance hooks
 
 # This file ensures all models are imported and available for Alembic migrations 
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Keyset (cursor) pagination.
+
+Lists are ordered on a unique key such as (start_time, id) and each page
+continues strictly after the last row of the previous one, so page N costs the
+same index range scan as page one instead of reading and discarding N * limit
+rows as OFFSET does. Cursors are opaque url-safe tokens; clients get the next
+one in the X-Next-Cursor response header and pass it back as ?cursor=.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Malformed or tampered cursor token."""
+
+
+class Page(list):
+    """Rows of one page; next_cursor is None on the last page."""
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise InvalidCursor("Invalid cursor")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != size:
+            raise InvalidCursor("Invalid cursor")
+        return [_decode_value(value) for value in values]
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _after(columns: Sequence, values: Sequence[Any], descending: bool):
+    """(c1, c2, ...) > (v1, v2, ...) (or <), spelled out for portability."""
+    clauses = []
+    for index, column in enumerate(columns):
+        equal = [columns[i] == values[i] for i in range(index)]
+        step = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def paginate(
+    query,
+    columns: Sequence,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Page:
+    """
+    Order `query` on `columns` (last one must be unique, e.g. the primary key)
+    and return one page. With a cursor, `skip` is ignored; without one this is
+    plain OFFSET/LIMIT, still returning a cursor for the following page.
+    """
+    if limit <= 0:
+        return Page()
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, len(columns)), descending))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor([getattr(last, column.key) for column in columns]))
+
+
+def with_next_cursor(response, page: Page) -> Page:
+    """Expose page.next_cursor as the X-Next-Cursor header of a FastAPI Response."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page
@@ -0,0 +1,77 @@
+"""
+Dialect-portable time bucketing.
+
+`time_bucket("week", Booking.start_time)` compiles to
+`CAST(date_trunc('week', ...) AS DATE)` on PostgreSQL and to the equivalent
+`date()` / `strftime()` expression on SQLite, so the same aggregate query runs
+(and can be profiled) on both engines. Buckets are dates: the day itself, the
+Monday of the week (ISO, as date_trunc) or the first day of the month.
+"""
+from datetime import date, timedelta
+from typing import Iterator
+
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def validate_granularity(granularity: str) -> str:
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}")
+    return granularity
+
+
+class time_bucket(FunctionElement):
+    """SQL expression: start date of the bucket containing `column`."""
+    type = Date()
+    name = "time_bucket"
+    inherit_cache = True
+    # granularity must be part of the compiled-statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [("granularity", InternalTraversal.dp_string)]
+
+    def __init__(self, granularity: str, column):
+        self.granularity = validate_granularity(granularity)
+        super().__init__(column)
+
+
+@compiles(time_bucket)
+def _compile_default(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"CAST(date_trunc('{element.granularity}', {column}) AS DATE)"
+
+
+@compiles(time_bucket, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    if element.granularity == "day":
+        return f"date({column})"
+    if element.granularity == "week":
+        # Monday of the week: back 6 days, then forward to the next Monday (or same day)
+        return f"date({column}, '-6 days', 'weekday 1')"
+    return f"strftime('%Y-%m-01', {column})"
+
+
+def bucket_start(granularity: str, day: date) -> date:
+    """Python counterpart of time_bucket, for filling empty buckets."""
+    validate_granularity(granularity)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def iter_buckets(granularity: str, start_day: date, end_day: date) -> Iterator[date]:
+    """Every bucket start from the bucket containing start_day up to end_day."""
+    current = bucket_start(granularity, start_day)
+    while current <= end_day:
+        yield current
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(weeks=1)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
@@ -0,0 +1,154 @@
+"""
+Dashboard cache - Risultati widget condivisi tra tutte le dashboard aperte
+Replica Excel: il foglio viene ricalcolato una volta, tutti lo leggono
+
+- Chiavi a "bucket" temporali di DASHBOARD_CACHE_SECONDS: N dashboard che fanno
+  polling nello stesso intervallo costano un solo calcolo
+- Single-flight: richieste concorrenti sulla stessa chiave attendono lo
+  stesso calcolo invece di ripeterlo
+- Invalidazione al commit di booking, pagamenti e pacchetti (eventi ORM) e
+  tramite POST /api/dashboard/refresh
+- Backend intercambiabile (app.core.cache.CacheBackend), default LRU in-process
+"""
+import asyncio
+import copy
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import CacheBackend, InMemoryLRUCache
+from app.core.config import settings
+from app.admin.models import AdminPackageAssignment, AdminPayment
+from app.bookings.models import Booking
+from app.packages.models import PackagePurchase
+from app.payments.models import Payment
+
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY = "dashboard_cache_dirty"
+
+
+class DashboardCache:
+    """Cache risultati widget con bucket temporali e single-flight"""
+
+    PREFIX = "dashboard:"
+
+    def __init__(self, backend: Optional[CacheBackend] = None, interval_seconds: Optional[int] = None):
+        self._interval_seconds = interval_seconds
+        self.backend = backend or InMemoryLRUCache(settings.DASHBOARD_CACHE_MAX_ENTRIES)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, int], "asyncio.Future"] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def interval_seconds(self) -> int:
+        if self._interval_seconds is not None:
+            return self._interval_seconds
+        return settings.DASHBOARD_CACHE_SECONDS
+
+    def set_backend(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def add_invalidation_listener(self, callback: Callable[[], None]) -> None:
+        """Callback sincrona chiamata ad ogni invalidazione (es. stream dashboard)"""
+        self._listeners.append(callback)
+
+    def _key(self, name: str) -> str:
+        bucket = int(time.time() // self.interval_seconds)
+        return f"{self.PREFIX}{name}:{bucket}"
+
+    async def get_or_compute(self, name: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Ritorna (una copia de) il risultato del bucket corrente, calcolandolo al più una volta"""
+        key = self._key(name)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return copy.deepcopy(cached)
+
+        loop = asyncio.get_running_loop()
+        flight_key = (key, id(loop))
+        pending = self._inflight.get(flight_key)
+        if pending is not None:
+            self.hits += 1
+            return copy.deepcopy(await asyncio.shield(pending))
+
+        self.misses += 1
+        future = loop.create_future()
+        self._inflight[flight_key] = future
+        generation = self._generation
+        try:
+            result = await compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Evita "exception was never retrieved" senza waiter
+            raise
+        finally:
+            self._inflight.pop(flight_key, None)
+
+        future.set_result(result)
+        if generation == self._generation:
+            self.backend.set(key, result, self.interval_seconds)
+        return copy.deepcopy(result)
+
+    def invalidate(self) -> int:
+        """Svuota tutti i widget; i calcoli in corso non verranno salvati"""
+        with self._lock:
+            self._generation += 1
+        purged = self.backend.clear(self.PREFIX)
+        logger.debug("Dashboard cache invalidated (%s entries)", purged)
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Dashboard invalidation listener failed")
+        return purged
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "interval_seconds": self.interval_seconds,
+        }
+
+
+dashboard_cache = DashboardCache()
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+@event.listens_for(Booking, "after_delete")
+@event.listens_for(Payment, "after_insert")
+@event.listens_for(Payment, "after_update")
+@event.listens_for(Payment, "after_delete")
+@event.listens_for(AdminPayment, "after_insert")
+@event.listens_for(AdminPayment, "after_update")
+@event.listens_for(AdminPayment, "after_delete")
+@event.listens_for(PackagePurchase, "after_insert")
+@event.listens_for(PackagePurchase, "after_update")
+@event.listens_for(PackagePurchase, "after_delete")
+@event.listens_for(AdminPackageAssignment, "after_insert")
+@event.listens_for(AdminPackageAssignment, "after_update")
+@event.listens_for(AdminPackageAssignment, "after_delete")
+def _dashboard_data_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSION_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_SESSION_KEY, False):
+        dashboard_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
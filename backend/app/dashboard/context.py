@@ -0,0 +1,88 @@
+"""
+Dashboard context - Calcolo widget condiviso per una richiesta
+Replica Excel: ogni formula viene calcolata una volta per "ricalcolo" del foglio,
+anche se più celle la referenziano
+
+Un DashboardContext vive per una richiesta (o un tick di refresh) e memoizza i
+risultati dei widget: /live e gli alert riusano lo stesso risultato invece di
+rieseguire le query. Tutti i widget condividono lo stesso `now`.
+
+Con `cache` (DashboardCache) i widget vengono letti/salvati anche nella cache
+condivisa tra richieste.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+URGENT_DAYS = 2  # Pacchetti "urgenti": scadono entro 2 giorni
+
+
+class DashboardContext:
+    """Memo dei widget dashboard per la durata di una richiesta"""
+
+    def __init__(self, db: Session, now: Optional[datetime] = None, cache=None):
+        self.db = db
+        self.now = now or datetime.now()
+        self.cache = cache
+        self._results: Dict[Any, Dict[str, Any]] = {}
+        self.computed = 0
+
+    async def _memo(self, key, compute):
+        if key not in self._results:
+            if self.cache is not None:
+                name = ":".join(str(part) for part in key) if isinstance(key, tuple) else key
+                self._results[key] = await self.cache.get_or_compute(name, compute)
+            else:
+                self._results[key] = await compute()
+            self.computed += 1
+        return self._results[key]
+
+    async def today(self) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            "today", lambda: DashboardRealTimeService.get_today_live_dashboard(self.db, now=self.now)
+        )
+
+    async def expiring_packages(self, days_ahead: int = 7) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            ("expiring_packages", days_ahead),
+            lambda: DashboardRealTimeService.get_expiring_packages_widget(self.db, days_ahead)
+        )
+
+    async def urgent_packages(self) -> list:
+        """
+        Pacchetti che scadono entro URGENT_DAYS giorni.
+        Riusa un widget scadenze già calcolato con orizzonte >= URGENT_DAYS
+        (la lista "urgent" è la stessa), altrimenti calcola solo quello a 2 giorni.
+        """
+        for key, result in self._results.items():
+            if isinstance(key, tuple) and key[0] == "expiring_packages" and key[1] >= URGENT_DAYS:
+                return result["urgent_packages"]
+        return (await self.expiring_packages(URGENT_DAYS))["urgent_packages"]
+
+    async def tutor_performance(self) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            "tutor_performance", lambda: DashboardRealTimeService.get_tutor_performance_today(self.db, now=self.now)
+        )
+
+    async def weekly_trends(self, weeks_back: int = 4) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            ("weekly_trends", weeks_back),
+            lambda: DashboardRealTimeService.get_weekly_trends_widget(self.db, weeks_back)
+        )
+
+    async def subject_analytics(self) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            "subject_analytics", lambda: DashboardRealTimeService.get_subject_analytics_widget(self.db)
+        )
+
+    async def alerts(self) -> Dict[str, Any]:
+        from app.dashboard.services import DashboardRealTimeService
+        return await self._memo(
+            "alerts", lambda: DashboardRealTimeService.get_real_time_alerts(self.db, context=self)
+        )
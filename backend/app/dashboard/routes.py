@@ -2,15 +2,24 @@
 Dashboard Real-Time Routes - API endpoints per dashboard live
 Replica funzionalità Excel con aggiornamenti real-time
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+import asyncio
+import csv
+import io
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime, date
 
 from app.core.database import get_db
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_ws
+from app.core.config import settings
 from app.users.models import User, UserRole
 from app.dashboard.services import DashboardRealTimeService
+from app.dashboard.context import DashboardContext
+from app.dashboard.cache import dashboard_cache
+from app.dashboard.stream import dashboard_broadcaster, format_sse
 
 router = APIRouter(
     tags=["📊 Dashboard Real-Time"],
@@ -71,11 +80,13 @@ async def get_live_dashboard(
     """
     
     try:
-        # Raccoglie tutti i dati dashboard in parallelo
-        today_data = await DashboardRealTimeService.get_today_live_dashboard(db)
-        expiring_packages = await DashboardRealTimeService.get_expiring_packages_widget(db, days_ahead=7)
-        tutor_performance = await DashboardRealTimeService.get_tutor_performance_today(db)
-        alerts = await DashboardRealTimeService.get_real_time_alerts(db)
+        # Contesto condiviso: ogni widget viene calcolato una sola volta,
+        # gli alert riusano i risultati già disponibili
+        context = DashboardContext(db, cache=dashboard_cache)
+        today_data = await context.today()
+        expiring_packages = await context.expiring_packages(days_ahead=7)
+        tutor_performance = await context.tutor_performance()
+        alerts = await context.alerts()
         
         return {
             "dashboard_type": "live", 
@@ -98,6 +109,44 @@ async def get_live_dashboard(
         raise HTTPException(status_code=500, detail=f"Dashboard error: {str(e)}")
 
 
+@router.get("/stream")
+async def stream_live_dashboard(
+    request: Request,
+    token: str = Query(..., description="Access token (EventSource non supporta header Authorization)")
+):
+    """
+    📡 DASHBOARD STREAM - Server-Sent Events
+    
+    Alternativa al polling di /live: alla connessione invia un evento
+    `snapshot` con tutti i widget, poi eventi `delta` con i soli widget
+    cambiati dopo booking, pagamenti e modifiche pacchetti.
+    Il calcolo è condiviso tra tutti i client connessi.
+    """
+    
+    current_user = get_current_user_ws(token)
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    require_dashboard_access(current_user)
+    
+    async def events():
+        queue = dashboard_broadcaster.subscribe()
+        try:
+            yield format_sse("snapshot", await dashboard_broadcaster.current())
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            dashboard_broadcaster.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/today")
 async def get_today_summary(
     db: Session = Depends(get_db),
@@ -111,7 +160,7 @@ async def get_today_summary(
     """
     
     try:
-        today_data = await DashboardRealTimeService.get_today_live_dashboard(db)
+        today_data = await DashboardContext(db, cache=dashboard_cache).today()
         return {
             "widget": "today_summary",
             **today_data
@@ -134,7 +183,7 @@ async def get_expiring_packages(
     """
     
     try:
-        expiring_data = await DashboardRealTimeService.get_expiring_packages_widget(db, days_ahead)
+        expiring_data = await DashboardContext(db, cache=dashboard_cache).expiring_packages(days_ahead)
         return {
             "widget": "expiring_packages",
             **expiring_data
@@ -164,7 +213,7 @@ async def get_tutor_performance_today(
             if not tutor or tutor.id != tutor_id:
                 raise HTTPException(status_code=403, detail="Can only view your own performance")
         
-        performance_data = await DashboardRealTimeService.get_tutor_performance_today(db)
+        performance_data = await DashboardContext(db, cache=dashboard_cache).tutor_performance()
         
         # Filtra per tutor specifico se richiesto
         if tutor_id:
@@ -201,7 +250,7 @@ async def get_weekly_trends(
     """
     
     try:
-        trends_data = await DashboardRealTimeService.get_weekly_trends_widget(db, weeks_back)
+        trends_data = await DashboardContext(db, cache=dashboard_cache).weekly_trends(weeks_back)
         return {
             "widget": "weekly_trends",
             **trends_data
@@ -223,7 +272,7 @@ async def get_subject_analytics(
     """
     
     try:
-        subject_data = await DashboardRealTimeService.get_subject_analytics_widget(db)
+        subject_data = await DashboardContext(db, cache=dashboard_cache).subject_analytics()
         return {
             "widget": "subject_analytics",
             **subject_data
@@ -251,7 +300,7 @@ async def get_real_time_alerts(
     """
     
     try:
-        alerts_data = await DashboardRealTimeService.get_real_time_alerts(db)
+        alerts_data = await DashboardContext(db, cache=dashboard_cache).alerts()
         
         # Applica filtri se richiesti
         if alert_type or category:
@@ -360,30 +409,24 @@ async def dashboard_health_check():
 
 @router.post("/refresh")
 async def refresh_dashboard_cache(
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_dashboard_access)
 ):
     """
     🔄 REFRESH CACHE DASHBOARD
     
-    Force refresh dei dati dashboard se necessario.
+    Svuota la cache dei widget: la prossima richiesta ricalcola i dati.
     Utile per debug o dopo modifiche massive dati.
     """
     
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required for cache refresh")
     
-    # Background task per refresh
-    def refresh_cache():
-        # TODO: Implementare cache refresh logic se implementi caching
-        print(f"🔄 Dashboard cache refresh requested by {current_user.email}")
-        pass
-    
-    background_tasks.add_task(refresh_cache)
+    purged = dashboard_cache.invalidate()
     
     return {
-        "message": "Dashboard cache refresh initiated",
+        "message": "Dashboard cache refreshed",
         "requested_by": current_user.email,
+        "entries_purged": purged,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -403,14 +446,23 @@ async def export_today_data(
     
     Esporta dati dashboard per reporting esterno.
     Supporta JSON e CSV per integrazione Excel/Google Sheets.
+    Per l'elenco completo delle lezioni: GET /api/admin/export/lessons (streaming)
     """
     
     try:
         today_data = await DashboardRealTimeService.get_today_live_dashboard(db)
         
         if format == "csv":
-            # TODO: Implementare export CSV se necessario
-            raise HTTPException(status_code=501, detail="CSV export not yet implemented")
+            # Una riga per metrica: si apre direttamente in Excel/Sheets
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["metric", "value"])
+            writer.writerows(today_data.items())
+            return Response(
+                content=buffer.getvalue(),
+                media_type="text/csv; charset=utf-8",
+                headers={"Content-Disposition": f'attachment; filename="dashboard-{today_data["date"]}.csv"'}
+            )
         
         return {
             "export_format": format,
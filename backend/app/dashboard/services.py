@@ -12,6 +12,9 @@ from app.bookings.models import Booking, BookingStatus
 from app.packages.models import PackagePurchase, Package
 from app.users.models import Student, Tutor
 from app.pricing.models import PricingCalculation
+from app.dashboard.context import DashboardContext
+from app.analytics.services import AnalyticsService
+from app.core.loader_profiles import apply_profile
 
 
 class DashboardRealTimeService:
@@ -26,68 +29,95 @@ class DashboardRealTimeService:
     """
     
     @staticmethod
-    async def get_today_live_dashboard(db: Session) -> Dict[str, Any]:
+    def _day_range(day: date):
+        """Intervallo [day 00:00, day+1 00:00) su start_time (usa l'indice, a differenza di func.date)"""
+        day_start = datetime.combine(day, datetime.min.time())
+        return day_start, day_start + timedelta(days=1)
+    
+    @staticmethod
+    async def get_today_live_dashboard(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         📊 DASHBOARD OGGI - Replica Excel FILTER(TODAY())
         
         Widget principale che mostra situazione del giorno corrente
         Equivalente Excel: Tutte le formule che usano TODAY()
-        """
         
-        today = date.today()
-        now = datetime.now()
-        
-        # 📅 LEZIONI OGGI (Excel: FILTER(Bookings, DATE=TODAY()))
-        today_lessons = db.query(Booking).filter(
-            func.date(Booking.start_time) == today
-        ).all()
-        
-        # Categorizza per stato
-        lessons_by_status = {
-            "completed": [l for l in today_lessons if l.status == BookingStatus.COMPLETED],
-            "ongoing": [l for l in today_lessons if l.status == BookingStatus.CONFIRMED and l.start_time <= now <= l.end_time],
-            "upcoming": [l for l in today_lessons if l.start_time > now and l.status in [BookingStatus.PENDING, BookingStatus.CONFIRMED]], 
-            "cancelled": [l for l in today_lessons if l.status == BookingStatus.CANCELLED]
-        }
-        
-        # 💰 CALCOLI REVENUE (Excel: SUMIF(Bookings, TODAY(), Price))
-        completed_lessons = lessons_by_status["completed"]
-        today_revenue = sum(l.calculated_price or Decimal("0") for l in completed_lessons)
-        today_tutor_earnings = sum(l.tutor_earnings or Decimal("0") for l in completed_lessons)
-        today_platform_fees = sum(l.platform_fee or Decimal("0") for l in completed_lessons)
+        Una sola query aggregata (COUNTIFS/SUMIFS) sul range di start_time di oggi;
+        `now` separa lezioni in corso e prossime (default: datetime.now()).
+        """
         
-        # 👥 TUTORS ATTIVI OGGI (Excel: COUNTIF unici)
-        active_tutors_today = len(set(l.tutor_id for l in today_lessons))
-        active_students_today = len(set(l.student_id for l in today_lessons))
+        now = now or datetime.now()
+        today = now.date()
+        day_start, day_end = DashboardRealTimeService._day_range(today)
+        
+        completed = Booking.status == BookingStatus.COMPLETED
+        
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+        
+        def sum_if_completed(column):
+            return func.coalesce(func.sum(case((completed, column), else_=0)), 0)
+        
+        # 📅 LEZIONI OGGI (Excel: COUNTIFS/SUMIFS su FILTER(Bookings, DATE=TODAY()))
+        stats = db.query(
+            func.count(Booking.id).label('lessons_total'),
+            count_if(completed).label('lessons_completed'),
+            count_if(and_(
+                Booking.status == BookingStatus.CONFIRMED,
+                Booking.start_time <= now,
+                Booking.end_time >= now
+            )).label('lessons_ongoing'),
+            count_if(and_(
+                Booking.start_time > now,
+                Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
+            )).label('lessons_upcoming'),
+            count_if(Booking.status == BookingStatus.CANCELLED).label('lessons_cancelled'),
+            # 💰 CALCOLI REVENUE (Excel: SUMIF(Bookings, TODAY(), Price))
+            sum_if_completed(Booking.calculated_price).label('revenue'),
+            sum_if_completed(Booking.tutor_earnings).label('tutor_earnings'),
+            sum_if_completed(Booking.platform_fee).label('platform_fees'),
+            # ⏱️ ORE TOTALI (Excel: SUMIF durate)
+            sum_if_completed(func.coalesce(
+                func.nullif(Booking.calculated_duration, 0), Booking.duration_hours, 0
+            )).label('hours'),
+            # 👥 TUTORS/STUDENTI ATTIVI OGGI (Excel: COUNTIF unici)
+            func.count(func.distinct(Booking.tutor_id)).label('active_tutors'),
+            func.count(func.distinct(Booking.student_id)).label('active_students')
+        ).filter(
+            Booking.start_time >= day_start,
+            Booking.start_time < day_end
+        ).one()
         
-        # ⏱️ ORE TOTALI (Excel: SUMIF durate)
-        total_hours_today = sum(l.calculated_duration or l.duration_hours or 0 for l in completed_lessons)
+        lessons_total = stats.lessons_total or 0
+        lessons_completed = int(stats.lessons_completed)
+        lessons_cancelled = int(stats.lessons_cancelled)
+        today_revenue = Decimal(str(stats.revenue))
         
         return {
             "date": today.isoformat(),
             "timestamp": now.isoformat(),
             
             # Conteggi lezioni
-            "lessons_total": len(today_lessons),
-            "lessons_completed": len(lessons_by_status["completed"]),
-            "lessons_ongoing": len(lessons_by_status["ongoing"]), 
-            "lessons_upcoming": len(lessons_by_status["upcoming"]),
-            "lessons_cancelled": len(lessons_by_status["cancelled"]),
+            "lessons_total": lessons_total,
+            "lessons_completed": lessons_completed,
+            "lessons_ongoing": int(stats.lessons_ongoing),
+            "lessons_upcoming": int(stats.lessons_upcoming),
+            "lessons_cancelled": lessons_cancelled,
             
             # Metriche finanziarie
             "revenue_today": float(today_revenue),
-            "tutor_earnings_today": float(today_tutor_earnings),
-            "platform_fees_today": float(today_platform_fees),
+            "tutor_earnings_today": float(stats.tutor_earnings),
+            "platform_fees_today": float(stats.platform_fees),
             
             # Metriche operazionali
-            "active_tutors_today": active_tutors_today,
-            "active_students_today": active_students_today,
-            "total_hours_today": total_hours_today,
+            "active_tutors_today": stats.active_tutors or 0,
+            "active_students_today": stats.active_students or 0,
+            "total_hours_today": int(stats.hours),
             
             # KPI calculated
-            "avg_lesson_price": float(today_revenue / len(completed_lessons)) if completed_lessons else 0,
-            "completion_rate": round(len(lessons_by_status["completed"]) / len(today_lessons) * 100, 1) if today_lessons else 0,
-            "cancellation_rate": round(len(lessons_by_status["cancelled"]) / len(today_lessons) * 100, 1) if today_lessons else 0
+            "avg_lesson_price": float(today_revenue / lessons_completed) if lessons_completed else 0,
+            "completion_rate": round(lessons_completed / lessons_total * 100, 1) if lessons_total else 0,
+            "cancellation_rate": round(lessons_cancelled / lessons_total * 100, 1) if lessons_total else 0
         }
     
     @staticmethod
@@ -102,8 +132,8 @@ class DashboardRealTimeService:
         today = date.today()
         cutoff_date = today + timedelta(days=days_ahead)
         
-        # Query pacchetti in scadenza
-        expiring_packages = db.query(PackagePurchase).filter(
+        # Query pacchetti in scadenza (studente e pacchetto caricati nella stessa query)
+        expiring_packages = apply_profile(db.query(PackagePurchase), "purchase.student_package").filter(
             and_(
                 PackagePurchase.expiry_date <= cutoff_date,
                 PackagePurchase.expiry_date >= today,  # Non già scaduti
@@ -146,7 +176,7 @@ class DashboardRealTimeService:
         }
     
     @staticmethod
-    async def get_tutor_performance_today(db: Session) -> Dict[str, Any]:
+    async def get_tutor_performance_today(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         👨‍🏫 PERFORMANCE TUTOR OGGI - Replica Excel COUNTIFS per tutor
         
@@ -154,7 +184,8 @@ class DashboardRealTimeService:
         Equivalente Excel: COUNTIFS(Bookings, TUTOR=X, DATE=TODAY())
         """
         
-        today = date.today()
+        today = (now or datetime.now()).date()
+        day_start, day_end = DashboardRealTimeService._day_range(today)
         
         # Query performance tutor oggi
         tutor_stats = db.query(
@@ -179,7 +210,8 @@ class DashboardRealTimeService:
                 else_=0
             )).label('hours_taught')
         ).join(Booking).filter(
-            func.date(Booking.start_time) == today
+            Booking.start_time >= day_start,
+            Booking.start_time < day_end
         ).group_by(Tutor.id, Tutor.first_name, Tutor.last_name).all()
         
         # Formatta risultati
@@ -229,39 +261,20 @@ class DashboardRealTimeService:
         today = date.today()
         start_date = today - timedelta(weeks=weeks_back)
         
-        # Query per trend settimanali
-        weekly_data = db.query(
-            func.date_trunc('week', Booking.start_time).label('week_start'),
-            func.count(Booking.id).label('total_bookings'),
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, 1),
-                else_=0
-            )).label('completed_bookings'),
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, Booking.calculated_price),
-                else_=0
-            )).label('weekly_revenue'),
-            func.count(func.distinct(Booking.tutor_id)).label('active_tutors'),
-            func.count(func.distinct(Booking.student_id)).label('active_students')
-        ).filter(
-            Booking.start_time >= start_date
-        ).group_by(
-            func.date_trunc('week', Booking.start_time)
-        ).order_by(
-            func.date_trunc('week', Booking.start_time)
-        ).all()
+        # Trend settimanali dai rollup giornalieri, bucket "week" portabile (Postgres/SQLite)
+        weekly_data = await AnalyticsService.booking_trends(db, "week", start_date, with_students=True)
         
         # Formatta dati per grafici
         weeks = []
         for week_data in weekly_data:
             week_info = {
-                "week_start": week_data.week_start.date().isoformat(),
-                "total_bookings": week_data.total_bookings or 0,
-                "completed_bookings": week_data.completed_bookings or 0,
-                "weekly_revenue": float(week_data.weekly_revenue or 0),
-                "active_tutors": week_data.active_tutors or 0,
-                "active_students": week_data.active_students or 0,
-                "completion_rate": round((week_data.completed_bookings / week_data.total_bookings * 100) if week_data.total_bookings else 0, 1)
+                "week_start": week_data["bucket"].isoformat(),
+                "total_bookings": week_data["total_bookings"],
+                "completed_bookings": week_data["completed_bookings"],
+                "weekly_revenue": float(week_data["revenue"]),
+                "active_tutors": week_data["active_tutors"],
+                "active_students": week_data["active_students"],
+                "completion_rate": round((week_data["completed_bookings"] / week_data["total_bookings"] * 100) if week_data["total_bookings"] else 0, 1)
             }
             weeks.append(week_info)
         
@@ -308,51 +321,25 @@ class DashboardRealTimeService:
         # Timeframe: ultimi 30 giorni
         thirty_days_ago = datetime.now() - timedelta(days=30)
         
-        # Query analytics per materia
-        subject_stats = db.query(
-            Booking.subject,
-            func.count(Booking.id).label('total_bookings'),
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, 1),
-                else_=0
-            )).label('completed_bookings'),
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, Booking.calculated_price),
-                else_=0
-            )).label('total_revenue'),
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, Booking.calculated_duration),
-                else_=0  
-            )).label('total_hours'),
-            func.count(func.distinct(Booking.tutor_id)).label('tutors_count'),
-            func.count(func.distinct(Booking.student_id)).label('students_count')
-        ).filter(
-            Booking.start_time >= thirty_days_ago
-        ).group_by(
-            Booking.subject
-        ).order_by(
-            func.sum(case(
-                (Booking.status == BookingStatus.COMPLETED, Booking.calculated_price),
-                else_=0
-            )).desc()
-        ).all()
+        # Analytics per materia dai rollup giornalieri
+        subject_stats = await AnalyticsService.subject_stats(db, thirty_days_ago.date())
         
         # Formatta risultati
         subject_analytics = []
-        total_revenue_all = sum(float(stat.total_revenue or 0) for stat in subject_stats)
+        total_revenue_all = sum(float(stat["total_revenue"]) for stat in subject_stats)
         
         for stat in subject_stats:
-            subject_revenue = float(stat.total_revenue or 0)
+            subject_revenue = float(stat["total_revenue"])
             subject_data = {
-                "subject": stat.subject,
-                "total_bookings": stat.total_bookings or 0,
-                "completed_bookings": stat.completed_bookings or 0,
+                "subject": stat["subject"],
+                "total_bookings": stat["total_bookings"],
+                "completed_bookings": stat["completed_bookings"],
                 "total_revenue": subject_revenue,
-                "total_hours": stat.total_hours or 0,
-                "tutors_available": stat.tutors_count or 0,
-                "students_enrolled": stat.students_count or 0,
-                "completion_rate": round((stat.completed_bookings / stat.total_bookings * 100) if stat.total_bookings else 0, 1),
-                "avg_price_per_hour": round((subject_revenue / stat.total_hours) if stat.total_hours else 0, 2),
+                "total_hours": stat["total_hours"],
+                "tutors_available": stat["tutors_count"],
+                "students_enrolled": stat["students_count"],
+                "completion_rate": round((stat["completed_bookings"] / stat["total_bookings"] * 100) if stat["total_bookings"] else 0, 1),
+                "avg_price_per_hour": round((subject_revenue / stat["total_hours"]) if stat["total_hours"] else 0, 2),
                 "revenue_share": round((subject_revenue / total_revenue_all * 100) if total_revenue_all else 0, 1)
             }
             subject_analytics.append(subject_data)
@@ -367,7 +354,7 @@ class DashboardRealTimeService:
         }
     
     @staticmethod
-    async def get_real_time_alerts(db: Session) -> Dict[str, Any]:
+    async def get_real_time_alerts(db: Session, context: Optional[DashboardContext] = None) -> Dict[str, Any]:
         """
         🚨 ALERT REAL-TIME - Sistema notifiche intelligenti
         
@@ -376,28 +363,31 @@ class DashboardRealTimeService:
         - Tutors sovraccarichi
         - Revenue sotto soglia  
         - Anomalie sistema
+        
+        Con un DashboardContext condiviso riusa i widget già calcolati
+        nella stessa richiesta invece di rieseguire le query.
         """
         
+        context = context or DashboardContext(db)
         alerts = []
-        today = date.today()
         
         # Alert 1: Pacchetti scadenza urgente (<2 giorni)
-        urgent_packages = await DashboardRealTimeService.get_expiring_packages_widget(db, days_ahead=2)
-        if urgent_packages["urgent_count"] > 0:
+        urgent_packages = await context.urgent_packages()
+        if urgent_packages:
             alerts.append({
                 "type": "urgent",
                 "category": "packages",
-                "title": f"{urgent_packages['urgent_count']} pacchetti scadono entro 2 giorni",
+                "title": f"{len(urgent_packages)} pacchetti scadono entro 2 giorni",
                 "description": "Contattare studenti per rinnovo",
                 "action_required": True,
-                "data": urgent_packages["urgent_packages"]
+                "data": urgent_packages
             })
         
         # Alert 2: Revenue giornaliero sotto soglia
-        today_dashboard = await DashboardRealTimeService.get_today_live_dashboard(db)
+        today_dashboard = await context.today()
         daily_target = 500.0  # €500 target giornaliero
         
-        if today_dashboard["revenue_today"] < daily_target and datetime.now().hour > 18:
+        if today_dashboard["revenue_today"] < daily_target and context.now.hour > 18:
             alerts.append({
                 "type": "warning", 
                 "category": "revenue",
@@ -408,7 +398,7 @@ class DashboardRealTimeService:
             })
         
         # Alert 3: Tutors con troppe lezioni oggi
-        tutor_performance = await DashboardRealTimeService.get_tutor_performance_today(db)
+        tutor_performance = await context.tutor_performance()
         overloaded_tutors = [t for t in tutor_performance["tutor_performance"] if t["lessons_scheduled"] > 6]
         
         if overloaded_tutors:
@@ -0,0 +1,189 @@
+"""
+Dashboard stream - Push dei widget live via Server-Sent Events
+Sostituisce il polling ogni 30 secondi di /api/dashboard/live
+
+- Un solo task in background, attivo solo finché c'è almeno un subscriber:
+  le dashboard chiuse non costano nulla
+- Ad ogni modifica (commit di booking/pagamenti/pacchetti, vedi
+  DashboardCache) i widget vengono ricalcolati UNA volta e ai subscriber
+  vengono inviati solo quelli cambiati (delta)
+- Tick di sicurezza ogni DASHBOARD_STREAM_TICK_SECONDS per i dati che
+  cambiano col tempo (lezioni in corso / prossime)
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.dashboard.cache import DashboardCache, dashboard_cache
+from app.dashboard.context import DashboardContext
+
+logger = logging.getLogger(__name__)
+
+# Chiavi che cambiano ad ogni calcolo: ignorate nel confronto per i delta
+VOLATILE_KEYS = ("timestamp", "generated_at")
+
+
+def _comparable(widget: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in widget.items() if key not in VOLATILE_KEYS}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class DashboardBroadcaster:
+    """Calcola i widget una volta per modifica e li distribuisce ai subscriber"""
+
+    def __init__(
+        self,
+        cache: Optional[DashboardCache] = None,
+        session_factory: Optional[Callable] = None,
+        debounce_seconds: Optional[float] = None,
+        tick_seconds: Optional[float] = None,
+        queue_size: int = 16
+    ):
+        self._cache = cache or dashboard_cache
+        self._session_factory = session_factory
+        self._debounce_seconds = debounce_seconds
+        self._tick_seconds = tick_seconds
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self.computations = 0
+
+        self._cache.add_invalidation_listener(self.notify_changed)
+
+    @property
+    def debounce_seconds(self) -> float:
+        if self._debounce_seconds is not None:
+            return self._debounce_seconds
+        return settings.DASHBOARD_STREAM_DEBOUNCE_SECONDS
+
+    @property
+    def tick_seconds(self) -> float:
+        if self._tick_seconds is not None:
+            return self._tick_seconds
+        return settings.DASHBOARD_STREAM_TICK_SECONDS
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    def subscribe(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Nuovo event loop (avvio o test): riparte da zero
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._task = None
+            self._last = {}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._last = {}
+
+    def notify_changed(self) -> None:
+        """Chiamato all'invalidazione della cache (anche da thread del threadpool)"""
+        loop, changed = self._loop, self._changed
+        if not self._subscribers or loop is None or changed is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            changed.set()
+        else:
+            loop.call_soon_threadsafe(changed.set)
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    async def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Widget correnti (letti dalla cache condivisa se già calcolati)"""
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+
+        db = session_factory()
+        try:
+            context = DashboardContext(db, cache=self._cache)
+            widgets = {
+                "today": await context.today(),
+                "expiring_packages": await context.expiring_packages(days_ahead=7),
+                "tutor_performance": await context.tutor_performance(),
+                "alerts": await context.alerts(),
+            }
+        finally:
+            db.close()
+        self.computations += 1
+        return widgets
+
+    async def current(self) -> Dict[str, Dict[str, Any]]:
+        """Stato completo per un nuovo subscriber"""
+        return self._last or await self.snapshot()
+
+    def _publish(self, event: str, data: Dict[str, Any]) -> None:
+        message = format_sse(event, data)
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Client lento: scarta il messaggio più vecchio, il delta successivo lo riallinea
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+    async def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Ricalcola e pubblica solo i widget cambiati dall'ultimo invio"""
+        widgets = await self.snapshot()
+        delta = {
+            name: widget for name, widget in widgets.items()
+            if name not in self._last or _comparable(self._last[name]) != _comparable(widget)
+        }
+        self._last = widgets
+        if delta:
+            self._publish("delta", delta)
+        return delta
+
+    async def _run(self) -> None:
+        changed = self._changed
+        try:
+            if not self._last:
+                self._last = await self.snapshot()
+            while self._subscribers:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=self.tick_seconds)
+                    # Raggruppa raffiche di commit in un solo ricalcolo
+                    await asyncio.sleep(self.debounce_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("Dashboard stream refresh failed")
+        except asyncio.CancelledError:
+            pass
+
+
+dashboard_broadcaster = DashboardBroadcaster()
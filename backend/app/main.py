@@ -69,6 +69,9 @@ from app.contact.routes import router as contact_router  # 🆕 CONTACT ROUTER
 from app.notifications.routes import router as notifications_router  # 🆕 NOTIFICATIONS ROUTER
 from app.core.config import settings
 from app.utils.seed import seed_users
+from app.pricing.audit_log import pricing_audit_log
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.listing import COUNT_MODE_HEADER, TOTAL_COUNT_HEADER
 
 # CORS middleware
 app.add_middleware(
@@ -77,6 +80,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, COUNT_MODE_HEADER],
 )
 
 # Static files
@@ -115,3 +119,8 @@ def startup_seed():
             seed_users(db)
         finally:
             db.close()
+
+@app.on_event("shutdown")
+def shutdown_flush_pricing_audit():
+    # Salva i log pricing ancora in coda prima di chiudere
+    pricing_audit_log.shutdown()
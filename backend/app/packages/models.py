@@ -1,7 +1,7 @@
 """
 Packages models for tutoring platform
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Numeric, Date, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Numeric, Date, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -44,6 +44,10 @@ class PackagePurchase(Base):
     student = relationship("Student", back_populates="package_purchases")
     package = relationship("Package", back_populates="purchases")
     bookings = relationship("Booking", back_populates="package_purchase")
+    
+    __table_args__ = (
+        Index("ix_package_purchases_student_active_expiry", "student_id", "is_active", "expiry_date"),
+    )
 
 
 class PackageResourceLink(Base):
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.packages import models, schemas
 from app.users.models import Tutor
+from app.core.loader_profiles import apply_profile
 from typing import List, Optional
 from datetime import datetime, date
 
@@ -29,8 +30,8 @@ class PackageRequestService:
     
     @staticmethod
     async def get_pending_requests(db: Session) -> List[models.PackageRequest]:
-        """Get all pending package requests"""
-        return db.query(models.PackageRequest).filter(
+        """Get all pending package requests, with tutor and tutor user loaded"""
+        return apply_profile(db.query(models.PackageRequest), "package_request.tutor_user").filter(
             models.PackageRequest.status == models.PackageRequestStatus.PENDING
         ).order_by(models.PackageRequest.created_at.desc()).all()
     
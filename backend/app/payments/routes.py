@@ -1,10 +1,11 @@
 """
 Payments routes
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import InvalidCursor, with_next_cursor
 from app.auth.dependencies import get_current_user
 from app.users.models import User
 from app.users.models import UserRole
@@ -16,26 +17,36 @@ ADMIN_REQUIRED = "Admin access required"
 
 @router.get("/", response_model=List[schemas.Payment], tags=["Payments"])
 async def list_payments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail=ADMIN_REQUIRED)
-    return await services.PaymentService.list(db, skip, limit)
+    try:
+        return with_next_cursor(response, await services.PaymentService.list(db, skip, limit, cursor))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Support path without trailing slash to avoid redirect issues
 @router.get("", response_model=List[schemas.Payment], tags=["Payments"], include_in_schema=False)
 async def list_payments_no_slash(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail=ADMIN_REQUIRED)
-    return await services.PaymentService.list(db, skip, limit)
+    try:
+        return with_next_cursor(response, await services.PaymentService.list(db, skip, limit, cursor))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/", response_model=schemas.Payment, tags=["Payments"])
@@ -2,8 +2,9 @@
 Payment services
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from app.payments import models, schemas
+from app.core.pagination import Page, paginate
 
 
 class PaymentService:
@@ -24,8 +25,11 @@ class PaymentService:
         return payment
 
     @staticmethod
-    async def list(db: Session, skip: int = 0, limit: int = 100) -> List[models.Payment]:
-        return db.query(models.Payment).order_by(models.Payment.created_at.desc()).offset(skip).limit(limit).all()
+    async def list(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        return paginate(
+            db.query(models.Payment), (models.Payment.created_at, models.Payment.id), limit,
+            skip=skip, cursor=cursor, descending=True
+        )
 
     @staticmethod
     async def get_by_id(db: Session, payment_id: int) -> Optional[models.Payment]:
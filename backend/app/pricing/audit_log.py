@@ -0,0 +1,206 @@
+"""
+Pricing audit log writer - Log calcoli differito e in batch
+
+I record PricingCalculation non vengono più scritti con commit sincrono nel
+percorso della richiesta: finiscono in una coda limitata e un thread in
+background li salva con un bulk insert quando si raggiunge
+PRICING_AUDIT_BATCH_SIZE record o sono passati PRICING_AUDIT_FLUSH_SECONDS.
+
+- Ogni record è scritto sull'engine della sessione che l'ha accodato
+  (`bind`), non necessariamente su quello di settings.DATABASE_URL
+- Coda piena: il record viene scartato e conteggiato in `dropped`
+- Shutdown: `shutdown()` svuota la coda prima di fermare il thread
+- `stats()` espone i contatori per monitoring
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.pricing.models import PricingCalculation
+
+logger = logging.getLogger(__name__)
+
+
+class PricingAuditLogWriter:
+    """Writer asincrono (thread) per la tabella pricing_calculations"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        max_queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None
+    ):
+        self._session_factory = session_factory
+        self._batch_size = batch_size or settings.PRICING_AUDIT_BATCH_SIZE
+        self._flush_seconds = flush_seconds or settings.PRICING_AUDIT_FLUSH_SECONDS
+        self._queue: "queue.Queue[Tuple[Any, Dict[str, Any]]]" = queue.Queue(
+            maxsize=max_queue_size or settings.PRICING_AUDIT_QUEUE_SIZE
+        )
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    def submit(self, record: Dict[str, Any], bind=None) -> bool:
+        """
+        Accoda un record da scrivere su `bind` (engine/connection della sessione
+        chiamante; None = session_factory di default). False se la coda è piena.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((bind, record))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Pricing audit queue full, dropping calculation record")
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Svuota la coda in modo sincrono (shutdown, test, script)"""
+        written = 0
+        while True:
+            batch = self._drain(self._batch_size)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Ferma il thread e salva i record rimasti"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+        with self._lock:
+            self._thread = None
+            self._stop = threading.Event()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pricing-audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        stop = self._stop
+        while not stop.is_set():
+            batch: List[Tuple[Any, Dict[str, Any]]] = []
+            deadline = time.monotonic() + self._flush_seconds
+            while len(batch) < self._batch_size and not stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+            if batch:
+                self._write(batch)
+
+    def _drain(self, limit: int) -> List[Tuple[Any, Dict[str, Any]]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Un bulk insert per bind; ritorna il numero di record scritti"""
+        by_bind: Dict[Any, List[Dict[str, Any]]] = {}
+        for bind, record in batch:
+            by_bind.setdefault(bind, []).append(record)
+
+        written = 0
+        for bind, records in by_bind.items():
+            written += self._write_records(bind, records)
+        return written
+
+    def _session(self, bind):
+        if bind is not None:
+            return Session(bind=bind)
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+        return session_factory()
+
+    def _write_records(self, bind, records: List[Dict[str, Any]]) -> int:
+        with self._flush_lock:
+            db = self._session(bind)
+            try:
+                db.execute(insert(PricingCalculation), records)
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    self.failed += len(records)
+                logger.exception("Failed to write %s pricing audit records", len(records))
+                return 0
+            finally:
+                db.close()
+
+        with self._lock:
+            self.written += len(records)
+            self.flushes += 1
+        return len(records)
+
+
+pricing_audit_log = PricingAuditLogWriter()
+
+
+def build_calculation_record(calculation_result: dict, applied_rule=None, applied_override=None) -> Dict[str, Any]:
+    """Converte il risultato di calculate_lesson_price in una riga pricing_calculations"""
+    return {
+        "lesson_type": calculation_result["lesson_type"],
+        "subject": calculation_result["subject"],
+        "duration_hours": calculation_result["duration_hours"],
+        "tutor_id": calculation_result["tutor_id"],
+        "applied_pricing_rule_id": applied_rule.id if applied_rule else None,
+        "applied_override_id": applied_override.id if applied_override else None,
+        "base_price_per_hour": Decimal(str(calculation_result["base_price_per_hour"])),
+        "total_base_price": Decimal(str(calculation_result["total_base_price"])),
+        "volume_discount_rate": Decimal(str(calculation_result["volume_discount_rate"])),
+        "final_total_price": Decimal(str(calculation_result["final_total_price"])),
+        "tutor_earnings": Decimal(str(calculation_result["tutor_earnings"])),
+        "platform_fee": Decimal(str(calculation_result["platform_fee"])),
+        "tutor_percentage_applied": Decimal(str(calculation_result["tutor_percentage"])),
+        "calculation_timestamp": datetime.utcnow(),
+    }
@@ -2,7 +2,7 @@
 Pricing models - Sistema tariffario intelligente
 Replica la logica Excel con flessibilità enterprise
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric, Text, JSON, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Numeric, Text, JSON, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -55,6 +55,11 @@ class PricingRule(Base):
     
     # Relationships
     tutor_overrides = relationship("TutorPricingOverride", back_populates="pricing_rule")
+    
+    # Lookup regola per (tipo lezione, materia) tra le attive
+    __table_args__ = (
+        Index("ix_pricing_rules_lookup", "lesson_type", "subject", "is_active"),
+    )
 
     def __repr__(self):
         return f"<PricingRule {self.name}: €{self.base_price_per_hour}/h ({self.tutor_percentage*100}% tutor)>"
@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.auth.dependencies import get_current_user
 from app.users.models import User, UserRole
 from app.pricing import models, schemas, services
+from app.pricing.rule_table import pricing_table
 
 
 router = APIRouter(tags=["Pricing"])
@@ -75,6 +76,44 @@ async def preview_lesson_price(
         raise HTTPException(status_code=500, detail=f"Preview error: {str(e)}")
 
 
+@router.post("/quotes/batch", response_model=schemas.PricingQuoteBatchResponse)
+async def quote_lesson_prices_batch(
+    batch_request: schemas.PricingQuoteBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    📋 QUOTAZIONE BATCH - Matrice prezzi in una sola richiesta
+    
+    Calcola molte combinazioni tipologia/materia/durata/tutor sullo stesso
+    snapshot tariffario, senza log. I risultati seguono l'ordine delle quote
+    richieste; una quota non valida riporta il suo errore senza bloccare le altre.
+    """
+    try:
+        items = await services.PricingService.quote_many(
+            db,
+            [
+                {
+                    "lesson_type": quote.lesson_type.value,
+                    "subject": quote.subject,
+                    "duration_hours": quote.duration_hours,
+                    "tutor_id": quote.tutor_id,
+                }
+                for quote in batch_request.quotes
+            ]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quote error: {str(e)}")
+    
+    succeeded = sum(1 for item in items if item["success"])
+    return schemas.PricingQuoteBatchResponse(
+        total=len(items),
+        succeeded=succeeded,
+        failed=len(items) - succeeded,
+        items=items
+    )
+
+
 # ================================
 # PRICING RULES MANAGEMENT
 # ================================
@@ -165,6 +204,7 @@ async def create_pricing_rule(
         
         db.add(new_rule)
         db.commit()
+        pricing_table.invalidate()
         db.refresh(new_rule)
         
         return new_rule
@@ -225,6 +265,7 @@ async def update_pricing_rule(
         
         rule.updated_at = models.datetime.utcnow()
         db.commit()
+        pricing_table.invalidate()
         db.refresh(rule)
         
         return rule
@@ -254,6 +295,7 @@ async def delete_pricing_rule(
         rule.is_active = False
         rule.updated_at = models.datetime.utcnow()
         db.commit()
+        pricing_table.invalidate()
     
     except Exception as e:
         db.rollback()
@@ -355,6 +397,7 @@ async def create_tutor_override(
         
         db.add(new_override)
         db.commit()
+        pricing_table.invalidate()
         db.refresh(new_override)
         
         return new_override
@@ -417,6 +460,7 @@ async def create_bulk_pricing_rules(
                 errors.append(f"Rule {i+1}: {str(e)}")
         
         db.commit()
+        pricing_table.invalidate()
         
         return schemas.BulkPricingRuleResponse(
             created_count=len(created_ids),
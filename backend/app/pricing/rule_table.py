@@ -0,0 +1,224 @@
+"""
+Pricing rule table - Tariffario compilato in memoria
+Replica Excel: la tabella tariffe viene "caricata" una volta e le XLOOKUP
+diventano lookup su dizionari, senza query per ogni calcolo
+
+- Regole indicizzate per (lesson_type, subject), ordinate per priorità
+- Soglie sconto volume già parse e ordinate (dalla più alta)
+- Override tutor in una mappa per tutor; la validità temporale
+  (valid_from/valid_until) è verificata al momento del lookup
+
+Lo snapshot è immutabile: una rebuild ne crea uno nuovo e sostituisce il
+riferimento. Viene invalidato dalle route CRUD pricing, dal commit di
+modifiche ORM a regole/override e comunque dopo PRICING_TABLE_TTL_SECONDS.
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.pricing import models
+from app.pricing.models import LessonType
+
+_SESSION_KEY = "pricing_table_dirty"
+
+
+def parse_volume_discounts(volume_discounts: Optional[dict]) -> Tuple[Tuple[int, Decimal], ...]:
+    """
+    Soglie sconto ordinate dalla più alta alla più bassa.
+    Accetta chiavi "4" e "4_hours" (formato documentato sul modello).
+    """
+    if not volume_discounts:
+        return ()
+    thresholds = []
+    for key, rate in volume_discounts.items():
+        match = re.match(r"\s*(\d+)", str(key))
+        if not match:
+            raise ValueError(f"Invalid volume discount threshold: {key}")
+        thresholds.append((int(match.group(1)), Decimal(str(rate))))
+    thresholds.sort(key=lambda x: x[0], reverse=True)
+    return tuple(thresholds)
+
+
+class CompiledRule:
+    """Copia read-only di una PricingRule attiva"""
+
+    __slots__ = (
+        "id", "name", "lesson_type", "subject", "min_duration", "max_duration",
+        "base_price_per_hour", "tutor_percentage", "priority", "volume_discounts"
+    )
+
+    def __init__(self, rule: models.PricingRule):
+        self.id = rule.id
+        self.name = rule.name
+        self.lesson_type = rule.lesson_type
+        self.subject = rule.subject
+        self.min_duration = rule.min_duration
+        self.max_duration = rule.max_duration
+        self.base_price_per_hour = rule.base_price_per_hour
+        self.tutor_percentage = rule.tutor_percentage
+        self.priority = rule.priority if rule.priority is not None else 100
+        self.volume_discounts = parse_volume_discounts(rule.volume_discounts)
+
+    def matches_duration(self, duration_hours: int) -> bool:
+        if self.min_duration is None or self.min_duration > duration_hours:
+            return False
+        return self.max_duration is None or self.max_duration >= duration_hours
+
+    def volume_discount_rate(self, duration_hours: int) -> Decimal:
+        for threshold_hours, discount_rate in self.volume_discounts:
+            if duration_hours >= threshold_hours:
+                return discount_rate
+        return Decimal('0.0000')
+
+
+class CompiledOverride:
+    """Copia read-only di un TutorPricingOverride attivo (con la sua regola)"""
+
+    __slots__ = (
+        "id", "tutor_id", "pricing_rule", "custom_price_per_hour",
+        "custom_tutor_percentage", "valid_from", "valid_until"
+    )
+
+    def __init__(self, override: models.TutorPricingOverride, rule: CompiledRule):
+        self.id = override.id
+        self.tutor_id = override.tutor_id
+        self.pricing_rule = rule
+        self.custom_price_per_hour = override.custom_price_per_hour
+        self.custom_tutor_percentage = override.custom_tutor_percentage
+        self.valid_from = override.valid_from
+        self.valid_until = override.valid_until
+
+    def is_valid_at(self, now: datetime) -> bool:
+        if self.valid_from is not None and self.valid_from > now:
+            return False
+        return self.valid_until is None or self.valid_until >= now
+
+
+class PricingRuleTable:
+    """Snapshot immutabile di regole e override attivi"""
+
+    def __init__(self, rules: List[models.PricingRule], overrides: List[models.TutorPricingOverride]):
+        self.built_at = time.monotonic()
+        self.rules: Dict[Tuple[LessonType, str], List[CompiledRule]] = {}
+        self.overrides: Dict[int, List[CompiledOverride]] = {}
+
+        compiled_by_id: Dict[int, CompiledRule] = {}
+        for rule in rules:
+            compiled = CompiledRule(rule)
+            compiled_by_id[compiled.id] = compiled
+            self.rules.setdefault((compiled.lesson_type, compiled.subject), []).append(compiled)
+        for bucket in self.rules.values():
+            bucket.sort(key=lambda r: (r.priority, r.id))
+
+        for override in overrides:
+            rule = compiled_by_id.get(override.pricing_rule_id)
+            if rule is None:
+                continue  # Regola non attiva: l'override non si applica
+            self.overrides.setdefault(override.tutor_id, []).append(CompiledOverride(override, rule))
+        for bucket in self.overrides.values():
+            bucket.sort(key=lambda o: (o.pricing_rule.priority, o.pricing_rule.id, o.id))
+
+    @classmethod
+    def load(cls, db: Session) -> "PricingRuleTable":
+        rules = db.query(models.PricingRule).filter(models.PricingRule.is_active == True).all()
+        overrides = db.query(models.TutorPricingOverride).filter(
+            models.TutorPricingOverride.is_active == True
+        ).all()
+        return cls(rules, overrides)
+
+    def find_rule(self, lesson_type: LessonType, subject: str, duration_hours: int) -> Optional[CompiledRule]:
+        for rule in self.rules.get((lesson_type, subject), ()):
+            if rule.matches_duration(duration_hours):
+                return rule
+        return None
+
+    def find_override(
+        self,
+        tutor_id: int,
+        lesson_type: LessonType,
+        subject: str,
+        duration_hours: int,
+        now: Optional[datetime] = None
+    ) -> Optional[CompiledOverride]:
+        now = now or datetime.utcnow()
+        for override in self.overrides.get(tutor_id, ()):
+            rule = override.pricing_rule
+            if (
+                rule.lesson_type == lesson_type
+                and rule.subject == subject
+                and rule.matches_duration(duration_hours)
+                and override.is_valid_at(now)
+            ):
+                return override
+        return None
+
+
+class PricingTableCache:
+    """Holder thread-safe dello snapshot corrente"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self._ttl_seconds = ttl_seconds
+        self._table: Optional[PricingRuleTable] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @property
+    def ttl_seconds(self) -> int:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.PRICING_TABLE_TTL_SECONDS
+
+    def get(self, db: Session) -> PricingRuleTable:
+        table = self._table
+        if table is not None and time.monotonic() - table.built_at < self.ttl_seconds:
+            return table
+        with self._lock:
+            table = self._table
+            if table is None or time.monotonic() - table.built_at >= self.ttl_seconds:
+                generation = self._generation
+                table = PricingRuleTable.load(db)
+                self.builds += 1
+                # Un commit è arrivato durante il caricamento: la tabella letta vale
+                # per questa richiesta ma non viene messa in cache
+                if self._generation == generation:
+                    self._table = table
+        return table
+
+    def invalidate(self) -> None:
+        """Scarta lo snapshot; i caricamenti in corso non verranno salvati"""
+        self._generation += 1
+        self._table = None
+
+
+pricing_table = PricingTableCache()
+
+
+@event.listens_for(models.PricingRule, "after_insert")
+@event.listens_for(models.PricingRule, "after_update")
+@event.listens_for(models.PricingRule, "after_delete")
+@event.listens_for(models.TutorPricingOverride, "after_insert")
+@event.listens_for(models.TutorPricingOverride, "after_update")
+@event.listens_for(models.TutorPricingOverride, "after_delete")
+def _pricing_data_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSION_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_SESSION_KEY, False):
+        pricing_table.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
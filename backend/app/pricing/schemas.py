@@ -161,6 +161,24 @@ class PricingPreviewRequest(BaseModel):
     duration_hours: int = Field(..., ge=1, le=24)
     tutor_id: int = Field(..., gt=0)
 
+class PricingQuoteBatchRequest(BaseModel):
+    """Schema per quotazione batch (matrice prezzi)"""
+    quotes: List[PricingPreviewRequest] = Field(..., min_length=1, max_length=500, description="Quote da calcolare")
+
+class PricingQuoteResult(BaseModel):
+    """Esito di una singola quota, nella stessa posizione della richiesta"""
+    index: int
+    success: bool
+    result: Optional[PricingCalculationResponse] = None
+    error: Optional[str] = None
+
+class PricingQuoteBatchResponse(BaseModel):
+    """Schema response quotazione batch"""
+    total: int
+    succeeded: int
+    failed: int
+    items: List[PricingQuoteResult]
+
 
 # ================================
 # LIST/FILTER SCHEMAS
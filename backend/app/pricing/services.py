@@ -3,13 +3,15 @@ Pricing services - Business logic per calcoli tariffari
 Replica Excel XLOOKUP + VLOOKUP + formule automatiche
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List, Sequence
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime
 
 from app.pricing import models
 from app.pricing.models import LessonType
+from app.pricing.rule_table import PricingRuleTable, pricing_table
+from app.pricing.audit_log import pricing_audit_log, build_calculation_record
+from app.core.config import settings
 from app.users.models import Tutor
 
 
@@ -26,7 +28,10 @@ class PricingService:
         duration_hours: int,
         tutor_id: int,
         db: Session,
-        log_calculation: bool = True
+        log_calculation: bool = True,
+        commit: bool = True,
+        table: Optional[PricingRuleTable] = None,
+        deferred_log: Optional[bool] = None
     ) -> Dict:
         """
         🎯 REPLICA EXCEL XLOOKUP: Calcola prezzo automatico
@@ -37,6 +42,9 @@ class PricingService:
         3. Applica sconti volume
         4. Calcola split tutor/piattaforma
         
+        I lookup avvengono sul tariffario compilato in memoria
+        (app.pricing.rule_table): nessuna query quando lo snapshot è caldo.
+        
         Args:
             lesson_type: "doposcuola", "individuale", etc
             subject: "Matematica", "Inglese", etc
@@ -44,6 +52,11 @@ class PricingService:
             tutor_id: ID del tutor
             db: Database session
             log_calculation: Se salvare il log del calcolo
+            commit: Se False il log viene solo aggiunto alla sessione
+                (lo salva il commit della transazione chiamante)
+            table: Snapshot tariffario da usare (default: quello corrente)
+            deferred_log: False = log nella sessione corrente invece che nel
+                writer in batch (default: PRICING_AUDIT_DEFERRED)
             
         Returns:
             Dict con tutti i dettagli del calcolo
@@ -55,9 +68,11 @@ class PricingService:
         except ValueError:
             raise ValueError(f"Invalid lesson_type: {lesson_type}. Valid: {[e.value for e in LessonType]}")
         
+        table = table or pricing_table.get(db)
+        
         # 🔍 STEP 1: Cerca override specifico per questo tutor (priorità massima)
-        tutor_override = await PricingService._find_tutor_override(
-            db, tutor_id, lesson_type_enum, subject, duration_hours
+        tutor_override = table.find_override(
+            tutor_id, lesson_type_enum, subject, duration_hours, datetime.utcnow()
         )
         
         applied_rule = None
@@ -81,9 +96,7 @@ class PricingService:
             
         else:
             # 🔍 STEP 2: Cerca regola generale (XLOOKUP fallback)
-            pricing_rule = await PricingService._find_pricing_rule(
-                db, lesson_type_enum, subject, duration_hours
-            )
+            pricing_rule = table.find_rule(lesson_type_enum, subject, duration_hours)
             
             if not pricing_rule:
                 raise ValueError(
@@ -100,9 +113,7 @@ class PricingService:
         # 📊 STEP 4: Applica sconti volume (come Excel nested IF)
         volume_discount_rate = Decimal('0.0000')
         if applied_rule and applied_rule.volume_discounts:
-            volume_discount_rate = PricingService._calculate_volume_discount(
-                duration_hours, applied_rule.volume_discounts
-            )
+            volume_discount_rate = applied_rule.volume_discount_rate(duration_hours)
         
         # Prezzo finale dopo sconto
         discount_amount = total_base_price * volume_discount_rate
@@ -150,133 +161,78 @@ class PricingService:
         
         # 🗂️ STEP 7: Log per audit (opzionale)
         if log_calculation:
-            await PricingService._log_calculation(db, calculation_result, applied_rule, applied_override)
-        
-        return calculation_result
-    
-    @staticmethod
-    async def _find_tutor_override(
-        db: Session, 
-        tutor_id: int, 
-        lesson_type_enum: LessonType, 
-        subject: str, 
-        duration_hours: int
-    ) -> Optional[models.TutorPricingOverride]:
-        """
-        Trova override specifico per tutor
-        Equivalente Excel: XLOOKUP specifico per tutor
-        """
-        now = datetime.utcnow()
-        
-        override = db.query(models.TutorPricingOverride).join(models.PricingRule).filter(
-            and_(
-                # Match tutor
-                models.TutorPricingOverride.tutor_id == tutor_id,
-                models.TutorPricingOverride.is_active == True,
-                
-                # Match timing
-                or_(
-                    models.TutorPricingOverride.valid_from.is_(None),
-                    models.TutorPricingOverride.valid_from <= now
-                ),
-                or_(
-                    models.TutorPricingOverride.valid_until.is_(None),
-                    models.TutorPricingOverride.valid_until >= now
-                ),
-                
-                # Match pricing rule criteria
-                models.PricingRule.lesson_type == lesson_type_enum.value,
-                models.PricingRule.subject == subject,
-                models.PricingRule.is_active == True,
-                models.PricingRule.min_duration <= duration_hours,
-                or_(
-                    models.PricingRule.max_duration.is_(None),
-                    models.PricingRule.max_duration >= duration_hours
-                )
+            await PricingService._log_calculation(
+                db, calculation_result, applied_rule, applied_override, commit=commit, deferred=deferred_log
             )
-        ).order_by(models.PricingRule.priority.asc()).first()
         
-        return override
-    
-    @staticmethod
-    async def _find_pricing_rule(
-        db: Session, 
-        lesson_type_enum: LessonType, 
-        subject: str, 
-        duration_hours: int
-    ) -> Optional[models.PricingRule]:
-        """
-        Trova regola pricing generale
-        Equivalente Excel: XLOOKUP generico su tabella tariffe
-        """
-        rule = db.query(models.PricingRule).filter(
-            and_(
-                models.PricingRule.lesson_type == lesson_type_enum.value,
-                models.PricingRule.subject == subject,
-                models.PricingRule.is_active == True,
-                models.PricingRule.min_duration <= duration_hours,
-                or_(
-                    models.PricingRule.max_duration.is_(None),
-                    models.PricingRule.max_duration >= duration_hours
-                )
-            )
-        ).order_by(models.PricingRule.priority.asc()).first()
-        
-        return rule
+        return calculation_result
     
     @staticmethod
-    def _calculate_volume_discount(duration_hours: int, volume_discounts: dict) -> Decimal:
+    async def quote_many(
+        db: Session,
+        quotes: Sequence[Dict[str, Any]],
+        log_calculation: bool = False,
+        table: Optional[PricingRuleTable] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Calcola sconto volume
-        Equivalente Excel: nested IF per sconti
+        📋 QUOTAZIONE BATCH - Matrice prezzi in una sola chiamata
         
-        volume_discounts esempio: {"4": 0.05, "8": 0.10, "12": 0.15}
+        Ogni quote ha lesson_type, subject, duration_hours, tutor_id.
+        Tutte le quote sono valutate sullo stesso snapshot di regole/override;
+        i risultati mantengono l'ordine d'ingresso con errore per singola voce.
+        Passando `table` più batch possono condividere lo stesso snapshot.
         """
-        if not volume_discounts:
-            return Decimal('0.0000')
+        table = table or pricing_table.get(db)
+        results = []
         
-        # Ordina le soglie dal più alto al più basso
-        thresholds = [(int(k), Decimal(str(v))) for k, v in volume_discounts.items()]
-        thresholds.sort(key=lambda x: x[0], reverse=True)
+        for index, quote in enumerate(quotes):
+            try:
+                result = await PricingService.calculate_lesson_price(
+                    lesson_type=quote["lesson_type"],
+                    subject=quote["subject"],
+                    duration_hours=quote["duration_hours"],
+                    tutor_id=quote["tutor_id"],
+                    db=db,
+                    log_calculation=log_calculation,
+                    table=table
+                )
+                results.append({"index": index, "success": True, "result": result, "error": None})
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                results.append({"index": index, "success": False, "result": None, "error": str(e)})
         
-        # Trova la soglia più alta applicabile
-        for threshold_hours, discount_rate in thresholds:
-            if duration_hours >= threshold_hours:
-                return discount_rate
-                
-        return Decimal('0.0000')
+        return results
     
     @staticmethod
     async def _log_calculation(
         db: Session, 
         calculation_result: dict, 
-        applied_rule: models.PricingRule = None, 
-        applied_override: models.TutorPricingOverride = None
+        applied_rule=None, 
+        applied_override=None,
+        commit: bool = True,
+        deferred: Optional[bool] = None
     ):
         """
         Log del calcolo per audit e debug
+        
+        Di default (PRICING_AUDIT_DEFERRED) il record va al writer in batch
+        (app.pricing.audit_log), che lo scrive sullo stesso engine della
+        sessione: nessun commit nel percorso della richiesta.
+        Con deferred=False viene aggiunto alla sessione corrente.
         """
-        log_entry = models.PricingCalculation(
-            lesson_type=calculation_result["lesson_type"],
-            subject=calculation_result["subject"],
-            duration_hours=calculation_result["duration_hours"],
-            tutor_id=calculation_result["tutor_id"],
-            
-            applied_pricing_rule_id=applied_rule.id if applied_rule else None,
-            applied_override_id=applied_override.id if applied_override else None,
-            
-            base_price_per_hour=Decimal(str(calculation_result["base_price_per_hour"])),
-            total_base_price=Decimal(str(calculation_result["total_base_price"])),
-            volume_discount_rate=Decimal(str(calculation_result["volume_discount_rate"])),
-            final_total_price=Decimal(str(calculation_result["final_total_price"])),
-            tutor_earnings=Decimal(str(calculation_result["tutor_earnings"])),
-            platform_fee=Decimal(str(calculation_result["platform_fee"])),
-            tutor_percentage_applied=Decimal(str(calculation_result["tutor_percentage"]))
-        )
+        record = build_calculation_record(calculation_result, applied_rule, applied_override)
+        
+        if deferred is None:
+            deferred = settings.PRICING_AUDIT_DEFERRED
+        if deferred:
+            pricing_audit_log.submit(record, bind=db.get_bind())
+            return None
         
+        log_entry = models.PricingCalculation(**record)
         db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
+        if commit:
+            db.commit()
+            db.refresh(log_entry)
+        return log_entry
     
     @staticmethod
     async def get_pricing_rules(
@@ -1,9 +1,9 @@
 """
 Slots models for tutoring platform
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Time, Date
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Time, Date, Index, JSON
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import date as date_type, datetime
 from app.core.database import Base
 
 class Slot(Base):
@@ -15,8 +15,56 @@ class Slot(Base):
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
     is_available = Column(Boolean, default=True)
+    # Set when the row materialises an occurrence of a recurring availability
+    recurring_availability_id = Column(Integer, ForeignKey("recurring_availabilities.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     tutor = relationship("Tutor", back_populates="slots")
+    recurring_availability = relationship("RecurringAvailability", back_populates="slots")
+    
+    __table_args__ = (
+        Index("ix_slots_tutor_date_available", "tutor_id", "date", "is_available"),
+        # At most one materialised row per occurrence (NULLs do not conflict)
+        Index("ix_slots_recurring_date", "recurring_availability_id", "date", unique=True),
+    )
+
+class RecurringAvailability(Base):
+    """
+    Weekly availability template: one virtual slot per matching weekday in
+    [valid_from, valid_until], minus the exception dates. Occurrences are
+    expanded on read (app.slots.recurrence) and only stored as Slot rows once
+    booked or edited.
+    """
+    __tablename__ = "recurring_availabilities"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tutor_id = Column(Integer, ForeignKey("tutors.id"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0=Monday, 6=Sunday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    valid_from = Column(Date, nullable=False)
+    valid_until = Column(Date, nullable=True)  # open-ended if null
+    exceptions = Column(JSON, nullable=False, default=list)  # ISO dates without an occurrence
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    tutor = relationship("Tutor")
+    slots = relationship("Slot", back_populates="recurring_availability")
+    
+    __table_args__ = (
+        Index("ix_recurring_availabilities_tutor_weekday", "tutor_id", "weekday"),
+    )
+    
+    def occurs_on(self, day: date_type) -> bool:
+        """True if the template has an occurrence on `day` (ignoring materialised rows)"""
+        return (
+            bool(self.is_active)
+            and day.weekday() == self.weekday
+            and self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+            and day.isoformat() not in (self.exceptions or ())
+        )
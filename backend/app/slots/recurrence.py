@@ -0,0 +1,131 @@
+"""
+Recurring availability expansion.
+
+A RecurringAvailability is expanded lazily for the requested window only:
+nothing is stored per occurrence until it is booked or edited, at which point
+a concrete Slot row with recurring_availability_id is created and takes
+precedence over the virtual occurrence (including when it is made
+unavailable).
+
+The cost of a read is proportional to the window, not to the calendar horizon.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.slots.models import RecurringAvailability, Slot
+
+Occurrence = Tuple[int, date]  # (recurring_availability_id, date)
+
+
+class CompiledTemplate:
+    """Read-only copy of an active RecurringAvailability, safe to keep across sessions"""
+
+    __slots__ = ("id", "tutor_id", "weekday", "start_time", "end_time", "valid_from", "valid_until", "exceptions")
+
+    def __init__(self, template: RecurringAvailability):
+        self.id = template.id
+        self.tutor_id = template.tutor_id
+        self.weekday = template.weekday
+        self.start_time = template.start_time
+        self.end_time = template.end_time
+        self.valid_from = template.valid_from
+        self.valid_until = template.valid_until
+        self.exceptions = frozenset(template.exceptions or ())
+
+    def dates(self, start_date: date, end_date: date) -> Iterator[date]:
+        """Occurrence dates in [start_date, end_date]"""
+        first = max(start_date, self.valid_from)
+        last = end_date if self.valid_until is None else min(end_date, self.valid_until)
+        day = first + timedelta(days=(self.weekday - first.weekday()) % 7)
+        while day <= last:
+            if day.isoformat() not in self.exceptions:
+                yield day
+            day += timedelta(days=7)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """True if an occurrence of this template contains [start, end]"""
+        day = start.date()
+        if end.date() != day or not any(self.dates(day, day)):
+            return False
+        return self.start_time <= start.time() and self.end_time >= end.time()
+
+
+def active_templates(db: Session, tutor_id: int, start_date: date, end_date: Optional[date]) -> List[CompiledTemplate]:
+    """Active templates of a tutor whose validity intersects [start_date, end_date] (open-ended if None)"""
+    return active_templates_for(db, [tutor_id], start_date, end_date)
+
+
+def active_templates_for(
+    db: Session,
+    tutor_ids: Sequence[int],
+    start_date: date,
+    end_date: Optional[date]
+) -> List[CompiledTemplate]:
+    """active_templates for several tutors in one query"""
+    query = db.query(RecurringAvailability).filter(
+        RecurringAvailability.tutor_id.in_(tutor_ids),
+        RecurringAvailability.is_active == True,
+        or_(RecurringAvailability.valid_until.is_(None), RecurringAvailability.valid_until >= start_date)
+    )
+    if end_date is not None:
+        query = query.filter(RecurringAvailability.valid_from <= end_date)
+    return [CompiledTemplate(template) for template in query.all()]
+
+
+def virtual_slots(
+    templates: Iterable[CompiledTemplate],
+    start_date: date,
+    end_date: date,
+    materialized: Set[Occurrence]
+) -> List[Slot]:
+    """Transient (never added to a session) Slot objects for the non-materialised occurrences"""
+    slots = []
+    for template in templates:
+        for day in template.dates(start_date, end_date):
+            if (template.id, day) in materialized:
+                continue
+            slots.append(Slot(
+                id=None,
+                tutor_id=template.tutor_id,
+                date=day,
+                start_time=template.start_time,
+                end_time=template.end_time,
+                is_available=True,
+                recurring_availability_id=template.id
+            ))
+    return slots
+
+
+def covering_occurrence(
+    templates: Iterable[CompiledTemplate],
+    materialized: Set[Occurrence],
+    start: datetime,
+    end: datetime
+) -> Optional[CompiledTemplate]:
+    """First template with a non-materialised occurrence containing [start, end]"""
+    for template in templates:
+        if (template.id, start.date()) not in materialized and template.covers(start, end):
+            return template
+    return None
+
+
+def find_covering_occurrence(db: Session, tutor_id: int, start: datetime, end: datetime) -> Optional[CompiledTemplate]:
+    """DB variant of covering_occurrence: at most two queries, one if the tutor has no templates"""
+    day = start.date()
+    templates = [t for t in active_templates(db, tutor_id, day, day) if t.covers(start, end)]
+    if not templates:
+        return None
+    materialized = set(
+        db.query(Slot.recurring_availability_id, Slot.date).filter(
+            Slot.recurring_availability_id.in_([t.id for t in templates]),
+            Slot.date == day
+        ).all()
+    )
+    return covering_occurrence(templates, materialized, start, end)
+
+
+def slot_sort_key(slot: Slot) -> Tuple[date, time]:
+    return (slot.date, slot.start_time)
@@ -1,10 +1,11 @@
 """
 Slots routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import date, datetime
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from app.core.config import settings
 from app.core.database import get_db
 from app.auth.dependencies import get_current_user
 from app.users.models import User
@@ -34,13 +35,13 @@ async def create_slot(
         db, slot_data.tutor_id, slot_data.date, slot_data.start_time, slot_data.end_time
     )
 
-@router.post("/multiple", response_model=List[schemas.Slot], tags=["Slots"])
+@router.post("/multiple", response_model=schemas.MultipleSlotsResult, tags=["Slots"])
 async def create_multiple_slots(
     slots_data: schemas.MultipleSlotsCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Create multiple slots for a date range (Tutor only)"""
+    """Create multiple slots for a date range, skipping days that overlap existing slots (Tutor only)"""
     if current_user.role != UserRole.TUTOR:
         raise HTTPException(status_code=403, detail="Tutor access required")
     
@@ -49,10 +50,13 @@ async def create_multiple_slots(
     if not tutor or tutor.id != slots_data.tutor_id:
         raise HTTPException(status_code=403, detail="Can only create slots for your own account")
     
-    return await services.SlotService.create_multiple_slots(
-        db, slots_data.tutor_id, slots_data.start_date, slots_data.end_date,
-        slots_data.start_time, slots_data.end_time, slots_data.days_of_week
-    )
+    try:
+        return await services.SlotService.create_multiple_slots(
+            db, slots_data.tutor_id, slots_data.start_date, slots_data.end_date,
+            slots_data.start_time, slots_data.end_time, slots_data.days_of_week
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[schemas.Slot], tags=["Slots"])
 async def get_slots(
@@ -101,6 +105,121 @@ async def get_available_slots(
     """Get available slots for a tutor (public endpoint)"""
     return await services.SlotService.get_available_slots(db, tutor_id, slot_date)
 
+@router.get("/search", response_model=List[schemas.FreeWindow], tags=["Slots"])
+async def search_free_windows(
+    response: Response,
+    subject: str = Query(..., min_length=1),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    duration_hours: int = Query(1, ge=1, le=8),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Earliest free windows across all available tutors teaching a subject (public endpoint)"""
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=13)
+    try:
+        windows = await services.SlotService.search_free_windows(
+            db, subject, date_from, date_to, duration_hours, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Cache-Control"] = f"public, max-age={settings.SLOT_SEARCH_CACHE_SECONDS}"
+    return windows
+
+# Recurring availability routes (declared before /{slot_id})
+async def _check_tutor_access(db: Session, current_user: User, tutor_id: int):
+    """Tutors may only manage their own availability; admins may manage any"""
+    if current_user.role == UserRole.TUTOR:
+        tutor = await user_services.UserService.get_tutor_by_user_id(db, current_user.id)
+        if not tutor or tutor.id != tutor_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+    elif current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+async def _get_recurring_or_404(db: Session, current_user: User, template_id: int):
+    template = await services.SlotService.get_recurring_availability_by_id(db, template_id)
+    if not template:
+        raise HTTPException(status_code=404, detail="Recurring availability not found")
+    await _check_tutor_access(db, current_user, template.tutor_id)
+    return template
+
+@router.post("/recurring", response_model=schemas.RecurringAvailability, tags=["Slots"])
+async def create_recurring_availability(
+    data: schemas.RecurringAvailabilityCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a weekly availability template, expanded on read (Tutor or Admin)"""
+    await _check_tutor_access(db, current_user, data.tutor_id)
+    try:
+        return await services.SlotService.create_recurring_availability(
+            db, data.tutor_id, data.weekday, data.start_time, data.end_time,
+            data.valid_from, data.valid_until, data.exceptions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/recurring", response_model=List[schemas.RecurringAvailability], tags=["Slots"])
+async def get_recurring_availabilities(
+    tutor_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the recurring availability templates of a tutor (Tutor or Admin)"""
+    await _check_tutor_access(db, current_user, tutor_id)
+    return await services.SlotService.get_recurring_availabilities(db, tutor_id)
+
+@router.delete("/recurring/{template_id}", tags=["Slots"])
+async def delete_recurring_availability(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a template; already booked or edited occurrences stay as slots (Tutor or Admin)"""
+    await _get_recurring_or_404(db, current_user, template_id)
+    await services.SlotService.delete_recurring_availability(db, template_id)
+    return {"message": "Recurring availability deleted successfully"}
+
+@router.put("/recurring/{template_id}/occurrences/{occurrence_date}", response_model=schemas.Slot, tags=["Slots"])
+async def update_recurring_occurrence(
+    template_id: int,
+    occurrence_date: date,
+    slot_data: schemas.SlotUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Edit one occurrence: it is stored as a concrete slot first (Tutor or Admin)"""
+    await _get_recurring_or_404(db, current_user, template_id)
+    try:
+        slot = await services.SlotService.materialize_occurrence(db, template_id, occurrence_date, commit=False)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if slot_data.start_time is not None:
+        slot.start_time = slot_data.start_time
+    if slot_data.end_time is not None:
+        slot.end_time = slot_data.end_time
+    if slot_data.is_available is not None:
+        slot.is_available = slot_data.is_available
+    
+    slot.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(slot)
+    return slot
+
+@router.delete("/recurring/{template_id}/occurrences/{occurrence_date}", response_model=schemas.RecurringAvailability, tags=["Slots"])
+async def delete_recurring_occurrence(
+    template_id: int,
+    occurrence_date: date,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Skip one occurrence of a template (Tutor or Admin)"""
+    await _get_recurring_or_404(db, current_user, template_id)
+    return await services.SlotService.add_recurring_exception(db, template_id, occurrence_date)
+
 @router.get("/{slot_id}", response_model=schemas.Slot, tags=["Slots"])
 async def get_slot(
     slot_id: int,
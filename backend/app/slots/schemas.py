@@ -1,7 +1,7 @@
 """
 Slot schemas for request/response validation
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime, date, time
 
@@ -24,6 +24,23 @@ class MultipleSlotsCreate(BaseModel):
     end_time: time
     days_of_week: Optional[List[int]] = None  # 0=Monday, 6=Sunday
 
+class MultipleSlotsResult(BaseModel):
+    tutor_id: int
+    requested: int
+    created: int
+    skipped: int  # days with an overlapping slot already in place
+    slot_ids: List[int]
+    skipped_dates: List[date]
+
+class RecurringAvailabilityCreate(BaseModel):
+    tutor_id: int
+    weekday: int = Field(..., ge=0, le=6)  # 0=Monday, 6=Sunday
+    start_time: time
+    end_time: time
+    valid_from: date
+    valid_until: Optional[date] = None
+    exceptions: List[date] = []
+
 # Update schemas
 class SlotUpdate(BaseModel):
     start_time: Optional[time] = None
@@ -32,8 +49,25 @@ class SlotUpdate(BaseModel):
 
 # Response schemas
 class Slot(SlotBase):
+    id: Optional[int] = None  # None for a virtual occurrence of a recurring availability
+    tutor_id: int
+    recurring_availability_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class RecurringAvailability(BaseModel):
     id: int
     tutor_id: int
+    weekday: int
+    start_time: time
+    end_time: time
+    valid_from: date
+    valid_until: Optional[date] = None
+    exceptions: List[date] = []
+    is_active: bool
     created_at: datetime
     updated_at: datetime
 
@@ -42,3 +76,9 @@ class Slot(SlotBase):
 
 class SlotWithTutor(Slot):
     tutor_name: str
+
+class FreeWindow(BaseModel):
+    tutor_id: int
+    tutor_name: str
+    start_time: datetime
+    end_time: datetime  # the window may be longer than the requested duration
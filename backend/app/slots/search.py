@@ -0,0 +1,101 @@
+"""
+Free-time search across tutors.
+
+For every tutor teaching a subject, the free windows are computed with a
+sweep-line over two kinds of intervals: available slots (concrete rows and
+virtual recurring occurrences) open time, active bookings close it. The
+inputs are loaded with a fixed number of queries for all tutors at once.
+
+Results are cached for SLOT_SEARCH_CACHE_SECONDS and dropped on commit of any
+change to bookings, slots, recurring availability or tutors. Bulk slot writes
+that bypass ORM events must call search_cache.clear(SEARCH_CACHE_PREFIX).
+"""
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.bookings.models import Booking
+from app.core.cache import InMemoryLRUCache
+from app.core.config import settings
+from app.slots.models import RecurringAvailability, Slot
+from app.users.models import Tutor
+
+Interval = Tuple[datetime, datetime]
+
+SEARCH_CACHE_PREFIX = "slot_search:"
+_SESSION_KEY = "slot_search_dirty"
+
+search_cache = InMemoryLRUCache(settings.SLOT_SEARCH_CACHE_MAX_ENTRIES)
+
+# Event kinds; at equal timestamps all events are applied before the state is read,
+# so touching intervals neither split nor merge windows incorrectly
+_SLOT, _BOOKING = 0, 1
+
+
+def free_intervals(slots: Sequence[Interval], bookings: Sequence[Interval]) -> List[Interval]:
+    """
+    Sorted, non-overlapping intervals covered by at least one slot and by no
+    booking. O((s + b) log(s + b)).
+    """
+    events = []
+    for start, end in slots:
+        if start < end:
+            events.append((start, _SLOT, 1))
+            events.append((end, _SLOT, -1))
+    for start, end in bookings:
+        if start < end:
+            events.append((start, _BOOKING, 1))
+            events.append((end, _BOOKING, -1))
+    events.sort(key=lambda item: item[0])
+
+    result: List[Interval] = []
+    open_slots = busy = 0
+    free_from = None
+    i = 0
+    while i < len(events):
+        moment = events[i][0]
+        while i < len(events) and events[i][0] == moment:
+            _, kind, delta = events[i]
+            if kind == _SLOT:
+                open_slots += delta
+            else:
+                busy += delta
+            i += 1
+        is_free = open_slots > 0 and busy == 0
+        if is_free and free_from is None:
+            free_from = moment
+        elif not is_free and free_from is not None:
+            result.append((free_from, moment))
+            free_from = None
+    return result
+
+
+@event.listens_for(Booking, "after_insert")
+@event.listens_for(Booking, "after_update")
+@event.listens_for(Booking, "after_delete")
+@event.listens_for(Slot, "after_insert")
+@event.listens_for(Slot, "after_update")
+@event.listens_for(Slot, "after_delete")
+@event.listens_for(RecurringAvailability, "after_insert")
+@event.listens_for(RecurringAvailability, "after_update")
+@event.listens_for(RecurringAvailability, "after_delete")
+@event.listens_for(Tutor, "after_insert")
+@event.listens_for(Tutor, "after_update")
+@event.listens_for(Tutor, "after_delete")
+def _availability_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSION_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_SESSION_KEY, False):
+        search_cache.clear(SEARCH_CACHE_PREFIX)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
@@ -2,9 +2,19 @@
 Slots business logic
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
+from sqlalchemy.exc import IntegrityError
 from app.slots import models
-from typing import List, Optional
+from app.slots.recurrence import (
+    active_templates, active_templates_for, find_covering_occurrence, slot_sort_key, virtual_slots
+)
+from app.slots.search import SEARCH_CACHE_PREFIX, free_intervals, search_cache
+from app.bookings.availability import ACTIVE_BOOKING_STATUSES, availability_index
+from app.bookings.models import Booking
+from app.users.models import Tutor
+from app.core.config import settings
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
 from datetime import datetime, date, time, timedelta
 
 class SlotService:
@@ -27,32 +37,77 @@ class SlotService:
     
     @staticmethod
     async def create_multiple_slots(db: Session, tutor_id: int, start_date: date, end_date: date, 
-                                  start_time: time, end_time: time, days_of_week: List[int] = None) -> List[models.Slot]:
-        """Create multiple slots for a tutor over a date range"""
-        slots = []
+                                  start_time: time, end_time: time, days_of_week: List[int] = None) -> Dict[str, Any]:
+        """
+        Create one slot per matching day over a date range (0=Monday, 6=Sunday).
+
+        Days where the tutor already has a slot or a recurring occurrence
+        overlapping the window are skipped. Existing slots and templates are
+        read with two queries (three if the tutor has templates) and the new
+        rows are inserted with one multi-row INSERT ... RETURNING, in a
+        single commit.
+        Returns a summary instead of the created rows.
+        """
+        if end_time <= start_time:
+            raise ValueError("end_time must be after start_time")
+        if end_date < start_date:
+            raise ValueError("end_date must not be before start_date")
+
+        candidates = []
         current_date = start_date
-        
         while current_date <= end_date:
-            # Check if this day of week should have slots (0=Monday, 6=Sunday)
-            day_of_week = current_date.weekday()
-            if days_of_week is None or day_of_week in days_of_week:
-                slot = models.Slot(
-                    tutor_id=tutor_id,
-                    date=current_date,
-                    start_time=start_time,
-                    end_time=end_time,
-                    is_available=True
-                )
-                db.add(slot)
-                slots.append(slot)
-            
+            if days_of_week is None or current_date.weekday() in days_of_week:
+                candidates.append(current_date)
             current_date += timedelta(days=1)
-        
-        db.commit()
-        for slot in slots:
-            db.refresh(slot)
-        
-        return slots
+
+        occupied = set()
+        if candidates:
+            requested = set(candidates)
+            occupied = {
+                slot_date for (slot_date,) in db.query(models.Slot.date).filter(
+                    models.Slot.tutor_id == tutor_id,
+                    models.Slot.date >= candidates[0],
+                    models.Slot.date <= candidates[-1],
+                    models.Slot.start_time < end_time,
+                    models.Slot.end_time > start_time
+                ).distinct()
+            }.intersection(requested)  # the range also spans days not requested
+            # Non-materialised occurrences of recurring availability occupy their day too
+            occupied.update(
+                slot.date for slot in SlotService._merge_recurring(db, tutor_id, [], candidates[0], candidates[-1])
+                if slot.date in requested and slot.start_time < end_time and slot.end_time > start_time
+            )
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "tutor_id": tutor_id,
+                "date": slot_date,
+                "start_time": start_time,
+                "end_time": end_time,
+                "is_available": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for slot_date in candidates if slot_date not in occupied
+        ]
+
+        slot_ids = []
+        if rows:
+            slot_ids = list(db.scalars(insert(models.Slot).returning(models.Slot.id), rows))
+            db.commit()
+            # Bulk insert bypasses ORM events, so drop the cached availability
+            availability_index.invalidate(tutor_id)
+            search_cache.clear(SEARCH_CACHE_PREFIX)
+
+        return {
+            "tutor_id": tutor_id,
+            "requested": len(candidates),
+            "created": len(slot_ids),
+            "skipped": len(candidates) - len(slot_ids),
+            "slot_ids": slot_ids,
+            "skipped_dates": sorted(occupied),
+        }
     
     @staticmethod
     async def get_slot_by_id(db: Session, slot_id: int) -> Optional[models.Slot]:
@@ -61,17 +116,20 @@ class SlotService:
     
     @staticmethod
     async def get_tutor_slots(db: Session, tutor_id: int, slot_date: date = None, skip: int = 0, limit: int = 100) -> List[models.Slot]:
-        """Get slots for a specific tutor"""
+        """Get slots for a specific tutor, including virtual occurrences of recurring availability"""
         query = db.query(models.Slot).filter(models.Slot.tutor_id == tutor_id)
         
         if slot_date:
             query = query.filter(models.Slot.date == slot_date)
         
-        return query.order_by(models.Slot.date.asc(), models.Slot.start_time.asc()).offset(skip).limit(limit).all()
+        # The first skip+limit concrete rows are enough to page the merged list
+        concrete = query.order_by(models.Slot.date.asc(), models.Slot.start_time.asc()).limit(skip + limit).all()
+        merged = SlotService._merge_recurring(db, tutor_id, concrete, *SlotService._expansion_window(slot_date))
+        return merged[skip:skip + limit]
     
     @staticmethod
     async def get_available_slots(db: Session, tutor_id: int, slot_date: date = None) -> List[models.Slot]:
-        """Get available slots for a tutor"""
+        """Get available slots for a tutor, including virtual occurrences of recurring availability"""
         query = db.query(models.Slot).filter(
             and_(
                 models.Slot.tutor_id == tutor_id,
@@ -82,18 +140,188 @@ class SlotService:
         if slot_date:
             query = query.filter(models.Slot.date == slot_date)
         
-        return query.order_by(models.Slot.date.asc(), models.Slot.start_time.asc()).all()
+        concrete = query.order_by(models.Slot.date.asc(), models.Slot.start_time.asc()).all()
+        return SlotService._merge_recurring(db, tutor_id, concrete, *SlotService._expansion_window(slot_date))
     
     @staticmethod
     async def get_slots_by_date_range(db: Session, tutor_id: int, start_date: date, end_date: date) -> List[models.Slot]:
-        """Get slots for a tutor within a date range"""
-        return db.query(models.Slot).filter(
+        """Get slots for a tutor within a date range, including virtual occurrences of recurring availability"""
+        concrete = db.query(models.Slot).filter(
             and_(
                 models.Slot.tutor_id == tutor_id,
                 models.Slot.date >= start_date,
                 models.Slot.date <= end_date
             )
         ).order_by(models.Slot.date.asc(), models.Slot.start_time.asc()).all()
+        return SlotService._merge_recurring(db, tutor_id, concrete, start_date, end_date)
+    
+    @staticmethod
+    def _expansion_window(slot_date: Optional[date]) -> Tuple[date, date]:
+        """Window in which recurring availability is expanded for a listing"""
+        if slot_date:
+            return slot_date, slot_date
+        today = date.today()
+        return today, today + timedelta(days=settings.RECURRING_AVAILABILITY_HORIZON_DAYS)
+    
+    @staticmethod
+    def _merge_recurring(db: Session, tutor_id: int, concrete: List[models.Slot],
+                         start_date: date, end_date: date) -> List[models.Slot]:
+        """
+        Concrete slots plus the virtual occurrences in [start_date, end_date] that
+        have not been materialised. One query when the tutor has no templates.
+        """
+        templates = active_templates(db, tutor_id, start_date, end_date)
+        if not templates:
+            return concrete
+        materialized = set(
+            db.query(models.Slot.recurring_availability_id, models.Slot.date).filter(
+                models.Slot.recurring_availability_id.in_([t.id for t in templates]),
+                models.Slot.date >= start_date,
+                models.Slot.date <= end_date
+            ).all()
+        )
+        return sorted(concrete + virtual_slots(templates, start_date, end_date, materialized), key=slot_sort_key)
+    
+    # ------------------------------------------------------------------
+    # Recurring availability
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    async def create_recurring_availability(db: Session, tutor_id: int, weekday: int, start_time: time, end_time: time,
+                                          valid_from: date, valid_until: Optional[date] = None,
+                                          exceptions: Optional[List[date]] = None) -> models.RecurringAvailability:
+        """Create a weekly availability template (no slot rows are created)"""
+        if end_time <= start_time:
+            raise ValueError("end_time must be after start_time")
+        if valid_until is not None and valid_until < valid_from:
+            raise ValueError("valid_until must not be before valid_from")
+        if not 0 <= weekday <= 6:
+            raise ValueError("weekday must be between 0 (Monday) and 6 (Sunday)")
+        
+        template = models.RecurringAvailability(
+            tutor_id=tutor_id,
+            weekday=weekday,
+            start_time=start_time,
+            end_time=end_time,
+            valid_from=valid_from,
+            valid_until=valid_until,
+            exceptions=sorted({day.isoformat() for day in exceptions or ()})
+        )
+        db.add(template)
+        db.commit()
+        db.refresh(template)
+        return template
+    
+    @staticmethod
+    async def get_recurring_availabilities(db: Session, tutor_id: int) -> List[models.RecurringAvailability]:
+        """Get the recurring availability templates of a tutor"""
+        return db.query(models.RecurringAvailability).filter(
+            models.RecurringAvailability.tutor_id == tutor_id
+        ).order_by(models.RecurringAvailability.weekday.asc(), models.RecurringAvailability.start_time.asc()).all()
+    
+    @staticmethod
+    async def get_recurring_availability_by_id(db: Session, template_id: int) -> Optional[models.RecurringAvailability]:
+        """Get recurring availability template by ID"""
+        return db.query(models.RecurringAvailability).filter(models.RecurringAvailability.id == template_id).first()
+    
+    @staticmethod
+    async def add_recurring_exception(db: Session, template_id: int, occurrence_date: date) -> Optional[models.RecurringAvailability]:
+        """Remove a single occurrence from a template (materialised rows are left untouched)"""
+        template = await SlotService.get_recurring_availability_by_id(db, template_id)
+        if not template:
+            return None
+        
+        # Reassign the list so the JSON column is flagged as changed
+        template.exceptions = sorted(set(template.exceptions or ()) | {occurrence_date.isoformat()})
+        template.updated_at = datetime.utcnow()
+        db.commit()
+        db.refresh(template)
+        return template
+    
+    @staticmethod
+    async def delete_recurring_availability(db: Session, template_id: int) -> bool:
+        """Delete a template; materialised slots are kept as plain slots"""
+        template = await SlotService.get_recurring_availability_by_id(db, template_id)
+        if not template:
+            return False
+        
+        db.query(models.Slot).filter(models.Slot.recurring_availability_id == template_id).update(
+            {models.Slot.recurring_availability_id: None}, synchronize_session=False
+        )
+        db.delete(template)
+        db.commit()
+        return True
+    
+    @staticmethod
+    async def materialize_occurrence(db: Session, template_id: int, occurrence_date: date,
+                                   commit: bool = True) -> models.Slot:
+        """
+        Store one occurrence of a template as a concrete Slot row, so that it can
+        be booked or edited. Returns the existing row if already materialised,
+        including when a concurrent request stores it first (unique index on
+        recurring_availability_id, date).
+        """
+        existing = SlotService._find_materialized(db, template_id, occurrence_date)
+        if existing:
+            return existing
+        
+        template = await SlotService.get_recurring_availability_by_id(db, template_id)
+        if not template:
+            raise ValueError("Recurring availability not found")
+        if not template.occurs_on(occurrence_date):
+            raise ValueError("Recurring availability has no occurrence on this date")
+        
+        slot = models.Slot(
+            tutor_id=template.tutor_id,
+            date=occurrence_date,
+            start_time=template.start_time,
+            end_time=template.end_time,
+            is_available=True,
+            recurring_availability_id=template.id
+        )
+        try:
+            # Savepoint: losing the race must not roll back the caller's transaction
+            with db.begin_nested():
+                db.add(slot)
+        except IntegrityError:
+            winner = SlotService._find_materialized(db, template_id, occurrence_date)
+            if winner is None:
+                raise
+            return winner
+        if commit:
+            db.commit()
+            db.refresh(slot)
+        return slot
+    
+    @staticmethod
+    def _find_materialized(db: Session, template_id: int, occurrence_date: date) -> Optional[models.Slot]:
+        return db.query(models.Slot).filter(
+            models.Slot.recurring_availability_id == template_id,
+            models.Slot.date == occurrence_date
+        ).first()
+    
+    @staticmethod
+    async def materialize_for_booking(db: Session, tutor_id: int, start: datetime, end: datetime) -> Optional[models.Slot]:
+        """
+        Called inside booking creation (no commit): if [start, end] is covered only
+        by a virtual occurrence, store that occurrence. One query for tutors
+        without recurring availability.
+        """
+        template = find_covering_occurrence(db, tutor_id, start, end)
+        if template is None:
+            return None
+        
+        concrete = db.query(models.Slot.id).filter(
+            models.Slot.tutor_id == tutor_id,
+            models.Slot.date == start.date(),
+            models.Slot.start_time <= start.time(),
+            models.Slot.end_time >= end.time(),
+            models.Slot.is_available == True
+        ).first()
+        if concrete:
+            return None
+        
+        return await SlotService.materialize_occurrence(db, template.id, start.date(), commit=False)
     
     @staticmethod
     async def update_slot_availability(db: Session, slot_id: int, is_available: bool) -> Optional[models.Slot]:
@@ -115,13 +343,25 @@ class SlotService:
         if not slot:
             return False
         
+        # Deleting a materialised occurrence must not bring the virtual one back
+        template = slot.recurring_availability
+        if template is not None:
+            template.exceptions = sorted(set(template.exceptions or ()) | {slot.date.isoformat()})
+        
         db.delete(slot)
         db.commit()
         return True
     
     @staticmethod
     async def delete_tutor_slots_by_date(db: Session, tutor_id: int, slot_date: date) -> int:
-        """Delete all slots for a tutor on a specific date"""
+        """Delete all slots for a tutor on a specific date, including recurring occurrences"""
+        for template in db.query(models.RecurringAvailability).filter(
+            models.RecurringAvailability.tutor_id == tutor_id,
+            models.RecurringAvailability.weekday == slot_date.weekday()
+        ).all():
+            if template.occurs_on(slot_date):
+                template.exceptions = sorted(set(template.exceptions or ()) | {slot_date.isoformat()})
+        
         result = db.query(models.Slot).filter(
             and_(
                 models.Slot.tutor_id == tutor_id,
@@ -129,6 +369,9 @@ class SlotService:
             )
         ).delete()
         db.commit()
+        # Bulk delete bypasses ORM events, so drop the cached availability
+        availability_index.invalidate(tutor_id)
+        search_cache.clear(SEARCH_CACHE_PREFIX)
         return result
     
     @staticmethod
@@ -147,3 +390,88 @@ class SlotService:
                 suitable_slots.append(slot)
         
         return suitable_slots
+    
+    # ------------------------------------------------------------------
+    # Free-time search
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    async def search_free_windows(db: Session, subject: str, date_from: date, date_to: date,
+                                duration_hours: int = 1, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Earliest `limit` free windows of at least `duration_hours` across the
+        available tutors teaching `subject`, in [date_from, date_to].
+        Cached for SLOT_SEARCH_CACHE_SECONDS (see app.slots.search).
+        """
+        if date_to < date_from:
+            raise ValueError("date_to must not be before date_from")
+        if (date_to - date_from).days >= settings.SLOT_SEARCH_MAX_DAYS:
+            raise ValueError(f"Search range cannot exceed {settings.SLOT_SEARCH_MAX_DAYS} days")
+        
+        key = f"{SEARCH_CACHE_PREFIX}{subject.strip().lower()}:{date_from}:{date_to}:{duration_hours}:{limit}"
+        cached = search_cache.get(key)
+        if cached is None:
+            cached = SlotService._compute_free_windows(
+                db, subject.strip(), date_from, date_to, timedelta(hours=duration_hours), limit
+            )
+            search_cache.set(key, cached, settings.SLOT_SEARCH_CACHE_SECONDS)
+        return [dict(window) for window in cached]
+    
+    @staticmethod
+    def _compute_free_windows(db: Session, subject: str, date_from: date, date_to: date,
+                              duration: timedelta, limit: int) -> List[Dict[str, Any]]:
+        """Four queries for all tutors (tutors, slots, templates, bookings), then a sweep-line per tutor"""
+        tutors = db.query(Tutor.id, Tutor.first_name, Tutor.last_name).filter(
+            Tutor.is_available == True,
+            Tutor.subjects.icontains(subject, autoescape=True)
+        ).all()
+        if not tutors:
+            return []
+        tutor_ids = [tutor.id for tutor in tutors]
+        window_start = datetime.combine(date_from, time.min)
+        window_end = datetime.combine(date_to + timedelta(days=1), time.min)
+        
+        slots: Dict[int, List[Tuple[datetime, datetime]]] = {tutor_id: [] for tutor_id in tutor_ids}
+        materialized = set()
+        for slot in db.query(
+            models.Slot.tutor_id, models.Slot.date, models.Slot.start_time, models.Slot.end_time,
+            models.Slot.is_available, models.Slot.recurring_availability_id
+        ).filter(
+            models.Slot.tutor_id.in_(tutor_ids),
+            models.Slot.date >= date_from,
+            models.Slot.date <= date_to
+        ):
+            if slot.recurring_availability_id is not None:
+                materialized.add((slot.recurring_availability_id, slot.date))
+            if slot.is_available:
+                slots[slot.tutor_id].append(
+                    (datetime.combine(slot.date, slot.start_time), datetime.combine(slot.date, slot.end_time))
+                )
+        templates = active_templates_for(db, tutor_ids, date_from, date_to)
+        for slot in virtual_slots(templates, date_from, date_to, materialized):
+            slots[slot.tutor_id].append(
+                (datetime.combine(slot.date, slot.start_time), datetime.combine(slot.date, slot.end_time))
+            )
+        
+        bookings: Dict[int, List[Tuple[datetime, datetime]]] = {tutor_id: [] for tutor_id in tutor_ids}
+        for booking in db.query(Booking.tutor_id, Booking.start_time, Booking.end_time).filter(
+            Booking.tutor_id.in_(tutor_ids),
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            Booking.start_time < window_end,
+            Booking.end_time > window_start
+        ):
+            bookings[booking.tutor_id].append((booking.start_time, booking.end_time))
+        
+        now = datetime.utcnow()
+        candidates = []
+        for tutor_id in tutor_ids:
+            for start, end in free_intervals(slots[tutor_id], bookings[tutor_id]):
+                start = max(start, now)
+                if end - start >= duration:
+                    candidates.append((start, tutor_id, end))
+        
+        names = {tutor.id: f"{tutor.first_name} {tutor.last_name}" for tutor in tutors}
+        return [
+            {"tutor_id": tutor_id, "tutor_name": names[tutor_id], "start_time": start, "end_time": end}
+            for start, tutor_id, end in heapq.nsmallest(limit, candidates)
+        ]
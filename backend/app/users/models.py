@@ -1,7 +1,7 @@
 """
 Users models for tutoring platform
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Date, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Date, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -80,6 +80,10 @@ class UserSession(Base):
     
     # Relationships
     user = relationship("User", back_populates="sessions")
+    
+    __table_args__ = (
+        Index("ix_user_sessions_refresh_token", "refresh_token"),
+    )
 
 class PasswordReset(Base):
     __tablename__ = "password_resets"
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.users import models, schemas
 from app.core.security import get_password_hash  # Use core security instead
+from app.auth.principal_cache import principal_cache
 from typing import List, Optional
 from datetime import datetime
 
@@ -99,6 +100,7 @@ class UserService:
         )
         db.add(tutor)
         db.commit()
+        principal_cache.invalidate_user(user.id)
         db.refresh(tutor)
         return tutor
 
@@ -109,8 +111,8 @@ class UserService:
     
     @staticmethod
     async def get_student_by_user_id(db: Session, user_id: int) -> Optional[models.Student]:
-        """Get student by user ID"""
-        return db.query(models.Student).filter(models.Student.user_id == user_id).first()
+        """Get student by user ID (served from the principal cache when warm)"""
+        return principal_cache.get_profile(db, "student", user_id)
     
     @staticmethod
     async def get_tutor_by_id(db: Session, tutor_id: int) -> Optional[models.Tutor]:
@@ -119,8 +121,8 @@ class UserService:
     
     @staticmethod
     async def get_tutor_by_user_id(db: Session, user_id: int) -> Optional[models.Tutor]:
-        """Get tutor by user ID"""
-        return db.query(models.Tutor).filter(models.Tutor.user_id == user_id).first()
+        """Get tutor by user ID (served from the principal cache when warm)"""
+        return principal_cache.get_profile(db, "tutor", user_id)
     
     @staticmethod
     async def get_all_students(db: Session, skip: int = 0, limit: int = 100) -> List[models.Student]:
@@ -0,0 +1,55 @@
+"""add daily rollup tables for bookings and payments
+
+Revision ID: 20251001_daily_rollups
+Revises: 20250923_password_reset
+Create Date: 2025-10-01 09:00:00.000000
+
+Run scripts/backfill_rollups.py after upgrading to populate existing history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251001_daily_rollups'
+down_revision = '20250923_password_reset'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create booking_daily_rollups and payment_daily_rollups"""
+    op.create_table(
+        'booking_daily_rollups',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('tutor_id', sa.Integer, nullable=False),
+        sa.Column('subject', sa.String, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('lesson_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('hours', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('tutor_earnings', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('platform_fees', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime),
+        sa.UniqueConstraint('day', 'tutor_id', 'subject', 'status', name='uq_booking_daily_rollups_key'),
+    )
+    op.create_index('ix_booking_daily_rollups_tutor_day', 'booking_daily_rollups', ['tutor_id', 'day'])
+
+    op.create_table(
+        'payment_daily_rollups',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('day', sa.Date, nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('payment_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('amount_cents', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime),
+        sa.UniqueConstraint('day', 'status', name='uq_payment_daily_rollups_key'),
+    )
+
+
+def downgrade() -> None:
+    """Drop rollup tables"""
+    op.drop_table('payment_daily_rollups')
+    op.drop_index('ix_booking_daily_rollups_tutor_day', 'booking_daily_rollups')
+    op.drop_table('booking_daily_rollups')
@@ -0,0 +1,50 @@
+"""add composite indexes for the hot query predicates
+
+Revision ID: 20251008_hot_path_indexes
+Revises: 20251001_daily_rollups
+Create Date: 2025-10-08 09:00:00.000000
+
+On PostgreSQL the indexes are built CONCURRENTLY (outside the migration
+transaction) so bookings and sessions stay writable during the upgrade.
+Compare plans before/after with scripts/benchmark_indexes.py.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251008_hot_path_indexes'
+down_revision = '20251001_daily_rollups'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    # Tutor calendars / dashboards: tutor + status + time range
+    ('ix_bookings_tutor_status_start', 'bookings', ['tutor_id', 'status', 'start_time']),
+    # Student booking lists ordered by start_time
+    ('ix_bookings_student_start', 'bookings', ['student_id', 'start_time']),
+    # Day/week ranges and keyset pagination on (start_time, id)
+    ('ix_bookings_start_time_id', 'bookings', ['start_time', 'id']),
+    # Tutor availability by date
+    ('ix_slots_tutor_date_available', 'slots', ['tutor_id', 'date', 'is_available']),
+    # Active, non-expired packages of a student
+    ('ix_package_purchases_student_active_expiry', 'package_purchases', ['student_id', 'is_active', 'expiry_date']),
+    # Refresh token lookup on every token refresh
+    ('ix_user_sessions_refresh_token', 'user_sessions', ['refresh_token']),
+    # Pricing rule lookup
+    ('ix_pricing_rules_lookup', 'pricing_rules', ['lesson_type', 'subject', 'is_active']),
+)
+
+
+def upgrade() -> None:
+    """Create the composite indexes (concurrently on PostgreSQL)"""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Drop the composite indexes"""
+    with op.get_context().autocommit_block():
+        for name, table, _columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
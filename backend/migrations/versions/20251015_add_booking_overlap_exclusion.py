@@ -0,0 +1,39 @@
+"""exclusion constraint against overlapping active bookings of a tutor
+
+Revision ID: 20251015_booking_overlap
+Revises: 20251008_hot_path_indexes
+Create Date: 2025-10-15 09:00:00.000000
+
+PostgreSQL only (needs btree_gist); SQLite keeps the application-level check.
+The upgrade fails if active bookings already overlap: cancel or move them first.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20251015_booking_overlap'
+down_revision = '20251008_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+CONSTRAINT = 'ex_bookings_tutor_no_overlap'
+
+
+def upgrade() -> None:
+    """Create btree_gist and the tsrange exclusion constraint on bookings"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT} "
+        "EXCLUDE USING gist (tutor_id WITH =, tsrange(start_time, end_time, '[)') WITH &&) "
+        "WHERE (status IN ('PENDING', 'CONFIRMED'))"
+    )
+
+
+def downgrade() -> None:
+    """Drop the exclusion constraint (the extension is left installed)"""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"ALTER TABLE bookings DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
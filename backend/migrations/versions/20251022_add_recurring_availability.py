@@ -0,0 +1,60 @@
+"""add recurring availability templates
+
+Revision ID: 20251022_recurring_availability
+Revises: 20251015_booking_overlap
+Create Date: 2025-10-22 09:00:00.000000
+
+Occurrences are expanded on read; slots.recurring_availability_id marks the
+rows that materialise a booked or edited occurrence.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20251022_recurring_availability'
+down_revision = '20251015_booking_overlap'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create recurring_availabilities and link slots to it"""
+    op.create_table(
+        'recurring_availabilities',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('tutor_id', sa.Integer, sa.ForeignKey('tutors.id'), nullable=False),
+        sa.Column('weekday', sa.Integer, nullable=False),
+        sa.Column('start_time', sa.Time, nullable=False),
+        sa.Column('end_time', sa.Time, nullable=False),
+        sa.Column('valid_from', sa.Date, nullable=False),
+        sa.Column('valid_until', sa.Date, nullable=True),
+        sa.Column('exceptions', sa.JSON, nullable=False),
+        sa.Column('is_active', sa.Boolean, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+    )
+    op.create_index('ix_recurring_availabilities_id', 'recurring_availabilities', ['id'])
+    op.create_index('ix_recurring_availabilities_tutor_weekday', 'recurring_availabilities', ['tutor_id', 'weekday'])
+
+    op.add_column('slots', sa.Column('recurring_availability_id', sa.Integer, nullable=True))
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'fk_slots_recurring_availability_id', 'slots', 'recurring_availabilities',
+            ['recurring_availability_id'], ['id']
+        )
+    # Unique: concurrent materialisations of one occurrence cannot both insert
+    op.create_index('ix_slots_recurring_date', 'slots', ['recurring_availability_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Drop recurring_availabilities and the slots link"""
+    op.drop_index('ix_slots_recurring_date', table_name='slots')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('fk_slots_recurring_availability_id', 'slots', type_='foreignkey')
+    with op.batch_alter_table('slots') as batch_op:
+        batch_op.drop_column('recurring_availability_id')
+
+    op.drop_index('ix_recurring_availabilities_tutor_weekday', table_name='recurring_availabilities')
+    op.drop_index('ix_recurring_availabilities_id', table_name='recurring_availabilities')
+    op.drop_table('recurring_availabilities')
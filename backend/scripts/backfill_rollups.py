@@ -0,0 +1,43 @@
+"""Rebuild the daily booking and payment rollups from the raw tables.
+
+Run once after the 20251001_daily_rollups migration, or to repair a date range.
+Each range is deleted and recomputed in a single transaction.
+
+Usage:
+    python scripts/backfill_rollups.py [--from 2025-01-01] [--to 2025-12-31]
+"""
+import argparse
+import logging
+from datetime import date
+
+from app.core import models  # noqa: F401 - register all mappers
+from app.core.database import SessionLocal
+from app.analytics.rollups import rebuild_booking_rollups, rebuild_payment_rollups
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--from", dest="start_day", type=date.fromisoformat, help="First day (default: all history)")
+    parser.add_argument("--to", dest="end_day", type=date.fromisoformat, help="Last day (default: all history)")
+    return parser.parse_args()
+
+
+def backfill(args):
+    db = SessionLocal()
+    try:
+        bookings = rebuild_booking_rollups(db, args.start_day, args.end_day)
+        payments = rebuild_payment_rollups(db, args.start_day, args.end_day)
+        db.commit()
+        logger.info(f"Rebuilt {bookings} booking rollup rows and {payments} payment rollup rows")
+    except Exception:
+        logger.exception("Failed to rebuild rollups")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill(parse_args())
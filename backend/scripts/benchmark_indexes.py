@@ -0,0 +1,212 @@
+"""Show query plans and timings of the hot queries without and with the composite indexes.
+
+Seeds a synthetic dataset into a scratch database, drops the indexes added by
+the 20251008_hot_path_indexes migration, prints EXPLAIN output and median
+timings for each hot query, then creates the indexes and repeats.
+
+Point it at a throwaway database only: it creates the schema and inserts rows.
+
+Usage:
+    python scripts/benchmark_indexes.py [--database-url sqlite:///./bench.db]
+        [--bookings 100000] [--students 2000] [--tutors 50] [--runs 20]
+"""
+import argparse
+import logging
+import random
+import secrets
+import statistics
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+from sqlalchemy import create_engine, select
+
+from app.core import models  # noqa: F401 - register all mappers
+from app.core.database import Base
+from app.bookings.models import Booking, BookingStatus
+from app.packages.models import Package, PackagePurchase
+from app.pricing.models import LessonType, PricingRule
+from app.slots.models import Slot
+from app.users.models import Student, Tutor, User, UserRole, UserSession
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+HOT_INDEXES = (
+    "ix_bookings_tutor_status_start",
+    "ix_bookings_student_start",
+    "ix_bookings_start_time_id",
+    "ix_slots_tutor_date_available",
+    "ix_package_purchases_student_active_expiry",
+    "ix_user_sessions_refresh_token",
+    "ix_pricing_rules_lookup",
+)
+SUBJECTS = ("matematica", "fisica", "inglese", "chimica", "italiano")
+INSERT_BATCH = 5000
+START = datetime(2025, 1, 6, 8, 0)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./bench_indexes.db")
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--tutors", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20, help="Executions per query for the timing")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def _insert(conn, model, rows):
+    for offset in range(0, len(rows), INSERT_BATCH):
+        conn.execute(model.__table__.insert(), rows[offset:offset + INSERT_BATCH])
+
+
+def seed(engine, args):
+    rng = random.Random(args.seed)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    tutor_ids = range(1, args.tutors + 1)
+    student_ids = range(1, args.students + 1)
+    with engine.begin() as conn:
+        _insert(conn, User, [
+            {"id": i, "email": f"user{i}@bench.local", "hashed_password": "x",
+             "role": UserRole.TUTOR if i <= args.tutors else UserRole.STUDENT}
+            for i in range(1, args.tutors + args.students + 1)
+        ])
+        _insert(conn, Tutor, [{"id": t, "user_id": t, "first_name": "T", "last_name": str(t)} for t in tutor_ids])
+        _insert(conn, Student, [
+            {"id": s, "user_id": args.tutors + s, "first_name": "S", "last_name": str(s), "date_of_birth": date(2008, 1, 1),
+             "institute": "ITIS", "class_level": "4A", "phone_number": "000"}
+            for s in student_ids
+        ])
+        _insert(conn, Package, [
+            {"id": t, "tutor_id": t, "name": f"P{t}", "total_hours": 20, "price": 400, "subject": SUBJECTS[t % len(SUBJECTS)]}
+            for t in tutor_ids
+        ])
+        _insert(conn, PackagePurchase, [
+            {"id": i, "student_id": 1 + i % args.students, "package_id": rng.choice(tutor_ids),
+             "expiry_date": date(2025, 1, 1) + timedelta(days=rng.randrange(365)), "hours_used": 0,
+             "hours_remaining": 20, "is_active": rng.random() < 0.3}
+            for i in range(1, args.students * 3 + 1)
+        ])
+        statuses = list(BookingStatus)
+        bookings = []
+        for i in range(1, args.bookings + 1):
+            start = START + timedelta(days=rng.randrange(365), hours=rng.randrange(10))
+            student = rng.choice(student_ids)
+            bookings.append({
+                "id": i, "student_id": student, "tutor_id": rng.choice(tutor_ids), "package_purchase_id": student,
+                "start_time": start, "end_time": start + timedelta(hours=1), "duration_hours": 1,
+                "subject": rng.choice(SUBJECTS), "status": rng.choice(statuses),
+            })
+        _insert(conn, Booking, bookings)
+        _insert(conn, Slot, [
+            {"tutor_id": t, "date": date(2025, 1, 6) + timedelta(days=d), "start_time": dtime(h), "end_time": dtime(h + 1),
+             "is_available": rng.random() < 0.6}
+            for t in tutor_ids for d in range(0, 365, 2) for h in (15, 16, 17)
+        ])
+        _insert(conn, UserSession, [
+            {"user_id": 1 + i % (args.tutors + args.students), "refresh_token": secrets.token_urlsafe(32),
+             "expires_at": START + timedelta(days=30)}
+            for i in range(args.students * 5)
+        ])
+        _insert(conn, PricingRule, [
+            {"name": f"{lesson_type.name}_{subject}_{n}", "lesson_type": lesson_type, "subject": subject,
+             "base_price_per_hour": 25, "is_active": n == 0}
+            for lesson_type in LessonType for subject in SUBJECTS for n in range(20)
+        ])
+    with engine.connect() as conn:
+        token = conn.execute(select(UserSession.refresh_token).limit(1)).scalar()
+    logger.info(f"Seeded {args.bookings} bookings, {args.students} students, {args.tutors} tutors")
+    return token
+
+
+def hot_queries(token):
+    day = START + timedelta(days=60)
+    return {
+        "tutor calendar (tutor, status, range)": select(Booking.id).where(
+            Booking.tutor_id == 7, Booking.status == BookingStatus.CONFIRMED,
+            Booking.start_time >= day, Booking.start_time < day + timedelta(days=7),
+        ),
+        "student bookings page": select(Booking.id).where(Booking.student_id == 42).order_by(
+            Booking.start_time, Booking.id
+        ).limit(50),
+        "lessons of one day": select(Booking.id).where(
+            Booking.start_time >= day, Booking.start_time < day + timedelta(days=1)
+        ),
+        "tutor free slots on a date": select(Slot.id).where(
+            Slot.tutor_id == 7, Slot.date == day.date(), Slot.is_available == True  # noqa: E712
+        ),
+        "active packages of a student": select(PackagePurchase.id).where(
+            PackagePurchase.student_id == 42, PackagePurchase.is_active == True,  # noqa: E712
+            PackagePurchase.expiry_date >= day.date(),
+        ),
+        "refresh token lookup": select(UserSession.id).where(UserSession.refresh_token == token),
+        "pricing rule lookup": select(PricingRule.id).where(
+            PricingRule.lesson_type == LessonType.DOPOSCUOLA, PricingRule.subject == "fisica",
+            PricingRule.is_active == True,  # noqa: E712
+        ),
+    }
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}").fetchall()
+        return [row[0] for row in rows]
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row[-1] for row in rows]
+
+
+def timing_ms(conn, statement, runs):
+    samples = []
+    for _ in range(runs):
+        began = time.perf_counter()
+        conn.execute(statement).fetchall()
+        samples.append((time.perf_counter() - began) * 1000)
+    return statistics.median(samples)
+
+
+def report(engine, queries, runs, label):
+    results = {}
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")  # fresh planner statistics on both SQLite and PostgreSQL
+        conn.commit()
+        print(f"\n===== {label} =====")
+        for name, statement in queries.items():
+            plan = explain(conn, statement)
+            results[name] = timing_ms(conn, statement, runs)
+            print(f"\n-- {name}: {results[name]:.3f} ms (median of {runs})")
+            for line in plan:
+                print(f"   {line}")
+    return results
+
+
+def set_indexes(engine, present):
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes if index.name in HOT_INDEXES]
+    with engine.begin() as conn:
+        for index in indexes:
+            if present:
+                index.create(conn, checkfirst=True)
+            else:
+                index.drop(conn, checkfirst=True)
+
+
+def main(args):
+    engine = create_engine(args.database_url)
+    token = seed(engine, args)
+    queries = hot_queries(token)
+
+    set_indexes(engine, present=False)
+    before = report(engine, queries, args.runs, "WITHOUT composite indexes")
+    set_indexes(engine, present=True)
+    after = report(engine, queries, args.runs, "WITH composite indexes")
+
+    print("\n===== Summary (median ms) =====")
+    for name in queries:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<40} {before[name]:>9.3f} -> {after[name]:>9.3f}  (x{speedup:.1f})")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,70 @@
+"""Recalculate booking prices (and optionally durations) after a tariff change.
+
+Loads bookings in chunks, prices them against a single snapshot of the pricing
+rules and writes the changes with bulk updates. Use --dry-run to only report the diff.
+
+Usage:
+    python scripts/recalculate_booking_prices.py [--ids 1,2,3] [--status pending,confirmed]
+        [--durations] [--chunk-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from app.core import models  # noqa: F401 - register all mappers
+from app.core.database import SessionLocal
+from app.bookings.models import Booking, BookingStatus
+from app.bookings.services import EnhancedBookingService
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", help="Comma separated booking ids (default: all matching bookings)")
+    parser.add_argument("--status", help="Comma separated statuses, e.g. pending,confirmed")
+    parser.add_argument("--durations", action="store_true", help="Also recalculate durations")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without writing")
+    return parser.parse_args()
+
+
+def recalculate(args):
+    db = SessionLocal()
+    try:
+        if args.ids:
+            booking_ids = [int(value) for value in args.ids.split(",") if value.strip()]
+        else:
+            query = db.query(Booking.id)
+            if args.status:
+                statuses = [BookingStatus(value.strip().lower()) for value in args.status.split(",")]
+                query = query.filter(Booking.status.in_(statuses))
+            booking_ids = [row.id for row in query.order_by(Booking.id).all()]
+
+        logger.info(f"Recalculating {len(booking_ids)} bookings{' (dry run)' if args.dry_run else ''}")
+
+        results = asyncio.run(EnhancedBookingService.bulk_recalculate_bookings(
+            db,
+            booking_ids,
+            recalculate_pricing=True,
+            recalculate_duration=args.durations,
+            dry_run=args.dry_run,
+            chunk_size=args.chunk_size,
+            progress_callback=lambda done, total: logger.info(f"Progress: {done}/{total}"),
+        ))
+
+        logger.info(json.dumps({key: results[key] for key in ("processed", "updated", "summary")}))
+        logger.info(json.dumps({key: value for key, value in results["diff"].items() if key != "changes"}))
+        for error in results["errors"][:20]:
+            logger.warning(error)
+    except Exception:
+        logger.exception("Failed while recalculating booking prices")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    recalculate(parse_args())
@@ -7,6 +7,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.core.database import get_db, Base
+from app.auth.principal_cache import principal_cache
+from app.bookings.availability import availability_index
+from app.dashboard.cache import dashboard_cache
+from app.pricing.rule_table import pricing_table
+from app.slots.search import search_cache
+from tests.utils import make_sqlite_engine
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -25,6 +31,39 @@ app.dependency_overrides[get_db] = override_get_db
 @pytest.fixture
 def client():
     Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    dashboard_cache.invalidate()
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
+    principal_cache.clear()
+    dashboard_cache.invalidate()
+
+
+def reset_caches():
+    """Drop every process-wide cache, so no state leaks between databases"""
+    availability_index.invalidate()
+    pricing_table.invalidate()
+    principal_cache.clear()
+    dashboard_cache.invalidate()
+    search_cache.clear()
+
+
+@pytest.fixture
+def sqlite_engine():
+    """make_sqlite_engine() with every process-wide cache reset around the test"""
+    memory_engine = make_sqlite_engine()
+    reset_caches()
+    yield memory_engine
+    reset_caches()
+    memory_engine.dispose()
+
+
+@pytest.fixture
+def sqlite_db(sqlite_engine):
+    """Session on sqlite_engine, configured like SessionLocal"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
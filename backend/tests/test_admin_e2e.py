@@ -1,3 +1,4 @@
+import json
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.utils.seed import seed_users
@@ -61,3 +62,22 @@ def test_full_flow(client):
     assert resp.status_code == 200
     body = resp.json()
     assert body["message"] == "Payment confirmed"
+
+    # Listings: assignment carries the names the UI renders, payment filter by status
+    resp = client.get("/api/admin/package-assignments", headers=headers, params={"status": "active"})
+    assert resp.status_code == 200
+    listed = resp.json()
+    assert [a["id"] for a in listed] == [assignment["id"]]
+    assert set(listed[0]["student"]) == {"first_name", "last_name", "institute", "class_level"}
+    assert listed[0]["package"]["total_hours"] is not None
+    resp = client.get("/api/admin/payments", headers=headers, params={"status": "completed", "fields": "amount,status"})
+    assert [(p["id"], p["status"]) for p in resp.json()] == [(payment["id"], "completed")]
+
+    # Streaming exports
+    resp = client.get("/api/admin/export/package-assignments", headers=headers, params={"format": "ndjson"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in resp.text.splitlines()] == [assignment["id"]]
+    resp = client.get("/api/admin/export/payments", headers=headers, params={"fields": "amount,status"})
+    assert resp.text.splitlines() == ["id,amount,status", f"{payment['id']},100.00,completed"]
+    assert client.get("/api/admin/export/payments", headers=headers, params={"status": "bogus"}).status_code == 400
@@ -35,3 +35,50 @@ def test_admin_list_endpoints(client):
     # list payments
     resp = client.get("/api/admin/payments", headers=headers)
     assert resp.status_code == 200
+
+    # lessons: cursor pagination, malformed cursor is a client error
+    resp = client.get("/api/admin/lessons", headers=headers, params={"limit": 5})
+    assert resp.status_code == 200
+    assert isinstance(resp.json(), list)
+    resp = client.get("/api/admin/lessons", headers=headers, params={"cursor": "bogus"})
+    assert resp.status_code == 400
+
+
+def test_admin_user_list_projection_and_count(client):
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = client.get("/api/admin/users", headers=headers, params={"count": "exact"})
+    assert resp.status_code == 200
+    users = resp.json()
+    assert isinstance(users, list) and users
+    assert "hashed_password" not in users[0]
+    assert int(resp.headers["X-Total-Count"]) == len(users)
+    assert resp.headers["X-Count-Mode"] == "exact"
+
+    # sparse projection + keyset pages
+    resp = client.get("/api/admin/users", headers=headers, params={"fields": "email,role", "limit": 1})
+    assert resp.status_code == 200
+    assert set(resp.json()[0]) == {"id", "email", "role"}
+    collected = resp.json()
+    while "X-Next-Cursor" in resp.headers:
+        resp = client.get("/api/admin/users", headers=headers, params={"fields": "email", "limit": 1, "cursor": resp.headers["X-Next-Cursor"]})
+        collected += resp.json()
+    assert [u["id"] for u in collected] == [u["id"] for u in users]
+
+    resp = client.get("/api/admin/users", headers=headers, params={"role": "admin", "count": "estimate"})
+    assert all(u["role"] == "admin" for u in resp.json())
+    assert resp.headers["X-Count-Mode"] == "exact"  # no planner estimates on SQLite
+
+    assert client.get("/api/admin/users", headers=headers, params={"fields": "hashed_password"}).status_code == 400
+    pending = client.get("/api/admin/pending-approvals", headers=headers).json()
+    assert pending and all(u["role"] == "tutor" and not u["is_verified"] for u in pending)
+
+
+def test_admin_lessons_stats(client):
+    token = get_auth_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for params in ({}, {"fresh": "true"}):
+        resp = client.get("/api/admin/lessons/stats", headers=headers, params=params)
+        assert resp.status_code == 200
+        assert resp.json()["total_lessons"] == 0
@@ -1,6 +1,123 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
 import pytest
 
+from app.admin import schemas
+from app.admin.models import AdminPackageAssignment, PackageAssignmentStatus, PaymentStatus
+from app.admin.services import AdminLessonService, AdminPackageService, AdminPaymentService
+from app.bookings.models import Booking, BookingStatus
+from app.packages.models import Package
+from app.users.models import User, UserRole
+from tests.utils import add_student, add_tutor, count_queries, seed_purchase
+
+
+def test_confirm_payment_activates_assignment_once(sqlite_db):
+    admin = User(email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+    sqlite_db.add(admin)
+    tutor, student = add_tutor(sqlite_db), add_student(sqlite_db)
+    package = Package(tutor_id=tutor.id, name="A", total_hours=10, price=Decimal("100.00"), subject="math")
+    sqlite_db.add(package)
+    sqlite_db.commit()
+
+    assignment = AdminPackageService.create_assignment(sqlite_db, schemas.AdminPackageAssignmentCreate(
+        student_id=student.id, tutor_id=tutor.id, package_id=package.id
+    ), admin.id)
+    assert (assignment.status, assignment.hours_remaining) == (PackageAssignmentStatus.ASSIGNED, 10)
+
+    payment = AdminPaymentService.record_payment(sqlite_db, schemas.AdminPaymentCreate(
+        package_assignment_id=assignment.id, student_id=student.id, amount=Decimal("100.00"),
+        payment_method="cash", payment_date=date(2025, 3, 5), reference_number="R-1"
+    ), admin.id)
+    assert payment.status == PaymentStatus.PENDING
+
+    confirmed = AdminPaymentService.confirm_payment(sqlite_db, payment.id, admin.id)
+    activated_at = sqlite_db.get(AdminPackageAssignment, assignment.id).activated_at
+    assert confirmed.status == PaymentStatus.COMPLETED and confirmed.confirmed_by_admin_id == admin.id
+    assert sqlite_db.get(AdminPackageAssignment, assignment.id).status == PackageAssignmentStatus.ACTIVE
+    assert activated_at is not None
+
+    # Confirming again is a no-op
+    assert AdminPaymentService.confirm_payment(sqlite_db, payment.id, admin.id).id == payment.id
+    assert sqlite_db.get(AdminPackageAssignment, assignment.id).activated_at == activated_at
+    with pytest.raises(ValueError):
+        AdminPaymentService.confirm_payment(sqlite_db, 999, admin.id)
+
+
+def test_package_stats_grouped_query(sqlite_db):
+    admin = User(email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+    sqlite_db.add(admin)
+    tutor, student = add_tutor(sqlite_db), add_student(sqlite_db)
+    popular = Package(tutor_id=tutor.id, name="A", total_hours=10, price=Decimal("100.00"), subject="math")
+    unused = Package(tutor_id=tutor.id, name="B", total_hours=5, price=Decimal("50.00"), subject="math")
+    sqlite_db.add_all([popular, unused])
+    sqlite_db.flush()
+
+    def assign(status, hours_used, custom_price=None):
+        return AdminPackageAssignment(
+            student_id=student.id, tutor_id=tutor.id, package_id=popular.id, assigned_by_admin_id=admin.id,
+            status=status, hours_used=hours_used, hours_remaining=10 - hours_used, custom_price=custom_price
+        )
+
+    sqlite_db.add_all([
+        assign(PackageAssignmentStatus.ACTIVE, 4),
+        assign(PackageAssignmentStatus.ACTIVE, 2, Decimal("80.00")),
+        assign(PackageAssignmentStatus.COMPLETED, 10),
+    ])
+    sqlite_db.commit()
+    popular_id, unused_id = popular.id, unused.id
+
+    with count_queries(sqlite_db.get_bind()) as queries:
+        stats = AdminPackageService.get_package_stats(sqlite_db, [popular_id, unused_id, 999])
+
+    assert len(queries) == 1
+    assert stats[popular_id] == {
+        "total_assignments": 3,
+        "active_assignments": 2,
+        "total_hours_used": 16,
+        "total_revenue": 280.0,
+        "avg_completion_rate": 16 / 30 * 100,
+    }
+    assert stats[unused_id] == {
+        "total_assignments": 0, "active_assignments": 0, "total_hours_used": 0,
+        "total_revenue": 0.0, "avg_completion_rate": 0,
+    }
+    assert 999 not in stats
+
+
+def test_lessons_stats_single_statement(sqlite_db):
+    tutor, student, _, purchase = seed_purchase(sqlite_db, hours=10, expiry_date=date(2030, 1, 1))
+
+    now = datetime(2025, 3, 5, 15, 0)  # mercoledì
+    def lesson(start, status, price="20.00"):
+        return Booking(
+            student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id, start_time=start,
+            end_time=start + timedelta(hours=1), duration_hours=1, subject="math", status=status,
+            calculated_price=Decimal(price)
+        )
+
+    sqlite_db.add_all([
+        lesson(datetime(2025, 3, 5, 9), BookingStatus.COMPLETED),        # oggi
+        lesson(datetime(2025, 3, 5, 23, 30), BookingStatus.CONFIRMED),   # oggi, sera
+        lesson(datetime(2025, 3, 3, 0, 0), BookingStatus.COMPLETED, "30.00"),  # lunedì 00:00
+        lesson(datetime(2025, 3, 2, 18), BookingStatus.CANCELLED),       # settimana precedente
+        lesson(datetime(2025, 3, 6, 10), BookingStatus.PENDING),         # domani
+    ])
+    sqlite_db.commit()
+
+    with count_queries(sqlite_db.get_bind()) as queries:
+        stats = AdminLessonService.get_lessons_stats(sqlite_db, now=now)
 
-def test_placeholder():
-    # placeholder test until admin services tests are implemented with proper fixtures
-    assert True
+    assert len(queries) == 1
+    assert stats == {
+        "total_lessons": 5,
+        "pending_lessons": 1,
+        "confirmed_lessons": 1,
+        "completed_lessons": 2,
+        "cancelled_lessons": 1,
+        "completed_revenue": 50.0,
+        "today_lessons": 2,
+        "week_lessons": 4,
+        "completion_rate": 40.0,
+        "cancellation_rate": 20.0,
+    }
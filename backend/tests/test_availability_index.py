@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, time
+
+from app.bookings.availability import TutorAvailabilityIndex, availability_index
+from app.bookings.models import Booking, BookingStatus
+from app.slots.models import Slot
+
+
+def _day():
+    return (datetime.utcnow() + timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _seed(db, tutor_id=1):
+    day = _day()
+    db.add(Slot(tutor_id=tutor_id, date=day.date(), start_time=time(14), end_time=time(18), is_available=True))
+    booking = Booking(
+        student_id=1, tutor_id=tutor_id, package_purchase_id=1,
+        start_time=day.replace(hour=15), end_time=day.replace(hour=16),
+        duration_hours=1, subject="math", status=BookingStatus.CONFIRMED
+    )
+    db.add(booking)
+    db.commit()
+    return day, booking
+
+
+def test_overlap_and_cover(sqlite_db):
+    day, _ = _seed(sqlite_db)
+    index = availability_index
+
+    assert index.is_available(sqlite_db, 1, day.replace(hour=14), day.replace(hour=15))
+    assert not index.is_available(sqlite_db, 1, day.replace(hour=15, minute=30), day.replace(hour=16, minute=30))
+    assert not index.is_available(sqlite_db, 1, day.replace(hour=17), day.replace(hour=19))
+    assert not index.is_available(sqlite_db, 2, day.replace(hour=14), day.replace(hour=15))
+
+
+def test_batch_preserves_order(sqlite_db):
+    day, _ = _seed(sqlite_db)
+    intervals = [
+        (day.replace(hour=16), day.replace(hour=17)),
+        (day.replace(hour=15), day.replace(hour=16)),
+        (day.replace(hour=17), day.replace(hour=18)),
+    ]
+    assert availability_index.are_available(sqlite_db, 1, intervals) == [True, False, True]
+
+
+def test_incremental_updates_without_reload(sqlite_db):
+    day, booking = _seed(sqlite_db)
+    index = availability_index
+    window = (day.replace(hour=15), day.replace(hour=16))
+
+    assert not index.is_available(sqlite_db, 1, *window)
+    loads = index.loads
+
+    booking.status = BookingStatus.CANCELLED
+    sqlite_db.commit()
+    assert index.is_available(sqlite_db, 1, *window)
+
+    sqlite_db.add(Booking(
+        student_id=2, tutor_id=1, package_purchase_id=1,
+        start_time=window[0], end_time=window[1],
+        duration_hours=1, subject="math", status=BookingStatus.PENDING
+    ))
+    sqlite_db.commit()
+    assert not index.is_available(sqlite_db, 1, *window)
+    assert index.loads == loads
+
+
+def test_rollback_is_not_applied(sqlite_db):
+    day, _ = _seed(sqlite_db)
+    index = availability_index
+    window = (day.replace(hour=16), day.replace(hour=17))
+    assert index.is_available(sqlite_db, 1, *window)
+
+    sqlite_db.add(Booking(
+        student_id=2, tutor_id=1, package_purchase_id=1,
+        start_time=window[0], end_time=window[1],
+        duration_hours=1, subject="math", status=BookingStatus.PENDING
+    ))
+    sqlite_db.flush()
+    sqlite_db.rollback()
+    assert index.is_available(sqlite_db, 1, *window)
+
+
+def test_ttl_expiry_reloads(sqlite_db):
+    day, _ = _seed(sqlite_db)
+    index = TutorAvailabilityIndex(ttl_seconds=0)
+    index.is_available(sqlite_db, 1, day.replace(hour=14), day.replace(hour=15))
+    index.is_available(sqlite_db, 1, day.replace(hour=14), day.replace(hour=15))
+    assert index.loads == 2
+
+
+def test_load_racing_a_commit_is_not_cached(sqlite_db, monkeypatch):
+    day, booking = _seed(sqlite_db)
+    index = TutorAvailabilityIndex()
+    window = (day.replace(hour=15), day.replace(hour=16))
+    load = TutorAvailabilityIndex._load
+
+    def load_then_commit(sqlite_db, tutor_id):
+        state = load(sqlite_db, tutor_id)  # snapshot taken before the concurrent commit
+        index.apply_changes([("booking", booking.id, [tutor_id], None)])
+        return state
+
+    monkeypatch.setattr(TutorAvailabilityIndex, "_load", staticmethod(load_then_commit))
+    assert not index.is_available(sqlite_db, 1, *window)
+    assert index._tutors == {}
+
+    monkeypatch.setattr(TutorAvailabilityIndex, "_load", staticmethod(load))
+    booking.status = BookingStatus.CANCELLED
+    sqlite_db.commit()
+    assert index.is_available(sqlite_db, 1, *window)
+    assert index.loads == 2
@@ -0,0 +1,207 @@
+import asyncio
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.bookings import schemas
+from app.bookings.auto_calculations import BookingAutoCalculations
+from app.bookings.models import Booking, BookingStatus
+from app.bookings.services import EnhancedBookingService
+from app.pricing.audit_log import pricing_audit_log
+from app.pricing.models import LessonType, PricingCalculation, PricingRule
+from app.pricing.rule_table import pricing_table
+from app.slots.models import Slot
+from tests.utils import seed_purchase
+
+
+def _seed(db, hours=2):
+    tutor, student, _, purchase = seed_purchase(db, hours=hours)
+    day = (datetime.utcnow() + timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+    db.add(Slot(tutor_id=tutor.id, date=day.date(), start_time=time(14), end_time=time(19)))
+    db.commit()
+    return tutor, student, purchase, day
+
+
+def _request(tutor, student, purchase, start, hours=1):
+    return schemas.BookingCreate(
+        student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id,
+        start_time=start, end_time=start + timedelta(hours=hours), duration_hours=hours, subject="math"
+    )
+
+
+def _add_math_rule(db, price="30.00"):
+    db.add(PricingRule(
+        name="DOPOSCUOLA_MATH", lesson_type=LessonType.DOPOSCUOLA, subject="math",
+        min_duration=1, base_price_per_hour=Decimal(price), tutor_percentage=Decimal("0.7000")
+    ))
+    db.commit()
+    pricing_table.invalidate()
+
+
+def test_create_booking_commits_once_and_consumes_hours(sqlite_db):
+    tutor, student, purchase, day = _seed(sqlite_db)
+    _add_math_rule(sqlite_db)
+    commits = []
+    event.listen(sqlite_db, "after_commit", lambda session: commits.append(session))
+
+    booking = asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+        sqlite_db, _request(tutor, student, purchase, day.replace(hour=15))
+    ))
+
+    assert booking.id is not None and booking.calculated_price is not None
+    assert len(commits) == 1
+    # Audit row saved by the booking commit itself, not by the deferred writer
+    assert sqlite_db.query(PricingCalculation).filter(PricingCalculation.tutor_id == tutor.id).count() == 1
+    sqlite_db.refresh(purchase)
+    assert (purchase.hours_used, purchase.hours_remaining, purchase.is_active) == (1, 1, True)
+
+
+def test_insufficient_hours_rolls_back_everything(sqlite_db):
+    tutor, student, purchase, day = _seed(sqlite_db, hours=1)
+
+    with pytest.raises(ValueError):
+        asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+            sqlite_db, _request(tutor, student, purchase, day.replace(hour=15), hours=2)
+        ))
+
+    assert sqlite_db.query(Booking).count() == 0
+    sqlite_db.refresh(purchase)
+    assert purchase.hours_remaining == 1
+
+
+def test_rolled_back_booking_leaves_no_pricing_audit_row(sqlite_db, monkeypatch):
+    tutor, student, purchase, day = _seed(sqlite_db)
+    _add_math_rule(sqlite_db)
+
+    async def lost_race(booking, sqlite_db, operation="consume", commit=True):
+        return False  # hours consumed by a concurrent booking after pricing
+
+    monkeypatch.setattr(BookingAutoCalculations, "auto_update_package_consumption", staticmethod(lost_race))
+    with pytest.raises(ValueError, match="Not enough hours"):
+        asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+            sqlite_db, _request(tutor, student, purchase, day.replace(hour=15))
+        ))
+
+    pricing_audit_log.flush()
+    assert sqlite_db.query(Booking).count() == 0
+    assert sqlite_db.query(PricingCalculation).count() == 0
+
+
+def test_cancel_refunds_in_same_transaction(sqlite_db):
+    tutor, student, purchase, day = _seed(sqlite_db)
+    booking = asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+        sqlite_db, _request(tutor, student, purchase, day.replace(hour=15), hours=2)
+    ))
+    sqlite_db.refresh(purchase)
+    assert (purchase.hours_remaining, purchase.is_active) == (0, False)
+
+    cancelled = asyncio.run(EnhancedBookingService.cancel_booking_with_auto_refund(sqlite_db, booking.id))
+
+    assert cancelled.status == BookingStatus.CANCELLED
+    sqlite_db.refresh(purchase)
+    assert (purchase.hours_used, purchase.hours_remaining, purchase.is_active) == (0, 2, True)
+
+
+def test_bulk_recalculate_chunks_dry_run_and_diff(sqlite_db):
+    tutor, student, purchase, day = _seed(sqlite_db, hours=10)
+    ids = [
+        asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+            sqlite_db, _request(tutor, student, purchase, day.replace(hour=hour))
+        )).id
+        for hour in (14, 15, 16)
+    ]
+    assert sqlite_db.query(Booking).filter(Booking.calculated_price == Decimal("25.00")).count() == 3
+
+    _add_math_rule(sqlite_db)
+    progress = []
+
+    preview = asyncio.run(EnhancedBookingService.bulk_recalculate_bookings(
+        sqlite_db, ids + [999], dry_run=True, chunk_size=2, progress_callback=lambda done, total: progress.append(done)
+    ))
+    assert (preview["processed"], preview["updated"]) == (3, 3)
+    assert preview["errors"] == ["Booking 999 not found"]
+    assert preview["diff"]["total_price_delta"] == 15.0
+    assert progress == [2, 4]
+    assert sqlite_db.query(Booking).filter(Booking.calculated_price == Decimal("25.00")).count() == 3
+
+    applied = asyncio.run(EnhancedBookingService.bulk_recalculate_bookings(sqlite_db, ids))
+    assert applied["updated"] == 3
+    sqlite_db.expire_all()
+    assert sqlite_db.query(Booking).filter(Booking.calculated_price == Decimal("30.00")).count() == 3
+    assert asyncio.run(EnhancedBookingService.bulk_recalculate_bookings(sqlite_db, ids))["updated"] == 0
+
+
+def test_booking_analytics_matches_python_metrics(sqlite_db):
+    from app.bookings.auto_calculations import calculate_booking_metrics
+
+    empty = asyncio.run(EnhancedBookingService.get_booking_analytics(sqlite_db))
+    assert empty["total_bookings"] == 0 and empty["avg_price_per_hour"] == 0
+
+    tutor, student, purchase, day = _seed(sqlite_db, hours=10)
+    for hour, status in ((14, BookingStatus.COMPLETED), (15, BookingStatus.COMPLETED), (17, BookingStatus.CANCELLED), (18, None)):
+        booking = asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+            sqlite_db, _request(tutor, student, purchase, day.replace(hour=hour))
+        ))
+        if status:
+            booking.status = status
+    sqlite_db.commit()
+
+    analytics = asyncio.run(EnhancedBookingService.get_booking_analytics(sqlite_db, tutor_id=tutor.id))
+    expected = calculate_booking_metrics(sqlite_db.query(Booking).all())
+    assert {key: analytics[key] for key in expected} == expected
+    assert analytics["avg_price_per_hour"] == 25.0
+
+
+def test_overlap_constraint_violation_maps_to_slot_unavailable(sqlite_db, monkeypatch):
+    from sqlalchemy.exc import IntegrityError
+
+    class ExclusionViolation(Exception):
+        pgcode = "23P01"
+
+    rejected = []
+
+    def reject_insert(mapper, connection, target):
+        rejected.append(target)
+        raise IntegrityError("INSERT INTO bookings ...", {}, ExclusionViolation())
+
+    tutor, student, purchase, day = _seed(sqlite_db)
+    asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+        sqlite_db, _request(tutor, student, purchase, day.replace(hour=15))
+    ))
+    # Percorso PostgreSQL: nessun check applicativo sui booking, decide il vincolo
+    monkeypatch.setattr(EnhancedBookingService, "_uses_overlap_constraint", staticmethod(lambda sqlite_db: True))
+    event.listen(Booking, "before_insert", reject_insert)
+    try:
+        with pytest.raises(ValueError, match="Time slot not available"):
+            asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+                sqlite_db, _request(tutor, student, purchase, day.replace(hour=15))
+            ))
+    finally:
+        event.remove(Booking, "before_insert", reject_insert)
+
+    assert len(rejected) == 1
+    assert sqlite_db.query(Booking).count() == 1
+    sqlite_db.refresh(purchase)
+    assert purchase.hours_remaining == 1
+
+
+def test_booking_a_recurring_occurrence_materializes_its_slot(sqlite_db):
+    from app.slots.services import SlotService
+
+    tutor, student, purchase, day = _seed(sqlite_db)
+    next_day = day + timedelta(days=1)
+    asyncio.run(SlotService.create_recurring_availability(
+        sqlite_db, tutor.id, next_day.weekday(), time(9), time(12), next_day.date()
+    ))
+
+    booking = asyncio.run(EnhancedBookingService.create_booking_with_auto_calculations(
+        sqlite_db, _request(tutor, student, purchase, next_day.replace(hour=10))
+    ))
+
+    stored = sqlite_db.query(Slot).filter(Slot.date == next_day.date()).all()
+    assert [(s.start_time, s.end_time, s.recurring_availability_id is not None) for s in stored] == [(time(9), time(12), True)]
+    listed = asyncio.run(SlotService.get_available_slots(sqlite_db, tutor.id, next_day.date()))
+    assert [s.id for s in listed] == [stored[0].id]
+    assert booking.status == BookingStatus.PENDING
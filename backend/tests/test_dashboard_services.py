@@ -0,0 +1,195 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.bookings.models import Booking, BookingStatus
+from app.core.cache import InMemoryLRUCache
+from app.dashboard.cache import DashboardCache
+from app.dashboard.context import DashboardContext
+from app.dashboard.services import DashboardRealTimeService
+from app.packages.models import PackagePurchase
+from tests.utils import add_tutor, seed_purchase
+
+
+def _seed(db, now):
+    tutors = [add_tutor(db, email=f"t{n}@example.com", last_name=str(n)) for n in (1, 2)]
+    _, student, _, purchase = seed_purchase(db, expiry_date=now.date() + timedelta(days=30), tutor=tutors[0])
+
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = [
+        # (tutor, start hour offset from midnight, hours, status, price)
+        (tutors[0], 8, 2, BookingStatus.COMPLETED, "50.00"),
+        (tutors[1], 9, 1, BookingStatus.COMPLETED, "30.00"),
+        (tutors[0], 11, 2, BookingStatus.CONFIRMED, None),   # in corso alle 12
+        (tutors[1], 15, 1, BookingStatus.PENDING, None),     # prossima
+        (tutors[1], 16, 1, BookingStatus.CANCELLED, None),
+        (tutors[0], 24 + 9, 1, BookingStatus.COMPLETED, "99.00"),  # domani: esclusa
+        (tutors[0], -2, 1, BookingStatus.COMPLETED, "99.00"),      # ieri: esclusa
+    ]
+    for tutor, offset, hours, status, price in rows:
+        start = day_start + timedelta(hours=offset)
+        db.add(Booking(
+            student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id,
+            start_time=start, end_time=start + timedelta(hours=hours), duration_hours=hours,
+            calculated_duration=hours, subject="math", status=status,
+            calculated_price=Decimal(price) if price else None,
+            tutor_earnings=Decimal(price) * Decimal("0.7") if price else None,
+            platform_fee=Decimal(price) * Decimal("0.3") if price else None,
+        ))
+    db.commit()
+
+
+def test_today_dashboard_is_one_aggregate_query(sqlite_db):
+    now = datetime.combine(date.today(), datetime.min.time()).replace(hour=12)
+    _seed(sqlite_db, now)
+
+    statements = []
+    event.listen(sqlite_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    today = asyncio.run(DashboardRealTimeService.get_today_live_dashboard(sqlite_db, now=now))
+
+    assert len(statements) == 1
+    assert "date(" not in statements[0].lower()
+    assert (
+        today["lessons_total"], today["lessons_completed"], today["lessons_ongoing"],
+        today["lessons_upcoming"], today["lessons_cancelled"]
+    ) == (5, 2, 1, 1, 1)
+    assert today["revenue_today"] == 80.0
+    assert today["tutor_earnings_today"] == 56.0
+    assert today["total_hours_today"] == 3
+    assert (today["active_tutors_today"], today["active_students_today"]) == (2, 1)
+    assert today["avg_lesson_price"] == 40.0
+    assert (today["completion_rate"], today["cancellation_rate"]) == (40.0, 20.0)
+
+    later = asyncio.run(DashboardRealTimeService.get_today_live_dashboard(sqlite_db, now=now.replace(hour=15, minute=30)))
+    assert (later["lessons_ongoing"], later["lessons_upcoming"]) == (0, 0)
+
+
+def test_today_dashboard_empty_day(sqlite_db):
+
+    today = asyncio.run(DashboardRealTimeService.get_today_live_dashboard(sqlite_db))
+
+    assert today["lessons_total"] == 0 and today["revenue_today"] == 0.0
+    assert today["completion_rate"] == 0 and today["avg_lesson_price"] == 0
+
+
+def test_today_hours_fall_back_to_booked_duration(sqlite_db):
+    now = datetime.combine(date.today(), datetime.min.time()).replace(hour=12)
+    _seed(sqlite_db, now)
+    # Durata calcolata a 0 (mai ricalcolata): conta la durata prenotata, come prima
+    sqlite_db.query(Booking).filter(Booking.duration_hours == 2).update({"calculated_duration": 0})
+    sqlite_db.commit()
+
+    today = asyncio.run(DashboardRealTimeService.get_today_live_dashboard(sqlite_db, now=now))
+
+    assert today["total_hours_today"] == 3
+
+
+def test_context_alerts_reuse_widget_results(sqlite_db):
+    now = datetime.combine(date.today(), datetime.min.time()).replace(hour=12)
+    _seed(sqlite_db, now)
+    purchase = sqlite_db.query(PackagePurchase).first()
+    purchase.expiry_date = now.date() + timedelta(days=1)
+    sqlite_db.commit()
+
+    context = DashboardContext(sqlite_db, now=now)
+    asyncio.run(context.today())
+    asyncio.run(context.expiring_packages(days_ahead=7))
+    asyncio.run(context.tutor_performance())
+
+    statements = []
+    event.listen(sqlite_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    alerts = asyncio.run(context.alerts())
+
+    assert statements == []
+    assert context.computed == 4
+    assert [alert["category"] for alert in alerts["alerts"]] == ["packages"]
+    assert alerts["alerts"][0]["data"][0]["purchase_id"] == purchase.id
+
+
+def test_cache_shares_one_computation_and_invalidates_on_commit(sqlite_db):
+    now = datetime.combine(date.today(), datetime.min.time()).replace(hour=12)
+    _seed(sqlite_db, now)
+    cache = DashboardCache(backend=InMemoryLRUCache(16), interval_seconds=3600)
+
+    statements = []
+    event.listen(sqlite_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    results = [asyncio.run(DashboardContext(sqlite_db, now=now, cache=cache).today()) for _ in range(5)]
+    assert len(statements) == 1
+    assert (cache.hits, cache.misses) == (4, 1)
+    results[0]["lessons_total"] = -1
+    assert asyncio.run(DashboardContext(sqlite_db, now=now, cache=cache).today())["lessons_total"] == 5
+
+    # Il commit di un booking invalida la cache globale
+    from app.dashboard.cache import dashboard_cache
+    asyncio.run(DashboardContext(sqlite_db, now=now, cache=dashboard_cache).today())
+    booking = sqlite_db.query(Booking).filter(Booking.status == BookingStatus.PENDING).first()
+    booking.status = BookingStatus.CONFIRMED
+    sqlite_db.commit()
+    assert len(dashboard_cache.backend) == 0
+
+
+def test_cache_single_flight_for_concurrent_requests():
+    cache = DashboardCache(backend=InMemoryLRUCache(16), interval_seconds=3600)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("widget", compute) for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 10
+    assert cache.invalidate() == 1
+
+
+def test_stream_pushes_one_delta_per_change_and_idles_without_subscribers(sqlite_engine):
+    import json
+    from app.dashboard.cache import dashboard_cache
+    from app.dashboard.stream import DashboardBroadcaster
+
+    SessionTest = sessionmaker(bind=sqlite_engine)
+    db = SessionTest()
+    now = datetime.now()
+    _seed(db, now)
+    dashboard_cache.invalidate()
+    broadcaster = DashboardBroadcaster(
+        cache=dashboard_cache, session_factory=SessionTest, debounce_seconds=0, tick_seconds=3600
+    )
+
+    async def scenario():
+        queues = [broadcaster.subscribe() for _ in range(3)]
+        snapshot = await broadcaster.current()
+        while broadcaster.computations < 1 or not broadcaster._last:
+            await asyncio.sleep(0.01)
+
+        booking = db.query(Booking).filter(Booking.status == BookingStatus.PENDING).first()
+        booking.status = BookingStatus.CANCELLED
+        db.commit()
+
+        messages = [await asyncio.wait_for(queue.get(), timeout=2) for queue in queues]
+        for queue in queues:
+            broadcaster.unsubscribe(queue)
+        return snapshot, messages
+
+    snapshot, messages = asyncio.run(scenario())
+
+    assert snapshot["today"]["lessons_cancelled"] == 1
+    assert len(set(messages)) == 1
+    event_line, data_line = messages[0].strip().split("\n")
+    delta = json.loads(data_line[len("data: "):])
+    assert event_line == "event: delta"
+    assert delta["today"]["lessons_cancelled"] == 2
+    assert "expiring_packages" not in delta
+    computations = broadcaster.computations
+    assert computations <= 3
+
+    dashboard_cache.invalidate()
+    assert broadcaster.subscriber_count == 0 and broadcaster.computations == computations
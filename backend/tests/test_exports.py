@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.admin.services import AdminListingService
+from app.core.export import iter_export
+from app.bookings.models import Booking, BookingStatus
+from tests.utils import add_student, add_tutor, seed_purchase
+
+
+def _seed(db, lessons):
+    tutor, student, _, purchase = seed_purchase(
+        db, expiry_date=date(2025, 12, 31),
+        tutor=add_tutor(db, first_name="Marco", last_name="Rossi"),
+        student=add_student(db, first_name="Giulia", last_name="Bianchi")
+    )
+    base = datetime(2025, 1, 6, 9, 0)
+    db.add_all([
+        Booking(
+            student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id,
+            start_time=base + timedelta(days=i), end_time=base + timedelta(days=i, hours=1), duration_hours=1,
+            subject="math", status=BookingStatus.COMPLETED if i % 2 else BookingStatus.CONFIRMED,
+            calculated_price=Decimal("25.50")
+        )
+        for i in range(lessons)
+    ])
+    db.commit()
+
+
+def _export(db, fmt, fields=None, batch_size=2, **filters):
+    projection = AdminListingService.LESSON_FIELDS
+    names = projection.parse_fields(fields)
+    query = projection.select(AdminListingService.lessons_query(db, **filters), names).order_by(projection.columns["id"])
+    return list(iter_export(query.statement, names, fmt, db.get_bind(), batch_size=batch_size))
+
+
+def test_csv_export_is_chunked_per_batch(sqlite_db):
+    _seed(sqlite_db, lessons=5)
+
+    chunks = _export(sqlite_db, "csv", fields="start_time,status,calculated_price,student.last_name")
+    # header + 2 + 2 rows, then the last row
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "start_time", "status", "calculated_price", "student.last_name"]
+    assert rows[1] == ["1", "2025-01-06T09:00:00", "confirmed", "25.50", "Bianchi"]
+    assert len(rows) == 6
+
+
+def test_ndjson_export_nests_joined_fields_and_applies_filters(sqlite_db):
+    _seed(sqlite_db, lessons=4)
+
+    lines = b"".join(_export(sqlite_db, "ndjson", status="completed")).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["status"] for r in records] == ["completed", "completed"]
+    assert records[0]["tutor"] == {"first_name": "Marco", "last_name": "Rossi"}
+    assert records[0]["calculated_price"] == 25.5
+
+    assert _export(sqlite_db, "ndjson", status="completed", date_from="2030-01-01") == []
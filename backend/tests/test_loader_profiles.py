@@ -0,0 +1,86 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from app.admin import routes as admin_routes
+from app.admin.models import AdminPackageAssignment
+from app.core.loader_profiles import apply_profile
+from app.dashboard.services import DashboardRealTimeService
+from app.packages.models import Package, PackagePurchase, PackageRequest
+from app.users.models import User, UserRole
+from tests.utils import add_student, add_tutor, count_queries
+
+
+class _Seeder:
+    def __init__(self, db):
+        self.db = db
+        admin = User(email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+        db.add(admin)
+        db.flush()
+        self.admin_id = admin.id
+        self.package_id = None
+        self.count = 0
+
+    def add(self):
+        """One more tutor, student, package request, assignment and expiring purchase"""
+        db, n = self.db, self.count
+        self.count += 1
+        tutor = add_tutor(db, email=f"tutor{n}@example.com", first_name=f"T{n}")
+        student = add_student(db, email=f"student{n}@example.com", first_name=f"S{n}")
+        if self.package_id is None:
+            package = Package(tutor_id=tutor.id, name="Pacchetto", total_hours=10, price=100, subject="math")
+            db.add(package)
+            db.flush()
+            self.package_id = package.id
+        db.add_all([
+            PackageRequest(
+                tutor_id=tutor.id, requested_name=f"R{n}", requested_subject="math",
+                requested_description="d", requested_total_hours=10
+            ),
+            AdminPackageAssignment(
+                student_id=student.id, tutor_id=tutor.id, package_id=self.package_id,
+                assigned_by_admin_id=self.admin_id, hours_remaining=10
+            ),
+            PackagePurchase(
+                student_id=student.id, package_id=self.package_id, expiry_date=date.today() + timedelta(days=1),
+                hours_used=2, hours_remaining=8
+            ),
+        ])
+        db.commit()
+        db.expunge_all()  # nothing already in the identity map
+
+
+def _queries(db, call):
+    with count_queries(db.get_bind()) as queries:
+        result = asyncio.run(call())
+    return len(queries), result
+
+
+@pytest.mark.parametrize("endpoint", ["package_requests", "package_assignments", "expiring_packages"])
+def test_queries_do_not_grow_with_rows(sqlite_db, endpoint):
+    seeder = _Seeder(sqlite_db)
+    calls = {
+        "package_requests": lambda: admin_routes.get_package_requests(db=sqlite_db, admin_user=None),
+        "package_assignments": lambda: admin_routes.get_package_assignments(seeder.package_id, db=sqlite_db, admin_user=None),
+        "expiring_packages": lambda: DashboardRealTimeService.get_expiring_packages_widget(sqlite_db),
+    }
+
+    seeder.add()
+    single, _ = _queries(sqlite_db, calls[endpoint])
+    for _ in range(4):
+        seeder.add()
+    many, result = _queries(sqlite_db, calls[endpoint])
+
+    assert many == single
+    if endpoint == "expiring_packages":
+        assert result["total_expiring"] == 5
+    else:
+        assert len(result) == 5
+    if endpoint == "package_requests":
+        assert {r["tutor_email"] for r in result} == {f"tutor{n}@example.com" for n in range(5)}
+
+
+def test_unknown_profile(sqlite_db):
+    with pytest.raises(ValueError):
+        apply_profile(sqlite_db.query(PackageRequest), "nope")
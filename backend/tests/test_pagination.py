@@ -0,0 +1,92 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.bookings.models import Booking, BookingStatus
+from app.bookings.services import BookingService
+from app.payments.models import Payment
+from app.payments.services import PaymentService
+from app.users.models import User, UserRole
+from tests.utils import count_queries, seed_purchase
+
+
+def _seed(db, base=datetime(2025, 3, 3, 9, 0)):
+    tutor, student, _, purchase = seed_purchase(db, expiry_date=date(2025, 12, 31))
+    # Due lezioni per slot: l'ordinamento deve spezzare i pareggi su id
+    db.add_all([
+        Booking(
+            student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id, start_time=base + timedelta(days=day),
+            end_time=base + timedelta(days=day, hours=1), duration_hours=1, subject="math",
+            status=BookingStatus.CONFIRMED
+        )
+        for day in (3, 1, 2, 0, 4) for _ in range(2)
+    ])
+    db.commit()
+    return tutor, student
+
+
+def _walk(fetch, limit):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(fetch(limit, cursor))
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_are_stable_and_complete(sqlite_db):
+    tutor, student = _seed(sqlite_db)
+    expected = [b.id for b in sqlite_db.query(Booking).order_by(Booking.start_time, Booking.id)]
+
+    pages = _walk(lambda limit, cursor: BookingService.get_student_bookings(sqlite_db, student.id, limit=limit, cursor=cursor), 3)
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert [b.id for page in pages for b in page] == expected
+
+    # skip/limit keeps working, same order, and hands out a cursor to continue from
+    offset_page = asyncio.run(BookingService.get_tutor_bookings(sqlite_db, tutor.id, skip=3, limit=3))
+    assert [b.id for b in offset_page] == expected[3:6]
+    rest = asyncio.run(BookingService.get_tutor_bookings(sqlite_db, tutor.id, limit=10, cursor=offset_page.next_cursor))
+    assert [b.id for b in rest] == expected[6:]
+    assert rest.next_cursor is None
+
+
+
+def test_upcoming_bookings_for_a_user_are_cursor_paginated(sqlite_db):
+    tutor, _ = _seed(sqlite_db, base=datetime.utcnow() + timedelta(days=1))
+    expected = [b.id for b in sqlite_db.query(Booking).order_by(Booking.start_time, Booking.id)]
+
+    pages = _walk(lambda limit, cursor: BookingService.get_upcoming_bookings(sqlite_db, tutor.id, "tutor", limit=limit, cursor=cursor), 4)
+    assert [b.id for page in pages for b in page] == expected
+    with pytest.raises(InvalidCursor):
+        asyncio.run(BookingService.get_upcoming_bookings(sqlite_db, tutor.id, "tutor", cursor="not-a-cursor"))
+
+def test_deep_pages_use_keyset_not_offset(sqlite_db):
+    _seed(sqlite_db)
+    page = asyncio.run(BookingService.get_student_bookings(sqlite_db, 1, limit=2))
+    with count_queries(sqlite_db.get_bind()) as queries:
+        asyncio.run(BookingService.get_student_bookings(sqlite_db, 1, limit=2, cursor=page.next_cursor))
+    assert len(queries) == 1
+    statement, parameters = queries.statements[0], queries.parameters[0]
+    assert "bookings.start_time > ?" in statement
+    # SQLite always renders "LIMIT ? OFFSET ?": the offset must be 0, not 2
+    assert tuple(parameters[-2:]) == (3, 0)
+
+
+def test_payments_newest_first_and_invalid_cursor(sqlite_db):
+    user = User(email="p@example.com", hashed_password="x", role=UserRole.STUDENT)
+    sqlite_db.add(user)
+    sqlite_db.flush()
+    created = datetime(2025, 1, 1, 12, 0)
+    sqlite_db.add_all([Payment(user_id=user.id, amount_cents=100 * i, created_at=created) for i in range(1, 6)])
+    sqlite_db.commit()
+
+    pages = _walk(lambda limit, cursor: PaymentService.list(sqlite_db, limit=limit, cursor=cursor), 2)
+    assert [p.amount_cents for page in pages for p in page] == [500, 400, 300, 200, 100]
+
+    assert decode_cursor(encode_cursor([created, 7]), 2) == [created, 7]
+    for bad in ("not-a-cursor", encode_cursor([1]), encode_cursor([{"x": 1}, 2])):
+        with pytest.raises(InvalidCursor):
+            asyncio.run(PaymentService.list(sqlite_db, cursor=bad))
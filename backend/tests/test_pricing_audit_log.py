@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from app.pricing.audit_log import PricingAuditLogWriter, build_calculation_record
+from app.pricing.models import PricingCalculation
+from tests.utils import make_sqlite_engine
+
+
+def _result(tutor_id=1):
+    return {
+        "lesson_type": "doposcuola", "subject": "Matematica", "duration_hours": 2, "tutor_id": tutor_id,
+        "base_price_per_hour": 25.0, "total_base_price": 50.0, "volume_discount_rate": 0.0,
+        "final_total_price": 50.0, "tutor_earnings": 35.0, "platform_fee": 15.0, "tutor_percentage": 0.7,
+    }
+
+
+def _session_factory():
+    return sessionmaker(bind=make_sqlite_engine())
+
+
+def test_records_are_bulk_inserted_on_flush():
+    Session = _session_factory()
+    writer = PricingAuditLogWriter(session_factory=Session, batch_size=2, flush_seconds=60)
+    writer._ensure_started = lambda: None  # flush explicitly, no background thread
+
+    for tutor_id in range(5):
+        assert writer.submit(build_calculation_record(_result(tutor_id)))
+    assert writer.flush() == 5
+
+    with Session() as db:
+        rows = db.query(PricingCalculation).all()
+    assert len(rows) == 5
+    assert rows[0].final_total_price == Decimal("50.00")
+    assert writer.stats()["flushes"] == 3
+
+
+def test_full_queue_drops_and_counts():
+    writer = PricingAuditLogWriter(session_factory=_session_factory(), max_queue_size=1)
+    writer._ensure_started = lambda: None
+
+    assert writer.submit(build_calculation_record(_result()))
+    assert not writer.submit(build_calculation_record(_result()))
+    assert writer.stats()["dropped"] == 1
+
+
+def test_shutdown_flushes_pending_records():
+    Session = _session_factory()
+    writer = PricingAuditLogWriter(session_factory=Session, batch_size=100, flush_seconds=60)
+    writer.submit(build_calculation_record(_result()))
+    writer.shutdown()
+
+    with Session() as db:
+        assert db.query(PricingCalculation).count() == 1
+    assert writer.stats()["queued"] == 0
+
+
+def test_records_are_written_to_the_submitting_bind():
+    default, other = _session_factory(), _session_factory()
+    writer = PricingAuditLogWriter(session_factory=default, batch_size=10, flush_seconds=60)
+    writer._ensure_started = lambda: None
+
+    writer.submit(build_calculation_record(_result(1)), bind=other.kw["bind"])
+    writer.submit(build_calculation_record(_result(2)))
+    assert writer.flush() == 2
+
+    with other() as db:
+        assert [row.tutor_id for row in db.query(PricingCalculation)] == [1]
+    with default() as db:
+        assert [row.tutor_id for row in db.query(PricingCalculation)] == [2]
+    assert writer.stats()["failed"] == 0
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.pricing.models import LessonType, PricingRule, TutorPricingOverride
+from app.pricing.rule_table import PricingRuleTable, pricing_table
+from app.pricing.services import PricingService
+
+
+def _seed(db):
+    general = PricingRule(
+        name="DOPOSCUOLA_MATEMATICA", lesson_type=LessonType.DOPOSCUOLA, subject="Matematica",
+        min_duration=1, max_duration=None, base_price_per_hour=Decimal("25.00"),
+        tutor_percentage=Decimal("0.7000"), volume_discounts={"4": 0.05, "8_hours": 0.10}, priority=100
+    )
+    short_only = PricingRule(
+        name="DOPOSCUOLA_MATEMATICA_BREVE", lesson_type=LessonType.DOPOSCUOLA, subject="Matematica",
+        min_duration=1, max_duration=2, base_price_per_hour=Decimal("20.00"),
+        tutor_percentage=Decimal("0.7000"), priority=10
+    )
+    db.add_all([general, short_only])
+    db.flush()
+    db.add(TutorPricingOverride(
+        tutor_id=7, pricing_rule_id=general.id, custom_price_per_hour=Decimal("30.00"),
+        valid_from=datetime.utcnow() - timedelta(days=1), valid_until=datetime.utcnow() + timedelta(days=1)
+    ))
+    db.add(TutorPricingOverride(
+        tutor_id=8, pricing_rule_id=general.id, custom_price_per_hour=Decimal("99.00"),
+        valid_from=datetime.utcnow() + timedelta(days=1)
+    ))
+    db.commit()
+
+
+def _price(db, hours, tutor_id=1):
+    return asyncio.run(PricingService.calculate_lesson_price(
+        lesson_type="doposcuola", subject="Matematica", duration_hours=hours,
+        tutor_id=tutor_id, db=db, log_calculation=False
+    ))
+
+
+def test_lookup_priority_duration_and_discounts(sqlite_db):
+    _seed(sqlite_db)
+
+    assert _price(sqlite_db, 2)["applied_rule_name"] == "DOPOSCUOLA_MATEMATICA_BREVE"
+    four = _price(sqlite_db, 4)
+    assert four["applied_rule_name"] == "DOPOSCUOLA_MATEMATICA"
+    assert four["volume_discount_rate"] == 0.05
+    assert _price(sqlite_db, 8)["volume_discount_rate"] == 0.10
+
+
+def test_overrides_respect_validity_window(sqlite_db):
+    _seed(sqlite_db)
+
+    assert _price(sqlite_db, 3, tutor_id=7)["base_price_per_hour"] == 30.0
+    assert _price(sqlite_db, 3, tutor_id=8)["base_price_per_hour"] == 25.0
+
+
+def test_warm_table_runs_without_queries_and_rebuilds_on_change(sqlite_db):
+    _seed(sqlite_db)
+    _price(sqlite_db, 3)
+
+    statements = []
+    event.listen(sqlite_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    _price(sqlite_db, 3, tutor_id=7)
+    assert statements == []
+
+    rule = sqlite_db.query(PricingRule).filter(PricingRule.name == "DOPOSCUOLA_MATEMATICA").first()
+    rule.base_price_per_hour = Decimal("40.00")
+    sqlite_db.commit()
+    assert _price(sqlite_db, 3)["base_price_per_hour"] == 40.0
+
+
+
+def test_load_racing_a_commit_is_not_cached(sqlite_db, monkeypatch):
+    _seed(sqlite_db)
+    load = PricingRuleTable.load.__func__
+
+    def load_then_commit(cls, db):
+        table = load(cls, db)  # snapshot taken before the concurrent commit
+        rule = db.query(PricingRule).filter(PricingRule.name == "DOPOSCUOLA_MATEMATICA").first()
+        rule.base_price_per_hour = Decimal("40.00")
+        db.commit()
+        return table
+
+    monkeypatch.setattr(PricingRuleTable, "load", classmethod(load_then_commit))
+    assert _price(sqlite_db, 3)["base_price_per_hour"] == 25.0
+
+    monkeypatch.setattr(PricingRuleTable, "load", classmethod(load))
+    assert _price(sqlite_db, 3)["base_price_per_hour"] == 40.0
+
+def test_quote_many_keeps_order_and_reports_item_errors(sqlite_db):
+    _seed(sqlite_db)
+    builds = pricing_table.builds
+
+    items = asyncio.run(PricingService.quote_many(sqlite_db, [
+        {"lesson_type": "doposcuola", "subject": "Matematica", "duration_hours": 4, "tutor_id": 7},
+        {"lesson_type": "doposcuola", "subject": "Latino", "duration_hours": 1, "tutor_id": 1},
+        {"lesson_type": "teatro", "subject": "Matematica", "duration_hours": 1, "tutor_id": 1},
+        {"lesson_type": "doposcuola", "subject": "Matematica", "duration_hours": 1, "tutor_id": 1},
+    ]))
+
+    assert [item["index"] for item in items] == [0, 1, 2, 3]
+    assert [item["success"] for item in items] == [True, False, False, True]
+    assert items[0]["result"]["has_override"] is True
+    assert "No pricing rule found" in items[1]["error"]
+    assert "Invalid lesson_type" in items[2]["error"]
+    assert pricing_table.builds == builds + 1
@@ -0,0 +1,61 @@
+from sqlalchemy.orm import sessionmaker
+
+from app.auth.principal_cache import PrincipalCache, principal_cache
+from app.users.models import UserRole
+from tests.utils import add_student, count_queries
+
+
+def _seed(db):
+    student = add_student(db, first_name="Ada", last_name="L")
+    db.commit()
+    return student.user_id
+
+
+def test_hit_attaches_without_queries(sqlite_engine):
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as db:
+        user_id = _seed(db)
+
+    with Session() as db:
+        principal_cache.get_user(db, "student@example.com")
+        principal_cache.get_profile(db, "student", user_id)
+
+    with count_queries(sqlite_engine) as queries, Session() as db:
+        user = principal_cache.get_user(db, "student@example.com")
+        student = principal_cache.get_profile(db, "student", user_id)
+        assert user in db and student in db
+        assert user.role == UserRole.STUDENT and student.first_name == "Ada"
+    assert len(queries) == 0
+
+
+def test_orm_update_invalidates_on_commit(sqlite_engine):
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as db:
+        _seed(db)
+
+    with Session() as db:
+        user = principal_cache.get_user(db, "student@example.com")
+        user.is_active = False
+        db.commit()
+
+    with Session() as db:
+        assert principal_cache.get_user(db, "student@example.com").is_active is False
+
+
+def test_explicit_invalidation_and_ttl(sqlite_engine):
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as db:
+        user_id = _seed(db)
+        principal_cache.get_user(db, "student@example.com")
+
+    with count_queries(sqlite_engine) as queries:
+        principal_cache.invalidate_user(user_id)
+        with Session() as db:
+            principal_cache.get_user(db, "student@example.com")
+        assert len(queries) == 1
+
+        disabled = PrincipalCache(ttl_seconds=0)
+        with Session() as db:
+            disabled.get_user(db, "student@example.com")
+            disabled.get_user(db, "student@example.com")
+        assert len(queries) == 3
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.analytics.models import BookingDailyRollup, PaymentDailyRollup
+from app.analytics.rollups import rebuild_booking_rollups, rebuild_payment_rollups
+from app.bookings.models import Booking, BookingStatus
+from app.dashboard.services import DashboardRealTimeService
+from app.payments.models import Payment
+from tests.utils import seed_purchase
+
+
+def _seed(db):
+    tutor, student, _, purchase = seed_purchase(db)
+    db.commit()
+    return tutor, student, purchase
+
+
+def _booking(tutor, student, purchase, start, subject="math", status=BookingStatus.PENDING, price="25.00"):
+    return Booking(
+        student_id=student.id, tutor_id=tutor.id, package_purchase_id=purchase.id,
+        start_time=start, end_time=start + timedelta(hours=1), duration_hours=1, subject=subject,
+        status=status, calculated_price=Decimal(price), tutor_earnings=Decimal(price) * Decimal("0.7"),
+        platform_fee=Decimal(price) * Decimal("0.3")
+    )
+
+
+def _snapshot(db):
+    bookings = sorted(
+        (row.day, row.tutor_id, row.subject, row.status, row.lesson_count, row.hours, row.revenue)
+        for row in db.query(BookingDailyRollup).filter(BookingDailyRollup.lesson_count != 0)
+    )
+    payments = sorted(
+        (row.day, row.status, row.payment_count, row.amount_cents)
+        for row in db.query(PaymentDailyRollup).filter(PaymentDailyRollup.payment_count != 0)
+    )
+    return bookings, payments
+
+
+def test_incremental_rollups_match_rebuild(sqlite_db):
+    tutor, student, purchase = _seed(sqlite_db)
+    monday = date.today() - timedelta(days=date.today().weekday())
+    base = datetime.combine(monday, datetime.min.time())
+    bookings = [
+        _booking(tutor, student, purchase, base + timedelta(hours=9)),
+        _booking(tutor, student, purchase, base + timedelta(hours=10), status=BookingStatus.COMPLETED),
+        _booking(tutor, student, purchase, base + timedelta(days=1, hours=9), subject="physics"),
+    ]
+    payments = [
+        Payment(user_id=student.user_id, amount_cents=1000, status="pending"),
+        Payment(user_id=student.user_id, amount_cents=2500, status="succeeded"),
+    ]
+    sqlite_db.add_all(bookings + payments)
+    sqlite_db.commit()
+
+    bookings[0].status = BookingStatus.COMPLETED
+    bookings[2].start_time = base + timedelta(days=2, hours=9)
+    bookings[2].end_time = base + timedelta(days=2, hours=10)
+    payments[0].status = "succeeded"
+    sqlite_db.commit()
+    sqlite_db.delete(bookings[1])
+    sqlite_db.commit()
+
+    # Una transazione annullata non lascia traccia nei rollup
+    sqlite_db.add(_booking(tutor, student, purchase, base + timedelta(hours=11), status=BookingStatus.COMPLETED))
+    sqlite_db.flush()
+    sqlite_db.rollback()
+
+    incremental = _snapshot(sqlite_db)
+    assert incremental[1] == [(date.today(), "succeeded", 2, 3500)]
+    assert [(row[0], row[2], row[3], row[4]) for row in incremental[0]] == [
+        (monday, "math", "COMPLETED", 1),
+        (monday + timedelta(days=2), "physics", "PENDING", 1),
+    ]
+
+    # Durata calcolata a 0 (riga storica): il rebuild usa duration_hours come l'hook
+    sqlite_db.query(Booking).filter(Booking.id == bookings[0].id).update({"calculated_duration": 0})
+    rebuild_booking_rollups(sqlite_db)
+    rebuild_payment_rollups(sqlite_db)
+    sqlite_db.commit()
+    assert _snapshot(sqlite_db) == incremental
+
+
+def test_bulk_recalculation_keeps_rollups_in_sync(sqlite_db):
+    from app.bookings.services import EnhancedBookingService
+
+    tutor, student, purchase = _seed(sqlite_db)
+    start = datetime.combine(date.today(), datetime.min.time()) + timedelta(hours=9)
+    booking = _booking(tutor, student, purchase, start, price="99.00", status=BookingStatus.COMPLETED)
+    sqlite_db.add(booking)
+    sqlite_db.commit()
+
+    results = asyncio.run(EnhancedBookingService.bulk_recalculate_bookings(sqlite_db, [booking.id]))
+
+    assert results["updated"] == 1
+    incremental = _snapshot(sqlite_db)
+    rebuild_booking_rollups(sqlite_db)
+    sqlite_db.commit()
+    assert _snapshot(sqlite_db) == incremental
+    assert incremental[0][0][6] != Decimal("99.00")
+
+
+def test_weekly_and_subject_widgets_read_rollups(sqlite_db):
+    tutor, student, purchase = _seed(sqlite_db)
+    monday = date.today() - timedelta(days=date.today().weekday())
+    base = datetime.combine(monday, datetime.min.time())
+    sqlite_db.add_all([
+        _booking(tutor, student, purchase, base + timedelta(hours=9), status=BookingStatus.COMPLETED),
+        _booking(tutor, student, purchase, base + timedelta(hours=11), subject="physics", price="40.00",
+                 status=BookingStatus.COMPLETED),
+        _booking(tutor, student, purchase, base - timedelta(days=7) + timedelta(hours=9)),
+    ])
+    sqlite_db.commit()
+
+    trends = asyncio.run(DashboardRealTimeService.get_weekly_trends_widget(sqlite_db, weeks_back=2))
+    assert [(w["week_start"], w["total_bookings"], w["completed_bookings"], w["weekly_revenue"]) for w in trends["weekly_data"]] == [
+        ((monday - timedelta(days=7)).isoformat(), 1, 0, 0.0),
+        (monday.isoformat(), 2, 2, 65.0),
+    ]
+    assert trends["weekly_data"][-1]["active_students"] == 1
+
+    subjects = asyncio.run(DashboardRealTimeService.get_subject_analytics_widget(sqlite_db))
+    assert [s["subject"] for s in subjects["subject_breakdown"]] == ["physics", "math"]
+    assert subjects["subject_breakdown"][1]["total_bookings"] == 2
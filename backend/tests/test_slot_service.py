@@ -0,0 +1,190 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.bookings.availability import availability_index
+from app.slots.models import RecurringAvailability, Slot
+from app.slots.search import free_intervals
+from app.slots.services import SlotService
+from app.bookings.models import Booking, BookingStatus
+from app.users.models import Tutor
+from tests.utils import count_queries
+
+
+def test_create_multiple_slots_bulk_inserts_and_skips_overlaps(sqlite_db):
+    # Mondays and Wednesdays of January 2025: 1, 6, 8, 13, 15, 20, 22, 27, 29
+    sqlite_db.add_all([
+        Slot(tutor_id=1, date=date(2025, 1, 8), start_time=time(16), end_time=time(17)),  # overlaps
+        Slot(tutor_id=1, date=date(2025, 1, 13), start_time=time(18), end_time=time(19)),  # touches only
+        Slot(tutor_id=2, date=date(2025, 1, 15), start_time=time(15), end_time=time(18)),  # other tutor
+    ])
+    sqlite_db.commit()
+
+    with count_queries(sqlite_db.get_bind()) as queries:
+        summary = asyncio.run(SlotService.create_multiple_slots(
+            sqlite_db, 1, date(2025, 1, 1), date(2025, 1, 31), time(15), time(18), days_of_week=[0, 2]
+        ))
+
+    # one SELECT each for existing slots and templates, one INSERT ... RETURNING (plus BEGIN/COMMIT)
+    assert len([q for q in queries.statements if q.lstrip().upper().startswith(("SELECT", "INSERT"))]) == 3
+    assert (summary["requested"], summary["created"], summary["skipped"]) == (9, 8, 1)
+    assert summary["skipped_dates"] == [date(2025, 1, 8)]
+    assert len(set(summary["slot_ids"])) == 8
+    assert sqlite_db.query(Slot).filter(Slot.tutor_id == 1).count() == 10
+
+    again = asyncio.run(SlotService.create_multiple_slots(
+        sqlite_db, 1, date(2025, 1, 1), date(2025, 1, 31), time(15), time(18), days_of_week=[0, 2]
+    ))
+    assert (again["created"], again["skipped"]) == (0, 9)
+
+    with pytest.raises(ValueError):
+        asyncio.run(SlotService.create_multiple_slots(sqlite_db, 1, date(2025, 1, 1), date(2025, 1, 2), time(18), time(15)))
+
+
+def test_create_multiple_slots_ignores_slots_on_unrequested_days(sqlite_db):
+    sqlite_db.add(Slot(tutor_id=1, date=date(2025, 1, 7), start_time=time(15), end_time=time(18)))  # a Tuesday
+    sqlite_db.commit()
+
+    summary = asyncio.run(SlotService.create_multiple_slots(
+        sqlite_db, 1, date(2025, 1, 6), date(2025, 1, 8), time(15), time(18), days_of_week=[0, 2]
+    ))
+    assert (summary["requested"], summary["created"], summary["skipped"]) == (2, 2, 0)
+    assert summary["skipped_dates"] == []
+
+
+def test_create_multiple_slots_skips_recurring_occurrences(sqlite_db):
+    asyncio.run(SlotService.create_recurring_availability(
+        sqlite_db, 1, 0, time(14), time(16), date(2025, 1, 1), exceptions=[date(2025, 1, 13)]
+    ))
+    template = asyncio.run(SlotService.create_recurring_availability(sqlite_db, 1, 2, time(15), time(16), date(2025, 1, 1)))
+    # A materialised occurrence moved out of the window no longer blocks its day
+    moved = asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 8)))
+    moved.start_time, moved.end_time = time(8), time(9)
+    sqlite_db.commit()
+
+    summary = asyncio.run(SlotService.create_multiple_slots(
+        sqlite_db, 1, date(2025, 1, 6), date(2025, 1, 15), time(15), time(18), days_of_week=[0, 2]
+    ))
+    # Mondays 6 and 13 (exception), Wednesdays 8 (materialised at 8-9) and 15
+    assert (summary["requested"], summary["created"], summary["skipped"]) == (4, 2, 2)
+    assert summary["skipped_dates"] == [date(2025, 1, 6), date(2025, 1, 15)]
+
+
+def test_recurring_availability_is_expanded_lazily_and_materialized_on_edit(sqlite_db):
+    template = asyncio.run(SlotService.create_recurring_availability(
+        sqlite_db, 1, 0, time(15), time(18), date(2025, 1, 1), date(2025, 1, 31), exceptions=[date(2025, 1, 13)]
+    ))
+    sqlite_db.add(Slot(tutor_id=1, date=date(2025, 1, 20), start_time=time(9), end_time=time(10)))
+    sqlite_db.commit()
+
+    slots = asyncio.run(SlotService.get_slots_by_date_range(sqlite_db, 1, date(2025, 1, 1), date(2025, 1, 31)))
+    assert [(s.date.day, s.start_time.hour, s.id is None) for s in slots] == [
+        (6, 15, True), (20, 9, False), (20, 15, True), (27, 15, True)
+    ]
+    assert {s.recurring_availability_id for s in slots if s.id is None} == {template.id}
+    assert sqlite_db.query(Slot).count() == 1  # nothing stored per occurrence
+
+    # Editing an occurrence stores it; the stored row replaces the virtual one
+    slot = asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 27)))
+    slot.is_available = False
+    sqlite_db.commit()
+    available = asyncio.run(SlotService.get_available_slots(sqlite_db, 1, date(2025, 1, 27)))
+    assert available == []
+    assert asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 27))).id == slot.id
+    with pytest.raises(ValueError):
+        asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 13)))
+
+
+def test_materialize_occurrence_race_returns_the_stored_row(sqlite_db, monkeypatch):
+    template = asyncio.run(SlotService.create_recurring_availability(
+        sqlite_db, 1, 0, time(15), time(18), date(2025, 1, 1)
+    ))
+    winner = asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 6)))
+
+    # The concurrent request has not seen the stored row when it checks
+    find = SlotService._find_materialized
+    misses = iter([None])
+    monkeypatch.setattr(SlotService, "_find_materialized", staticmethod(
+        lambda db, template_id, day: next(misses, None) or find(db, template_id, day)
+    ))
+    sqlite_db.add(Slot(tutor_id=1, date=date(2025, 1, 7), start_time=time(9), end_time=time(10)))
+    slot = asyncio.run(SlotService.materialize_occurrence(sqlite_db, template.id, date(2025, 1, 6), commit=False))
+    sqlite_db.commit()
+
+    assert slot.id == winner.id
+    assert sqlite_db.query(Slot).filter(Slot.recurring_availability_id == template.id).count() == 1
+    assert sqlite_db.query(Slot).filter(Slot.date == date(2025, 1, 7)).count() == 1  # caller's work kept
+
+
+def test_availability_index_covers_recurring_occurrences(sqlite_db):
+    day = (datetime.utcnow() + timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0)
+    template = asyncio.run(SlotService.create_recurring_availability(
+        sqlite_db, 1, day.weekday(), time(14), time(18), day.date() - timedelta(days=30)
+    ))
+    window = (day.replace(hour=15), day.replace(hour=16))
+    assert availability_index.is_available(sqlite_db, 1, *window)
+    assert not availability_index.is_available(sqlite_db, 1, day.replace(hour=17), day.replace(hour=19))
+    assert not availability_index.is_available(sqlite_db, 1, window[0] + timedelta(days=1), window[1] + timedelta(days=1))
+
+    # Skipping the occurrence and deleting the template are both seen by the cached index
+    asyncio.run(SlotService.add_recurring_exception(sqlite_db, template.id, day.date()))
+    assert not availability_index.is_available(sqlite_db, 1, *window)
+    assert availability_index.is_available(sqlite_db, 1, window[0] + timedelta(days=7), window[1] + timedelta(days=7))
+    assert asyncio.run(SlotService.delete_recurring_availability(sqlite_db, template.id))
+    assert sqlite_db.query(RecurringAvailability).count() == 0
+    assert not availability_index.is_available(sqlite_db, 1, window[0] + timedelta(days=7), window[1] + timedelta(days=7))
+
+
+def test_free_intervals_sweep_line():
+    day = datetime(2025, 1, 6)
+    h = lambda hour: day + timedelta(hours=hour)  # noqa: E731
+    slots = [(h(9), h(12)), (h(11), h(14)), (h(16), h(17)), (h(17), h(18))]
+    bookings = [(h(10), h(11)), (h(13), h(14)), (h(15), h(16))]
+
+    assert free_intervals(slots, bookings) == [(h(9), h(10)), (h(11), h(13)), (h(16), h(18))]
+    assert free_intervals(slots, [(h(8), h(19))]) == []
+
+
+def test_search_free_windows_across_tutors_is_cached(sqlite_db):
+    day = (datetime.utcnow() + timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+    sqlite_db.add_all([
+        Tutor(id=1, user_id=1, first_name="Marco", last_name="Rossi", subjects="Matematica, Fisica"),
+        Tutor(id=2, user_id=2, first_name="Anna", last_name="Verdi", subjects='["matematica"]'),
+        Tutor(id=3, user_id=3, first_name="Luca", last_name="Neri", subjects="Inglese"),
+        Tutor(id=4, user_id=4, first_name="Sara", last_name="Blu", subjects="Matematica", is_available=False),
+        Slot(tutor_id=1, date=day.date(), start_time=time(14), end_time=time(19)),
+        Slot(tutor_id=3, date=day.date(), start_time=time(8), end_time=time(20)),
+        Slot(tutor_id=4, date=day.date(), start_time=time(8), end_time=time(20)),
+        Booking(
+            student_id=1, tutor_id=1, package_purchase_id=1, start_time=day.replace(hour=15),
+            end_time=day.replace(hour=16), duration_hours=1, subject="math", status=BookingStatus.CONFIRMED
+        ),
+    ])
+    sqlite_db.commit()
+    asyncio.run(SlotService.create_recurring_availability(sqlite_db, 2, day.weekday(), time(9), time(11), day.date()))
+
+    search = lambda: asyncio.run(SlotService.search_free_windows(  # noqa: E731
+        sqlite_db, "matematica", day.date(), day.date() + timedelta(days=6), duration_hours=2, limit=5
+    ))
+    with count_queries(sqlite_db.get_bind()) as queries:
+        windows = search()
+    assert len(queries) == 4
+    assert [(w["tutor_name"], w["start_time"].hour, w["end_time"].hour) for w in windows] == [
+        ("Anna Verdi", 9, 11), ("Marco Rossi", 16, 19)
+    ]
+
+    with count_queries(sqlite_db.get_bind()) as queries:
+        assert search() == windows
+    assert len(queries) == 0
+
+    # A new booking invalidates the cached result on commit
+    sqlite_db.add(Booking(
+        student_id=1, tutor_id=1, package_purchase_id=1, start_time=day.replace(hour=17),
+        end_time=day.replace(hour=18), duration_hours=1, subject="math", status=BookingStatus.PENDING
+    ))
+    sqlite_db.commit()
+    assert [w["tutor_name"] for w in search()] == ["Anna Verdi"]
+
+    with pytest.raises(ValueError):
+        asyncio.run(SlotService.search_free_windows(sqlite_db, "matematica", day.date(), day.date() + timedelta(days=60)))
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, func, select
+from sqlalchemy.dialects import postgresql
+
+from app.core.time_buckets import iter_buckets, time_bucket
+
+metadata = MetaData()
+events = Table("events", metadata, Column("id", Integer, primary_key=True), Column("ts", DateTime))
+
+
+def test_sqlite_buckets_match_date_trunc_semantics():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(events.insert(), [
+            {"ts": datetime(2026, 10, 18, 23, 30)},  # domenica
+            {"ts": datetime(2026, 10, 12, 0, 0)},    # lunedì
+            {"ts": datetime(2026, 3, 1, 8, 0)},
+        ])
+        results = {
+            granularity: conn.execute(
+                select(time_bucket(granularity, events.c.ts)).order_by(events.c.id)
+            ).scalars().all()
+            for granularity in ("day", "week", "month")
+        }
+        grouped = conn.execute(
+            select(time_bucket("week", events.c.ts).label("b"), func.count())
+            .group_by(time_bucket("week", events.c.ts)).order_by("b")
+        ).all()
+
+    assert results["day"] == [date(2026, 10, 18), date(2026, 10, 12), date(2026, 3, 1)]
+    assert results["week"] == [date(2026, 10, 12), date(2026, 10, 12), date(2026, 2, 23)]
+    assert results["month"] == [date(2026, 10, 1), date(2026, 10, 1), date(2026, 3, 1)]
+    assert grouped == [(date(2026, 2, 23), 1), (date(2026, 10, 12), 2)]
+
+
+def test_postgres_compiles_to_date_trunc():
+    sql = str(select(time_bucket("month", events.c.ts)).compile(dialect=postgresql.dialect()))
+    assert "CAST(date_trunc('month', events.ts) AS DATE)" in sql
+
+
+def test_iter_buckets_covers_range():
+    assert list(iter_buckets("month", date(2025, 11, 15), date(2026, 2, 1))) == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)
+    ]
+    assert list(iter_buckets("week", date(2026, 10, 14), date(2026, 10, 19))) == [date(2026, 10, 12), date(2026, 10, 19)]
@@ -0,0 +1,102 @@
+"""
+Shared test helpers
+"""
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+import app.core.models  # noqa: F401 - register all mappers
+from app.core.database import Base
+from app.packages.models import Package, PackagePurchase
+from app.users.models import Student, Tutor, User, UserRole
+
+
+class QueryCounter:
+    """SQL statements executed on an engine while the counter is active"""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    with count_queries(engine) as queries:
+        ...
+    assert len(queries) == 2
+    """
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter._record)
+
+
+def make_sqlite_engine():
+    """Fresh in-memory database with all tables; StaticPool shares it across sessions and threads"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def add_tutor(db, email: str = "tutor@example.com", first_name: str = "T", last_name: str = "T") -> Tutor:
+    """Tutor with its user (flushed, not committed)"""
+    user = User(email=email, hashed_password="x", role=UserRole.TUTOR)
+    db.add(user)
+    db.flush()
+    tutor = Tutor(user_id=user.id, first_name=first_name, last_name=last_name)
+    db.add(tutor)
+    db.flush()
+    return tutor
+
+
+def add_student(db, email: str = "student@example.com", first_name: str = "S", last_name: str = "S") -> Student:
+    """Student with its user (flushed, not committed)"""
+    user = User(email=email, hashed_password="x", role=UserRole.STUDENT)
+    db.add(user)
+    db.flush()
+    student = Student(
+        user_id=user.id, first_name=first_name, last_name=last_name, date_of_birth=date(2008, 1, 1),
+        institute="ITIS", class_level="4A", phone_number="000"
+    )
+    db.add(student)
+    db.flush()
+    return student
+
+
+def seed_purchase(
+    db,
+    hours: int = 20,
+    expiry_date: Optional[date] = None,
+    tutor: Optional[Tutor] = None,
+    student: Optional[Student] = None
+) -> Tuple[Tutor, Student, Package, PackagePurchase]:
+    """
+    Tutor, student, a math package of `hours` and an unused purchase of it
+    expiring in 30 days by default. Flushed, not committed.
+    """
+    tutor = tutor or add_tutor(db)
+    student = student or add_student(db)
+    package = Package(tutor_id=tutor.id, name="Pacchetto", total_hours=hours, price=100, subject="math")
+    db.add(package)
+    db.flush()
+    purchase = PackagePurchase(
+        student_id=student.id, package_id=package.id,
+        expiry_date=expiry_date or date.today() + timedelta(days=30),
+        hours_used=0, hours_remaining=hours
+    )
+    db.add(purchase)
+    db.flush()
+    return tutor, student, package, purchase
@@ -1,5 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 
+const PAGINATION_HEADERS = ['X-Next-Cursor', 'X-Total-Count', 'X-Count-Mode']
+
 export async function GET(
   request: NextRequest,
   { params }: { params: { path: string[] } }
@@ -26,6 +28,13 @@ export async function GET(
     
     const data = await response.text()
     
+    // Header di paginazione delle liste (X-Next-Cursor, X-Total-Count, X-Count-Mode)
+    const paginationHeaders: Record<string, string> = {}
+    for (const name of PAGINATION_HEADERS) {
+      const value = response.headers.get(name)
+      if (value !== null) paginationHeaders[name] = value
+    }
+    
     return new NextResponse(data, {
       status: response.status,
       headers: {
@@ -33,6 +42,8 @@ export async function GET(
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
         'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+        'Access-Control-Expose-Headers': PAGINATION_HEADERS.join(', '),
+        ...paginationHeaders,
       },
     })
   } catch (error) {
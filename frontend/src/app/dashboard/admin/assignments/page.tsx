@@ -15,6 +15,7 @@ import {
   TrashIcon
 } from '@heroicons/react/24/outline'
 import { api } from '@/lib/api'
+import { fetchAllPages } from '@/utils/pagination'
 
 interface Assignment {
   id: number
@@ -73,15 +74,15 @@ export default function AssignmentsPage() {
       setLoading(true)
       setError(null)
 
-      const [assignmentsRes, studentsRes, tutorsRes, packagesRes] = await Promise.all([
-        api.get('/api/admin/package-assignments'),
+      const [assignmentsData, studentsRes, tutorsRes, packagesRes] = await Promise.all([
+        fetchAllPages('/api/admin/package-assignments'),
         api.get('/api/users/students'),
         api.get('/api/users/tutors'),
         api.get('/api/packages')
       ])
 
       // Transform package assignments to our Assignment interface
-      const transformedAssignments: Assignment[] = assignmentsRes.data.map((assignment: any) => ({
+      const transformedAssignments: Assignment[] = assignmentsData.map((assignment: any) => ({
         id: assignment.id,
         student: {
           id: assignment.student_id,
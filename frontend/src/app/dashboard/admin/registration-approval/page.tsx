@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { api } from '@/lib/api';
+import { fetchAllPages } from '@/utils/pagination';
 import { 
   CheckCircleIcon,
   XCircleIcon,
@@ -87,8 +88,8 @@ export default function RegistrationApprovalPage() {
     setLoading(true);
     try {
       // Use centralized api client (handles auth/refresh)
-      const response = await api.get('/api/admin/pending-approvals');
-      const data = response.data || [];
+      // Tutte le pagine (X-Next-Cursor), non solo la prima
+      const data = await fetchAllPages<PendingUser>('/api/admin/pending-approvals');
 
       // Enrich profiles using api client
       const enrichedUsers = await Promise.all(
@@ -14,6 +14,7 @@ import { useNotifications } from '@/components/notifications/NotificationSystem'
 import { UserRole } from '@/lib/permissions';
 import { RoleIcon, RoleBadge } from '@/components/ui/PermissionComponents';
 import { api } from '@/lib/api';
+import { fetchAllPages } from '@/utils/pagination';
 import SearchBar from '@/components/ui/SearchBar'
 
 interface User {
@@ -94,8 +95,8 @@ export default function UserManagementPage() {
     setLoading(true);
     try {
       // Fetch all users usando la libreria api
-      const usersRes = await api.get('/api/admin/users');
-      setUsers(usersRes.data);
+      // La lista è paginata lato server: segue X-Next-Cursor fino all'ultima pagina
+      setUsers(await fetchAllPages<User>('/api/admin/users'));
 
       // Fetch students
       const studentsRes = await api.get('/api/users/students');
@@ -107,8 +108,7 @@ export default function UserManagementPage() {
 
       // Fetch pending approvals
       try {
-        const approvalsRes = await api.get('/api/admin/pending-approvals');
-        setPendingApprovals(approvalsRes.data);
+        setPendingApprovals(await fetchAllPages('/api/admin/pending-approvals'));
       } catch (error) {
         // Endpoint potrebbe non esistere, ignoriamo per ora
         console.log('Pending approvals endpoint not available');
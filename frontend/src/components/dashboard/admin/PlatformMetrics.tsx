@@ -13,6 +13,7 @@ import {
   CheckCircle 
 } from 'lucide-react';
 import { api } from '@/lib/api';
+import { fetchTotalCount } from '@/utils/pagination';
 
 interface PlatformMetricsData {
   totalUsers: number | null;
@@ -73,16 +74,16 @@ export function PlatformMetrics() {
       setError(null);
       
       // Fetch dalle API esistenti del backend
-      const [analyticsRes, usersRes] = await Promise.all([
+      // Totale utenti dall'header X-Total-Count: la lista è paginata
+      const [analyticsRes, totalUsers] = await Promise.all([
         api.get('/api/analytics/metrics'),
-        api.get('/api/admin/users'),
+        fetchTotalCount('/api/admin/users'),
       ]);
 
       const analyticsData = analyticsRes.data;
-      const usersData = usersRes.data;
 
       setMetrics({
-        totalUsers: usersData.length || null,
+        totalUsers: totalUsers || null,
         totalStudents: analyticsData.students || null,
         totalTutors: analyticsData.tutors || null,
         totalPackages: analyticsData.packages || null,
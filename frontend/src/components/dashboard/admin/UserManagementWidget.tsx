@@ -15,7 +15,7 @@ import {
   Edit,
   Ban
 } from 'lucide-react';
-import { api } from '@/lib/api';
+import { fetchAllPages } from '@/utils/pagination';
 import { UserRole, UserStatus } from '@/lib/permissions';
 import { RoleIcon, StatusBadge } from '@/components/ui/PermissionComponents';
 
@@ -114,8 +114,7 @@ export function UserManagementWidget() {
       setLoading(true);
       setError(null);
 
-      const response = await api.get('/api/admin/users');
-      const usersData = response.data;
+      const usersData = await fetchAllPages('/api/admin/users');
 
       // Trasforma i dati in formato User
       const transformedUsers: User[] = usersData.map((user: any) => ({
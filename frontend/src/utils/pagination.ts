@@ -0,0 +1,39 @@
+import { api } from '@/lib/api';
+
+// Header HTTP delle liste paginate del backend (axios li espone in minuscolo)
+export const NEXT_CURSOR_HEADER = 'x-next-cursor';
+export const TOTAL_COUNT_HEADER = 'x-total-count';
+
+const MAX_PAGE_SIZE = 1000;
+
+/**
+ * Scarica tutte le righe di una lista paginata seguendo X-Next-Cursor.
+ */
+export async function fetchAllPages<T = any>(
+  path: string,
+  params: Record<string, unknown> = {},
+  pageSize: number = MAX_PAGE_SIZE
+): Promise<T[]> {
+  const rows: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get(path, {
+      params: { ...params, limit: pageSize, ...(cursor ? { cursor } : {}) },
+    });
+    rows.push(...(response.data || []));
+    cursor = response.headers?.[NEXT_CURSOR_HEADER] || undefined;
+  } while (cursor);
+  return rows;
+}
+
+/**
+ * Totale esatto di una lista paginata (X-Total-Count) senza scaricarne le righe.
+ */
+export async function fetchTotalCount(
+  path: string,
+  params: Record<string, unknown> = {}
+): Promise<number | null> {
+  const response = await api.get(path, { params: { ...params, count: 'exact', limit: 1 } });
+  const total = response.headers?.[TOTAL_COUNT_HEADER];
+  return total != null ? Number(total) : null;
+}